@@ -0,0 +1,88 @@
+"""
+Measures the Azure attachment helpers against a local stub of the Azure DevOps API - uploads per second for different
+numbers of workers, how long failed tests take to be found for several runs, and the peak memory used streaming a
+large attachment
+This is not collected by pytest, as the timings depend on the machine - run it with
+    python -m tests.benchmarks.attachment_uploads
+"""
+import os
+import tempfile
+import time
+import tracemalloc
+from unittest import mock
+
+from tests.utilities.azure_stub_server import AzureStubServer
+from uitestcore.utilities.attachments_api import AttachmentBody, attach_files, get_failed_tests
+
+# Seconds the stub server waits before responding, like the time taken by Azure
+DELAY = 0.02
+TESTS = 4
+FILES_PER_TEST = 6
+
+
+def write_attachments(folder):
+    """
+    Write a folder of small screenshots for each failed test
+    :param folder: the attachments folder
+    :return: list of the failed tests, as returned by get_failed_tests
+    """
+    for test in range(TESTS):
+        os.makedirs(os.path.join(folder, f"test{test}"))
+        for file in range(FILES_PER_TEST):
+            with open(os.path.join(folder, f"test{test}", f"screenshot{file}.png"), "wb") as screenshot:
+                screenshot.write(f"test{test} screenshot{file}".encode())
+    return [(10, test, f"test{test}") for test in range(TESTS)]
+
+
+def upload_throughput(folder):
+    failed_tests = write_attachments(folder)
+    files = TESTS * FILES_PER_TEST
+
+    for max_workers in (1, 4, 8):
+        with AzureStubServer(delay=DELAY) as server, mock.patch("builtins.print"), \
+                mock.patch("uitestcore.utilities.attachments_api.get_failed_tests", return_value=failed_tests):
+            start = time.perf_counter()
+            attach_files([10], server.url, "test-token", folder, max_workers=max_workers,
+                         journal_file=os.path.join(folder, f"journal-{max_workers}.jsonl"))
+            duration = time.perf_counter() - start
+        print(f"Attachment uploads with {max_workers} worker(s): {files / duration:.0f} per second, "
+              f"{server.connections} connection(s)")
+
+
+def failed_tests_query_time():
+    runs = {run_id: [{"id": result_id, "outcome": "Failed", "testCase": {"name": f"test{result_id}"}}
+                     for result_id in range(4)] for run_id in range(1, 9)}
+
+    for max_workers in (1, 8):
+        with AzureStubServer(delay=DELAY, runs=runs) as server, mock.patch("builtins.print"):
+            start = time.perf_counter()
+            get_failed_tests(list(runs), server.url, "test-token", max_workers=max_workers)
+            duration = time.perf_counter() - start
+        print(f"Finding the failed tests in {len(runs)} runs with {max_workers} worker(s): {duration * 1000:.0f}ms")
+
+
+def streaming_peak_memory(folder, file_size=32 * 1024 * 1024):
+    file_path = os.path.join(folder, "large.png")
+    with open(file_path, "wb") as file:
+        file.truncate(file_size)
+    body = AttachmentBody(file_path, "large.png")
+
+    tracemalloc.start()
+    try:
+        while body.read(8192):
+            pass
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    print(f"Peak memory streaming a {file_size // (1024 * 1024)}MB attachment: {peak / (1024 * 1024):.1f}MB")
+
+
+def main():
+    with tempfile.TemporaryDirectory() as folder:
+        upload_throughput(os.path.join(folder, "uploads"))
+        failed_tests_query_time()
+        streaming_peak_memory(folder)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Measures the time auto_log adds to each call of a decorated function, before and after the logger was looked up at
+decoration time, with DEBUG logging disabled and enabled
+This is not collected by pytest, as the timings depend on the machine - run it with
+    python -m tests.benchmarks.auto_log_overhead
+"""
+import logging
+import string
+import timeit
+
+from uitestcore.utilities.logger_handler import auto_log
+from uitestcore.utilities.string_util import generate_random_string
+
+LOGGER_NAME = "auto_log_benchmark"
+CALLS = 20000
+REPEATS = 5
+
+
+def previous_auto_log(logger_name):
+    """
+    auto_log as it was before the logger was looked up at decoration time
+    :param logger_name: the name of the logger to use
+    """
+    def decorator(func):
+        def wrapper(*args, **kwargs):
+            logger = logging.getLogger(logger_name)
+            log_identifier = generate_random_string(6, chars=string.digits)
+            try:
+                logger.debug("Entering function %s (Function call ID %s) with args %s and kwargs %s",
+                             func.__name__, log_identifier, args, kwargs)
+                return_value = func(*args, **kwargs)
+                logger.debug("Exited function %s (Function call ID %s) with return value %s",
+                             func.__name__, log_identifier, return_value)
+                return return_value
+            except Exception as e:
+                logger.exception("There was an exception thrown in function %s (Function call ID %s)",
+                                 func.__name__, log_identifier)
+                raise e
+        return wrapper
+    return decorator
+
+
+def undecorated(value):
+    return value
+
+
+def time_per_call(func):
+    """
+    :param func: the function to time
+    :return: the fastest time for one call in seconds
+    """
+    return min(timeit.repeat(lambda: func(1), number=CALLS, repeat=REPEATS)) / CALLS
+
+
+def main():
+    logger = logging.getLogger(LOGGER_NAME)
+    logger.propagate = False
+    logger.addHandler(logging.NullHandler())
+    previous = previous_auto_log(LOGGER_NAME)(undecorated)
+    current = auto_log(LOGGER_NAME)(undecorated)
+
+    for level in (logging.INFO, logging.DEBUG):
+        logger.setLevel(level)
+        baseline, previous_time, current_time = [time_per_call(func) for func in (undecorated, previous, current)]
+        print(f"auto_log overhead per call with {logging.getLevelName(level)} logging: "
+              f"before {(previous_time - baseline) * 1e6:.2f}us, after {(current_time - baseline) * 1e6:.2f}us")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,27 @@
 from hamcrest import assert_that, equal_to
 from uitestcore.custom_expected_conditions import *
+from selenium.webdriver.common.by import By
+from uitestcore.page_element import PageElement
 
 
 class MockDriver:
     def __init__(self, state):
         self.state = state
+        self.script_args = None
 
-    def execute_script(self, _script):
+    def execute_script(self, _script, *args):
+        self.script_args = args
         return self.state
 
 
+class MockDocumentDriver:
+    def __init__(self, identity, ready_state, url):
+        self.document_state = [identity, ready_state, url]
+
+    def execute_script(self, _script):
+        return self.document_state
+
+
 class MockFinder:
     @staticmethod
     def elements(page_element):
@@ -50,6 +62,56 @@ def test_browser_is_ready_none():
     assert_that(result, equal_to(False), "The browser should not have been ready")
 
 
+def test_new_page_is_ready_new_document_complete():
+    inst = NewPageIsReady(("1000.5", "https://test.com/page1"))
+
+    result = inst(MockDocumentDriver("2000.5", "complete", "https://test.com/page2"))
+
+    assert_that(result, equal_to(True), "The new page should have been ready")
+
+
+def test_new_page_is_ready_new_document_loading():
+    inst = NewPageIsReady(("1000.5", "https://test.com/page1"))
+
+    result = inst(MockDocumentDriver("2000.5", "loading", "https://test.com/page2"))
+
+    assert_that(result, equal_to(False), "The new page should not have been ready")
+
+
+def test_new_page_is_ready_previous_document_still_complete():
+    inst = NewPageIsReady(("1000.5", "https://test.com/page1"))
+
+    result = inst(MockDocumentDriver("1000.5", "complete", "https://test.com/page1"))
+
+    assert_that(result, equal_to(False), "The previous page being complete should not count as the new page")
+
+
+def test_new_page_is_ready_same_document_navigation():
+    inst = NewPageIsReady(("1000.5", "https://test.com/page1"))
+
+    result = inst(MockDocumentDriver("1000.5", "complete", "https://test.com/page1#section"))
+
+    assert_that(result, equal_to(True), "Navigating within the same document should count as ready")
+
+
+def test_network_is_idle():
+    driver = MockDriver(True)
+    inst = NetworkIsIdle(250)
+
+    result = inst(driver)
+
+    assert_that(result, equal_to(True), "The network should have been idle")
+    assert_that(driver.script_args, equal_to((250,)), "The quiet period should be passed to the script")
+
+
+def test_network_is_not_idle():
+    inst = NetworkIsIdle()
+
+    result = inst(MockDriver(False))
+
+    assert_that(result, equal_to(False), "The network should not have been idle")
+
+
 def test_element_has_attribute():
     inst = ElementHasAttribute(MockFinder(), "page_element", "test_name", "valid_attribute")
 
@@ -72,3 +134,29 @@ def test_element_has_attribute_not_matching():
     result = inst("driver")
 
     assert_that(result, equal_to(False), "The attribute should not have been found")
+
+
+def test_element_condition():
+    driver = MockDriver([True])
+    inst = ElementCondition.has_attribute(PageElement(By.ID, "test_id"), "class", "test_value")
+
+    result = inst(driver)
+
+    assert_that(result, equal_to(True), "The condition should have been met")
+    assert_that(driver.script_args, equal_to(([[["attribute", By.ID, "test_id", ["class", "test_value"]]]],)),
+                "The condition should be passed to the script as a single group")
+
+
+def test_element_condition_str():
+    inst = ElementCondition.has_attribute(PageElement(By.ID, "test_id"), "maxlength", 10)
+
+    assert_that(str(inst), equal_to(f"{PageElement(By.ID, 'test_id')} attribute maxlength=10"),
+                "Non-string attribute values should be included in the description")
+
+
+def test_element_condition_not_met():
+    inst = ElementCondition.visible(PageElement(By.ID, "test_id"))
+
+    result = inst(MockDriver([False]))
+
+    assert_that(result, equal_to(False), "The condition should not have been met")
@@ -3,13 +3,23 @@ from hamcrest import assert_that, equal_to
 from selenium.webdriver.common.by import By
 from uitestcore.page_element import PageElement
 from uitestcore.finder import Finder
+from uitestcore.utilities.browser_scripts import DOM_GENERATION_SCRIPT, FIND_ELEMENTS_MANY_SCRIPT, \
+    VISIBLE_ELEMENTS_SCRIPT
 
 
 class MockDriver:
     def __init__(self, elements_to_return=None):
         self.elements_to_return = elements_to_return
+        self.round_trips = 0
+        self.find_elements_calls = 0
+        self.dom_generation = "document-1:0"
 
     def find_elements(self, by, value):
+        self.round_trips += 1
+        self.find_elements_calls += 1
+        return self.locate(by, value)
+
+    def locate(self, by, value):
         if self.elements_to_return:
             return self.elements_to_return
 
@@ -19,10 +29,21 @@ class MockDriver:
         else:
             return []
 
+    def execute_script(self, script, *args):
+        self.round_trips += 1
+        self.script = script
+        if script == DOM_GENERATION_SCRIPT:
+            return self.dom_generation if all(element.connected for element in args[0]) else None
+        if script == VISIBLE_ELEMENTS_SCRIPT:
+            return [element for element in args[0]
+                    if element.is_displayed() and element.get_attribute("aria-hidden") != "true"]
+        return [self.locate(by, value) for by, value in args[0]]
+
 
 class MockElement:
     def __init__(self, info="", is_displayed_flag=True, aria_hidden="false"):
         self.info = info
+        self.connected = True
         self.is_displayed_flag = is_displayed_flag
         self.aria_hidden = aria_hidden
 
@@ -90,6 +111,36 @@ def test_visible_elements_returns_correct_elements():
     assert_that(len(visible_elements), equal_to(1), "Incorrect number of elements returned")
 
 
+def test_visible_elements_in_browser_returns_correct_elements():
+    elements_to_return = [
+        MockElement("visible", True, "false"),
+        MockElement("", False, "false"),
+        MockElement("", True, "true"),
+        MockElement("", False, "true")
+    ]
+
+    driver = MockDriver(elements_to_return)
+    find = Finder(driver, None)
+
+    visible_elements = find.visible_elements(PageElement(By.CLASS_NAME, "test-class"), in_browser=True)
+
+    assert_that(driver.script, equal_to(VISIBLE_ELEMENTS_SCRIPT), "The visible elements script should have been run")
+    assert_that(len(visible_elements), equal_to(1), "Incorrect number of elements returned")
+    assert_that(visible_elements[0].info, equal_to("visible"), "The visible element should have been returned")
+    assert_that(driver.find_elements_calls, equal_to(1), "The elements should be found with the driver's implicit wait")
+    assert_that(driver.round_trips, equal_to(2), "The elements should be checked with one call to the driver")
+
+
+def test_visible_elements_in_browser_no_elements():
+    driver = MockDriver()
+    find = Finder(driver, None)
+
+    visible_elements = find.visible_elements(PageElement(By.CLASS_NAME, ""), in_browser=True)
+
+    assert_that(visible_elements, equal_to([]), "No elements should be returned")
+    assert_that(driver.round_trips, equal_to(1), "The script should not be run when no elements are found")
+
+
 def test_number_of_elements():
     elements_to_return = [MockElement(), MockElement(), MockElement()]
     driver = MockDriver(elements_to_return)
@@ -98,3 +149,147 @@ def test_number_of_elements():
     num_elements = find.number_of_elements(PageElement(By.CLASS_NAME, ""))
 
     assert_that(num_elements, equal_to(3), "Incorrect number of elements returned")
+
+
+def test_elements_many():
+    driver = MockDriver()
+    find = Finder(driver, None)
+    page_element_1 = PageElement(By.ID, "test-id")
+    page_element_2 = PageElement(By.XPATH, "//div")
+
+    elements = find.elements_many([page_element_1, page_element_2])
+
+    assert_that(driver.script, equal_to(FIND_ELEMENTS_MANY_SCRIPT), "The batched find script should have been run")
+    assert_that(elements[page_element_1][0].info, equal_to("elements found by 'id' using value 'test-id'"),
+                "Elements should be returned for the first page element")
+    assert_that(elements[page_element_2][0].info, equal_to("elements found by 'xpath' using value '//div'"),
+                "Elements should be returned for the second page element")
+
+
+def test_elements_many_no_page_elements():
+    driver = MockDriver()
+    find = Finder(driver, None)
+
+    elements = find.elements_many([])
+
+    assert_that(elements, equal_to({}), "An empty dict should be returned when no page elements are given")
+    assert_that(driver.round_trips, equal_to(0), "No call should be made to the driver")
+
+
+def test_elements_many_round_trips_compared_to_elements():
+    page_elements = [PageElement(By.CSS_SELECTOR, f".item-{index}") for index in range(30)]
+    loop_driver = MockDriver()
+    batch_driver = MockDriver()
+
+    for page_element in page_elements:
+        Finder(loop_driver, None).elements(page_element)
+    Finder(batch_driver, None).elements_many(page_elements)
+
+    assert_that(loop_driver.round_trips, equal_to(30), "The per-element loop should make one call per element")
+    assert_that(batch_driver.round_trips, equal_to(1),
+                "elements_many should make a single call for all of the page elements")
+
+
+def test_elements_cache_disabled_by_default():
+    driver = MockDriver()
+    find = Finder(driver, None)
+
+    find.elements(PageElement(By.ID, "test-id"))
+    find.elements(PageElement(By.ID, "test-id"))
+
+    assert_that(driver.find_elements_calls, equal_to(2), "Elements should not be cached by default")
+    assert_that(driver.round_trips, equal_to(2), "The DOM generation should not be checked when caching is off")
+
+
+def test_elements_cache_reuses_elements():
+    driver = MockDriver()
+    find = Finder(driver, None, cache_elements=True)
+
+    first = find.elements(PageElement(By.ID, "test-id"))
+    second = find.elements(PageElement(By.ID, "test-id"))
+
+    assert_that(second, equal_to(first), "The cached elements should be returned")
+    assert_that(driver.find_elements_calls, equal_to(1), "The driver should only be asked to find the elements once")
+    assert_that(driver.round_trips, equal_to(2), "The DOM generation should only be checked on the first find")
+    assert_that(find.cache_hits, equal_to(1), "Incorrect number of cache hits")
+    assert_that(find.cache_misses, equal_to(1), "Incorrect number of cache misses")
+
+
+def test_elements_cache_cleared_when_page_changed():
+    driver = MockDriver()
+    find = Finder(driver, None, cache_elements=True)
+
+    find.elements(PageElement(By.ID, "test-id"))
+    find.elements(PageElement(By.ID, "test-id"))
+    driver.dom_generation = "document-1:1"
+    find.page_may_have_changed()
+    find.elements(PageElement(By.ID, "test-id"))
+
+    assert_that(driver.find_elements_calls, equal_to(2), "A change to the page should clear the cache")
+    assert_that(find.cache_hits, equal_to(1), "Incorrect number of cache hits")
+    assert_that(find.cache_misses, equal_to(2), "Incorrect number of cache misses")
+
+
+def test_elements_cache_kept_when_page_unchanged():
+    driver = MockDriver()
+    find = Finder(driver, None, cache_elements=True)
+
+    find.elements(PageElement(By.ID, "test-id"))
+    find.page_may_have_changed()
+    find.elements(PageElement(By.ID, "test-id"))
+    find.elements(PageElement(By.ID, "test-id"))
+
+    assert_that(driver.find_elements_calls, equal_to(1), "The elements should be reused if the page is unchanged")
+    assert_that(driver.round_trips, equal_to(3), "The DOM generation should be checked once after the page may "
+                                                 "have changed")
+
+
+def test_elements_cache_cleared_when_context_changed():
+    driver = MockDriver()
+    find = Finder(driver, None, cache_elements=True)
+
+    find.elements(PageElement(By.ID, "test-id"))
+    find.context_changed()
+    find.elements(PageElement(By.ID, "test-id"))
+
+    assert_that(driver.find_elements_calls, equal_to(2), "The elements should be found again in the new context")
+    assert_that(find.cache_misses, equal_to(2), "The hit/miss counters should not be reset")
+
+
+def test_elements_cache_cleared_when_cached_element_removed():
+    driver = MockDriver()
+    find = Finder(driver, None, cache_elements=True)
+
+    first = find.elements(PageElement(By.ID, "test-id"))
+    first[0].connected = False
+    find.page_may_have_changed()
+    second = find.elements(PageElement(By.ID, "test-id"))
+
+    assert_that(second[0] is first[0], equal_to(False), "The removed element should not be reused")
+    assert_that(driver.find_elements_calls, equal_to(2), "The elements should have been found again")
+    assert_that(find.cache_hits, equal_to(0), "Incorrect number of cache hits")
+
+
+def test_elements_cache_does_not_store_empty_results():
+    driver = MockDriver()
+    find = Finder(driver, None, cache_elements=True)
+
+    find.elements(PageElement(By.ID, ""))
+    find.elements(PageElement(By.ID, ""))
+
+    assert_that(driver.find_elements_calls, equal_to(2), "Empty results should not be cached")
+    assert_that(find.cache_misses, equal_to(2), "Incorrect number of cache misses")
+
+
+def test_clear_cache():
+    driver = MockDriver()
+    find = Finder(driver, None, cache_elements=True)
+
+    find.elements(PageElement(By.ID, "test-id"))
+    find.elements(PageElement(By.ID, "test-id"))
+    find.clear_cache()
+    find.elements(PageElement(By.ID, "test-id"))
+
+    assert_that(driver.find_elements_calls, equal_to(2), "The elements should be found again after clearing the cache")
+    assert_that(find.cache_hits, equal_to(0), "The cache hits should have been reset")
+    assert_that(find.cache_misses, equal_to(1), "The cache misses should have been reset")
@@ -165,7 +165,23 @@ def test_open_url():
     interact.open_url("test/url")
 
     mock_driver.get.assert_called_once_with("test/url")
-    mock_waiter.for_page_to_load.assert_called_once()
+    mock_waiter.get_document_identity.assert_called_once()
+    mock_waiter.for_page_to_load.assert_called_once_with(mock_waiter.get_document_identity.return_value)
+
+
+def test_open_url_same_page():
+    for current_url, url in [("https://test.com/page", "https://test.com/page"),
+                             ("https://test.com/page", "https://test.com/page#section"),
+                             ("https://test.com/page#top", "https://test.com/page#section")]:
+        mock_driver = MagicMock(name="driver")
+        mock_waiter = MagicMock(name="wait")
+        mock_waiter.get_document_identity.return_value = ("1000.5", current_url)
+        interact = Interactor(mock_driver, None, None, mock_waiter, MagicMock(name="log"))
+
+        interact.open_url(url)
+
+        mock_driver.get.assert_called_once_with(url)
+        mock_waiter.for_page_to_load.assert_called_once_with(None)
 
 
 def test_append_and_open_url():
@@ -328,3 +344,32 @@ def test_clear_all_cookies():
     interact.clear_all_cookies()
 
     driver.delete_all_cookies.assert_called_once()
+
+
+def test_click_element_checks_cached_elements_on_next_find():
+    mock_driver = MagicMock(name="driver")
+    mock_driver.execute_script.return_value = "document-1:0"
+    mock_driver.find_elements.return_value = [MagicMock(name="element")]
+    finder = Finder(mock_driver, MagicMock(name="logger"), cache_elements=True)
+    interact = Interactor(mock_driver, finder, None, None, MagicMock(name="log"))
+
+    interact.click_element(PageElement(By.ID, "button"))
+    interact.click_element(PageElement(By.ID, "button"))
+
+    assert_that(mock_driver.find_elements.call_count, equal_to(1), "The cached element should be reused")
+    assert_that(mock_driver.execute_script.call_count, equal_to(2),
+                "The page should be checked again after the first click")
+
+
+def test_switch_to_frame_clears_cached_elements():
+    mock_driver = MagicMock(name="driver")
+    mock_driver.execute_script.return_value = "document-1:0"
+    mock_driver.find_elements.return_value = [MagicMock(name="element")]
+    finder = Finder(mock_driver, MagicMock(name="logger"), cache_elements=True)
+    interact = Interactor(mock_driver, finder, None, None, MagicMock(name="log"))
+
+    interact.switch_to_frame(PageElement(By.ID, "frame_id"))
+    finder.elements(PageElement(By.ID, "frame_id"))
+
+    assert_that(mock_driver.find_elements.call_count, equal_to(2),
+                "Elements found before switching frame should not be reused")
@@ -7,6 +7,7 @@ from tests.unit_test_utils import check_mocked_functions_called
 from uitestcore.finder import Finder
 from uitestcore.interrogator import Interrogator
 from uitestcore.page_element import PageElement
+from uitestcore.utilities.browser_scripts import READ_ELEMENTS_SCRIPT
 
 default_page_element = PageElement(By.ID, "test-id")
 
@@ -310,6 +311,29 @@ def test_are_elements_visible_one_aria_hidden():
     assert_that(result, equal_to(False), "One element should be aria hidden")
 
 
+def test_are_elements_visible_in_browser_all_visible():
+    mock_finder = MagicMock()
+    mock_finder.elements.return_value = ["element_1", "element_2"]
+    mock_finder.visible_in_browser.return_value = ["element_1", "element_2"]
+    interrogate = Interrogator(None, mock_finder, None)
+
+    result = interrogate.are_elements_visible(default_page_element, in_browser=True)
+
+    assert_that(result, equal_to(True), "All elements should be visible")
+    mock_finder.visible_in_browser.assert_called_once_with(["element_1", "element_2"])
+
+
+def test_are_elements_visible_in_browser_one_not_visible():
+    mock_finder = MagicMock()
+    mock_finder.elements.return_value = ["element_1", "element_2"]
+    mock_finder.visible_in_browser.return_value = ["element_1"]
+    interrogate = Interrogator(None, mock_finder, None)
+
+    result = interrogate.are_elements_visible(default_page_element, in_browser=True)
+
+    assert_that(result, equal_to(False), "One element should not be visible")
+
+
 def test_is_radio_button_visible():
     mock_is_element_or_parent_visible = MagicMock(return_value="result of is_displayed")
     interrogate = Interrogator(None, None, None)
@@ -490,6 +514,19 @@ def test_is_element_visible_and_contains_text_expected_text_not_found():
     assert_that(result, equal_to(False), "Expected text should not be found")
 
 
+def test_is_element_visible_and_contains_text_in_browser():
+    mock_element = MagicMock()
+    mock_element.text = "abcd"
+    mock_finder = MagicMock()
+    mock_finder.visible_elements.return_value = [mock_element]
+    interrogate = Interrogator(None, mock_finder, None)
+
+    result = interrogate.is_element_visible_and_contains_text(default_page_element, "abcd", in_browser=True)
+
+    assert_that(result, equal_to(True), "Expected text found")
+    mock_finder.visible_elements.assert_called_once_with(default_page_element, in_browser=True)
+
+
 def test_get_number_of_elements():
     mock_finder = MagicMock()
     mock_finder.elements.return_value = ["element_1", "element_2", "element_3"]
@@ -621,6 +658,20 @@ def test_get_list_of_attributes_no_element_found():
     assert_that(result, equal_to([]), "No elements should have been found")
 
 
+def test_get_list_of_attributes_above_bulk_read_threshold():
+    mock_driver = MagicMock()
+    mock_driver.execute_script.return_value = {"texts": [], "attributes": {"test_attr": ["val1", "val2", "val3"]}}
+    mock_finder = MagicMock()
+    mock_finder.elements.return_value = ["element_1", "element_2", "element_3"]
+    interrogate = Interrogator(mock_driver, mock_finder, None, bulk_read_threshold=2)
+
+    result = interrogate.get_list_of_attributes(default_page_element, "test_attr")
+
+    assert_that(result, equal_to(["val1", "val2", "val3"]), "Unexpected list of attributes returned")
+    mock_driver.execute_script.assert_called_once_with(READ_ELEMENTS_SCRIPT, ["element_1", "element_2", "element_3"],
+                                                       ["test_attr"], False)
+
+
 def test_get_text():
     mock_element = MagicMock()
     mock_element.text = "text_content"
@@ -650,6 +701,82 @@ def test_get_list_of_texts():
     assert_that(len(result), equal_to(3), "Unexpected number of Strings in list")
 
 
+def test_get_list_of_texts_above_bulk_read_threshold():
+    mock_driver = MagicMock()
+    mock_driver.execute_script.return_value = {"texts": ["text_1", "text_2", "text_3"], "attributes": {}}
+    mock_finder = MagicMock()
+    mock_finder.elements.return_value = ["element_1", "element_2", "element_3"]
+    interrogate = Interrogator(mock_driver, mock_finder, None, bulk_read_threshold=2, bulk_read_texts=True)
+
+    result = interrogate.get_list_of_texts(default_page_element)
+
+    assert_that(result, equal_to(["text_1", "text_2", "text_3"]), "Unexpected list returned")
+    mock_driver.execute_script.assert_called_once_with(READ_ELEMENTS_SCRIPT, ["element_1", "element_2", "element_3"],
+                                                       [], True)
+
+
+def test_get_list_of_texts_matches_element_text_by_default():
+    texts = ["Price:\u00a0£5", "  Line one\nLine two", "Tab\tseparated", "Non-breaking\u00a0\u00a0spaces"]
+    mock_elements = [MagicMock(text=text) for text in texts * 5]
+    mock_driver = MagicMock()
+    # innerText differs from WebElement.text in its whitespace
+    mock_driver.execute_script.return_value = {"texts": [" ".join(text.split()) for text in texts * 5],
+                                               "attributes": {}}
+    mock_finder = MagicMock()
+    mock_finder.elements.return_value = mock_elements
+    interrogate = Interrogator(mock_driver, mock_finder, None)
+
+    result = interrogate.get_list_of_texts(default_page_element)
+
+    assert_that(result, equal_to([element.text for element in mock_elements]),
+                "The texts should be the same as WebElement.text")
+    mock_driver.execute_script.assert_not_called()
+
+
+def test_get_list_of_texts_bulk_read_disabled():
+    mock_element = MagicMock()
+    mock_element.text = "element_text"
+    mock_driver = MagicMock()
+    mock_finder = MagicMock()
+    mock_finder.elements.return_value = [mock_element] * 20
+    interrogate = Interrogator(mock_driver, mock_finder, None, bulk_read_threshold=None)
+
+    result = interrogate.get_list_of_texts(default_page_element)
+
+    assert_that(result, equal_to(["element_text"] * 20), "Unexpected list returned")
+    mock_driver.execute_script.assert_not_called()
+
+
+def test_get_texts_and_attributes():
+    mock_driver = MagicMock()
+    mock_driver.execute_script.return_value = {"texts": ["text_1", "text_2"],
+                                               "attributes": {"href": ["url_1", "url_2"], "class": ["a", "b"]}}
+    mock_finder = MagicMock()
+    mock_finder.elements.return_value = ["element_1", "element_2"]
+    interrogate = Interrogator(mock_driver, mock_finder, None)
+
+    texts, attributes = interrogate.get_texts_and_attributes(default_page_element, ("href", "class"))
+
+    assert_that(texts, equal_to(["text_1", "text_2"]), "Unexpected list of texts returned")
+    assert_that(attributes, equal_to({"href": ["url_1", "url_2"], "class": ["a", "b"]}),
+                "Unexpected attributes returned")
+    mock_driver.execute_script.assert_called_once_with(READ_ELEMENTS_SCRIPT, ["element_1", "element_2"],
+                                                       ["href", "class"], True)
+
+
+def test_get_texts_and_attributes_no_element_found():
+    mock_driver = MagicMock()
+    mock_finder = MagicMock()
+    mock_finder.elements.return_value = []
+    interrogate = Interrogator(mock_driver, mock_finder, None)
+
+    texts, attributes = interrogate.get_texts_and_attributes(default_page_element, ["href"])
+
+    assert_that(texts, equal_to([]), "No texts should have been returned")
+    assert_that(attributes, equal_to({"href": []}), "No attribute values should have been returned")
+    mock_driver.execute_script.assert_not_called()
+
+
 def test_get_list_of_texts_single_element():
     mock_element_1 = MagicMock()
     mock_element_1.text = "element_text_1"
@@ -842,3 +969,14 @@ def test_get_all_cookies():
 
     driver.get_cookies.assert_called_once()
     assert_that(cookies, equal_to("test_cookie"), "Cookies not returned correctly")
+
+
+@mock.patch("uitestcore.interrogator.PageSnapshot")
+def test_take_snapshot(mock_page_snapshot):
+    mock_logger = MagicMock(name="logger")
+    interrogate = Interrogator("driver", MagicMock(), 10, mock_logger)
+
+    result = interrogate.take_snapshot([default_page_element])
+
+    mock_page_snapshot.assert_called_once_with("driver", [default_page_element], mock_logger)
+    assert_that(result, equal_to(mock_page_snapshot.return_value), "The snapshot should be returned")
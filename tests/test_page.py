@@ -0,0 +1,18 @@
+from unittest.mock import MagicMock
+from hamcrest import assert_that, equal_to
+from uitestcore.page import BasePage
+from uitestcore.utilities.polling_strategy import FixedPolling, LearnedPolling
+
+
+def test_base_page_shares_polling_strategy():
+    polling = LearnedPolling()
+
+    page = BasePage(MagicMock(name="driver"), polling=polling, event_driven=True)
+    other_page = BasePage(MagicMock(name="driver"), polling=polling)
+
+    assert_that(page.wait.polling is polling and other_page.wait.polling is polling, equal_to(True),
+                "The polling strategy should be shared by the pages")
+    assert_that(page.wait.event_driven, equal_to(True), "The Waiter should wait in the browser")
+    assert_that(other_page.wait.event_driven, equal_to(False), "The Waiter should not wait in the browser by default")
+    assert_that(isinstance(BasePage(MagicMock(name="driver")).wait.polling, FixedPolling), equal_to(True),
+                "Fixed polling should be used by default")
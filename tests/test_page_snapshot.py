@@ -0,0 +1,206 @@
+from unittest.mock import MagicMock
+import pytest
+from hamcrest import assert_that, equal_to
+from selenium.webdriver.common.by import By
+from uitestcore.page_element import PageElement
+from uitestcore.page_snapshot import PageSnapshot
+from uitestcore.utilities.browser_scripts import CAPTURE_PAGE_SCRIPT, ELEMENT_INDEXES_SCRIPT
+
+
+def node(tag, parent, attributes=None, visible=True, text="", tail="", block=False):
+    return {"tag": tag, "parent": parent, "attributes": attributes or {}, "visible": visible, "text": text,
+            "tail": tail, "block": block}
+
+
+captured_page = {
+    "url": "https://test.com/page",
+    "cookies": "cookie-consent=true; s_getNewRepeat=1564127000350-Repeat",
+    "nodes": [
+        node("html", -1),
+        node("body", 0, {"class": "page"}),
+        node("a", 1, {"id": "home-link", "href": "https://test.com/home", "class": "link active"}, text="Home"),
+        node("div", 1, {"class": "panel hidden"}, visible=False),
+        node("table", 1, {"id": "results"}),
+        node("tr", 4),
+        node("tr", 4),
+        node("ul", 1, {"class": "items"}),
+        node("li", 7, {"class": "item"}, text="First item"),
+        node("li", 7, {"class": "item selected", "aria-hidden": "true"}, text="Second item"),
+        node("input", 1, {"name": "agree", "type": "checkbox", "checked": "true", "disabled": "true"})
+    ],
+    "located": [[8, 9]]
+}
+
+
+class MockDriver:
+    def __init__(self, page=None, element_indexes=None):
+        self.page = page or captured_page
+        self.element_indexes = element_indexes or []
+        self.execute_script_calls = 0
+
+    def execute_script(self, script, *args):
+        self.execute_script_calls += 1
+        self.script = script
+        self.args = args
+        return self.element_indexes if script == ELEMENT_INDEXES_SCRIPT else self.page
+
+
+css_items = PageElement(By.CSS_SELECTOR, "ul.items > li")
+home_link = PageElement(By.ID, "home-link")
+panel = PageElement(By.CLASS_NAME, "panel")
+results_table = PageElement(By.ID, "results")
+items = PageElement(By.CLASS_NAME, "item")
+items_list = PageElement(By.TAG_NAME, "ul")
+checkbox = PageElement(By.NAME, "agree")
+missing = PageElement(By.ID, "missing")
+
+
+def take_snapshot():
+    return PageSnapshot(MockDriver(), [css_items], MagicMock(name="logger"))
+
+
+def test_snapshot_captures_page_with_one_script_call():
+    driver = MockDriver()
+
+    PageSnapshot(driver, [css_items])
+
+    assert_that(driver.execute_script_calls, equal_to(1), "The page should be captured with one call")
+    assert_that(driver.script, equal_to(CAPTURE_PAGE_SCRIPT), "The capture script should have been run")
+    assert_that(driver.args, equal_to(([["css selector", "ul.items > li"]],)), "The locators should be passed")
+
+
+def test_snapshot_uses_locators_found_in_browser():
+    snapshot = take_snapshot()
+
+    assert_that(snapshot.get_list_of_texts(css_items), equal_to(["First item", "Second item"]))
+
+
+def test_snapshot_finds_simple_locators_locally():
+    snapshot = take_snapshot()
+
+    assert_that(snapshot.get_number_of_elements(home_link), equal_to(1))
+    assert_that(snapshot.get_number_of_elements(items), equal_to(2))
+    assert_that(snapshot.get_number_of_elements(PageElement(By.TAG_NAME, "TR")), equal_to(2))
+    assert_that(snapshot.get_number_of_elements(PageElement(By.LINK_TEXT, "Home")), equal_to(1))
+    assert_that(snapshot.get_number_of_elements(PageElement(By.PARTIAL_LINK_TEXT, "Hom")), equal_to(1))
+    assert_that(snapshot.get_number_of_elements(checkbox), equal_to(1))
+
+
+def test_snapshot_finds_simple_xpath_locally():
+    snapshot = take_snapshot()
+
+    assert_that(snapshot.get_list_of_texts(PageElement(By.XPATH, "//ul/li[@class='item']")),
+                equal_to(["First item"]))
+
+
+def test_snapshot_finds_text_xpath_in_browser():
+    driver = MockDriver(element_indexes=[8])
+    snapshot = PageSnapshot(driver, [], MagicMock(name="logger"))
+    first_item = PageElement(By.XPATH, "//li[text()='First item']")
+
+    assert_that(snapshot.get_text(first_item), equal_to("First item"))
+    assert_that(snapshot.get_number_of_elements(first_item), equal_to(1))
+    assert_that(driver.args, equal_to(("xpath", "//li[text()='First item']")), "The XPath should be found in the browser")
+    assert_that(driver.execute_script_calls, equal_to(2), "The XPath should only be found in the browser once")
+
+
+def test_snapshot_finds_xpath_which_cannot_be_answered_locally_in_browser():
+    for xpath in ["//a[.='Home']", "//button[contains(@class, 'save')]", "//a[@href='/home']", "//input[@required]",
+                  "(//li)[1]", "//li/following-sibling::li", "li"]:
+        driver = MockDriver()
+        snapshot = PageSnapshot(driver, [], MagicMock(name="logger"))
+
+        snapshot.get_number_of_elements(PageElement(By.XPATH, xpath))
+
+        assert_that(driver.script, equal_to(ELEMENT_INDEXES_SCRIPT), f"{xpath} should be found in the browser")
+
+
+def test_snapshot_raises_error_for_unsupported_locator():
+    snapshot = take_snapshot()
+
+    with pytest.raises(ValueError):
+        snapshot.get_text(PageElement(By.CSS_SELECTOR, "li"))
+
+
+def test_snapshot_text_is_put_together_as_rendered():
+    page = dict(captured_page, nodes=[
+        node("html", -1, block=True),
+        node("body", 0, block=True, text=" "),
+        node("div", 1, {"id": "card"}, block=True, text=" Hello ", tail=" "),
+        node("b", 2, text="big", tail=" world "),
+        node("span", 2, {"class": "hidden"}, visible=False, tail="! "),
+        node("p", 2, block=True, text="Second line"),
+        node("br", 5, tail="Third line", block=True),
+        node("a", 1, {"id": "link"}, text="Link\u00a0text")
+    ], located=[])
+    snapshot = PageSnapshot(MockDriver(page), [], MagicMock(name="logger"))
+
+    assert_that(snapshot.get_text(PageElement(By.ID, "card")), equal_to("Hello big world !\nSecond line\nThird line"))
+    assert_that(snapshot.get_text(PageElement(By.CLASS_NAME, "hidden")), equal_to(""))
+    assert_that(snapshot.get_text(PageElement(By.TAG_NAME, "html")),
+                equal_to("Hello big world !\nSecond line\nThird line\nLink text"))
+
+
+def test_snapshot_visibility():
+    snapshot = take_snapshot()
+
+    assert_that(snapshot.is_element_visible(home_link), equal_to(True))
+    assert_that(snapshot.is_element_visible(panel), equal_to(False))
+    assert_that(snapshot.is_element_visible(missing), equal_to(False))
+    assert_that(snapshot.are_elements_visible(items), equal_to(False), "One item is aria hidden")
+    assert_that(snapshot.are_elements_visible(missing), equal_to(False))
+    assert_that(snapshot.is_element_visible_and_contains_text(items, "First"), equal_to(True))
+    assert_that(snapshot.is_element_visible_and_contains_text(items, "Second"), equal_to(False))
+
+
+def test_snapshot_text_and_attributes():
+    snapshot = take_snapshot()
+
+    assert_that(snapshot.get_text(home_link), equal_to("Home"))
+    assert_that(snapshot.get_text(missing), equal_to(None))
+    assert_that(snapshot.get_attribute(home_link, "href"), equal_to("https://test.com/home"))
+    assert_that(snapshot.get_attribute(home_link, "title"), equal_to(None))
+    assert_that(snapshot.get_attribute(missing, "href"), equal_to(""))
+    assert_that(snapshot.get_list_of_attributes(items, "class"), equal_to(["item", "item selected"]))
+
+
+def test_snapshot_classes_and_links():
+    snapshot = take_snapshot()
+
+    assert_that(snapshot.element_has_class(home_link, "active"), equal_to(True))
+    assert_that(snapshot.element_has_class(panel, "panel"), equal_to(False), "Hidden elements should not match")
+    assert_that(snapshot.element_parent_has_class(home_link, "page"), equal_to(True))
+    assert_that(snapshot.element_parent_has_class(missing, "page"), equal_to(False))
+    assert_that(snapshot.element_sibling_has_class(items, "selected"), equal_to(True))
+    assert_that(snapshot.element_sibling_has_class(items, "other"), equal_to(False))
+    assert_that(snapshot.element_contains_link(home_link, "/home"), equal_to(True))
+    assert_that(snapshot.element_contains_link(missing, "/home"), equal_to(False))
+
+
+def test_snapshot_tables_and_lists():
+    snapshot = take_snapshot()
+
+    assert_that(snapshot.get_table_row_count(results_table), equal_to(2))
+    assert_that(snapshot.table_is_not_empty(results_table, 2), equal_to(True))
+    assert_that(snapshot.table_is_not_empty(results_table), equal_to(False))
+    assert_that(snapshot.table_is_not_empty(missing), equal_to(False))
+    assert_that(snapshot.list_is_not_empty(items_list), equal_to(True))
+    assert_that(snapshot.list_is_not_empty(items_list, 2), equal_to(False))
+
+
+def test_snapshot_form_state():
+    snapshot = take_snapshot()
+
+    assert_that(snapshot.is_element_selected(checkbox), equal_to(True))
+    assert_that(snapshot.is_element_enabled(checkbox), equal_to(False))
+    assert_that(snapshot.is_element_enabled(home_link), equal_to(True))
+
+
+def test_snapshot_url_and_cookies():
+    snapshot = take_snapshot()
+
+    assert_that(snapshot.get_current_url(), equal_to("https://test.com/page"))
+    assert_that(snapshot.get_all_cookies(), equal_to([{"name": "cookie-consent", "value": "true"},
+                                                      {"name": "s_getNewRepeat", "value": "1564127000350-Repeat"}]))
+    assert_that(snapshot.get_value_from_cookie("cookie-consent"), equal_to("true"))
+    assert_that(snapshot.get_value_from_cookie("missing"), equal_to(""))
@@ -1,10 +1,12 @@
 from unittest import mock
 from unittest.mock import MagicMock
-from hamcrest import calling, raises, is_not
-from selenium.common.exceptions import TimeoutException
+from hamcrest import calling, raises, is_not, equal_to
+from selenium.common.exceptions import JavascriptException, TimeoutException
 from selenium.webdriver.common.by import By
 from tests.unit_test_utils import *
+from uitestcore.custom_expected_conditions import ElementCondition
 from uitestcore.page_element import PageElement
+from uitestcore.utilities.polling_strategy import ExponentialBackoffPolling, FixedPolling
 from uitestcore.waiter import Waiter
 
 
@@ -83,6 +85,70 @@ def test_for_page_to_load_not_ready(mock_browser_is_ready, mock_sleep):
     check_mocked_functions_called(mock_sleep, mock_browser_is_ready)
 
 
+@mock.patch("time.sleep")
+@mock.patch("uitestcore.custom_expected_conditions.NewPageIsReady", side_effect=lambda *args: MockBrowserIsReady())
+def test_for_page_to_load_with_previous_document_does_not_sleep(mock_new_page_is_ready, mock_sleep):
+    wait = Waiter("driver", "finder", 0, MagicMock(name="logger"))
+
+    assert_that(calling(wait.for_page_to_load).with_args(("1000.5", "test/url")), is_not(raises(TimeoutException)),
+                "Waiting for a new page to load when it is ready should not raise an exception")
+
+    mock_new_page_is_ready.assert_called_once_with(("1000.5", "test/url"))
+    check_mocked_functions_not_called(mock_sleep)
+
+
+@mock.patch("time.sleep")
+@mock.patch("uitestcore.custom_expected_conditions.NewPageIsReady", side_effect=lambda *args: MockBrowserIsNotReady())
+def test_for_page_to_load_with_previous_document_not_ready(mock_new_page_is_ready, mock_sleep):
+    wait = Waiter("driver", "finder", 0, MagicMock(name="logger"))
+
+    assert_that(calling(wait.for_page_to_load).with_args(("1000.5", "test/url")), raises(TimeoutException),
+                "Waiting for a new page to load when it is not ready should raise an exception")
+
+    check_mocked_functions_called(mock_new_page_is_ready)
+
+
+def test_get_document_identity():
+    mock_driver = MagicMock(name="driver")
+    mock_driver.execute_script.return_value = ["1000.5", "complete", "test/url"]
+    wait = Waiter(mock_driver, "finder", 0, MagicMock(name="logger"))
+
+    result = wait.get_document_identity()
+
+    assert_that(result, equal_to(("1000.5", "test/url")), "The document identity and URL should be returned")
+
+
+def test_get_document_identity_when_it_cannot_be_read():
+    mock_driver = MagicMock(name="driver")
+    mock_driver.execute_script.side_effect = JavascriptException("javascript error: performance is not defined")
+    wait = Waiter(mock_driver, "finder", 0, MagicMock(name="logger"))
+
+    result = wait.get_document_identity()
+
+    assert_that(result, equal_to(None), "No identity should be returned when it cannot be read")
+
+
+@mock.patch("uitestcore.custom_expected_conditions.NetworkIsIdle", side_effect=lambda *args: MockBrowserIsReady())
+def test_for_network_idle(mock_network_is_idle):
+    wait = Waiter("driver", "finder", 0, MagicMock(name="logger"))
+
+    assert_that(calling(wait.for_network_idle).with_args(250), is_not(raises(TimeoutException)),
+                "Waiting for the network to be idle when it is idle should not raise an exception")
+
+    mock_network_is_idle.assert_called_once_with(250)
+
+
+@mock.patch("time.sleep")
+@mock.patch("uitestcore.custom_expected_conditions.NetworkIsIdle", side_effect=lambda *args: MockBrowserIsNotReady())
+def test_for_network_idle_not_idle(mock_network_is_idle, mock_sleep):
+    wait = Waiter("driver", "finder", 0, MagicMock(name="logger"))
+
+    assert_that(calling(wait.for_network_idle), raises(TimeoutException),
+                "Waiting for the network to be idle when it is not idle should raise an exception")
+
+    check_mocked_functions_called(mock_network_is_idle, mock_sleep)
+
+
 @mock.patch("uitestcore.waiter.visibility_of_element_located", side_effect=MockVisibilityOfElementLocated)
 def test_for_element_to_be_visible_is_visible(mock_visibility_of_element_located):
     wait = Waiter("driver", "finder", 0, MagicMock(name="logger"))
@@ -173,3 +239,192 @@ def test_for_alert_to_be_present_is_not_present(mock_alert_is_present, mock_slee
                 "Waiting for an alert to be present when the alert is not present should raise an exception")
 
     check_mocked_functions_called(mock_sleep, mock_alert_is_present)
+
+
+class MockAsyncDriver:
+    def __init__(self, condition_met, *results_before):
+        self.condition_met = condition_met
+        self.results_before = list(results_before)
+        self.script_args = None
+        self.script_calls = 0
+
+    def execute_async_script(self, _script, *args):
+        self.script_args = args
+        self.script_calls += 1
+        result = self.results_before.pop(0) if self.results_before else self.condition_met
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+def test_for_element_to_be_visible_event_driven():
+    driver = MockAsyncDriver(True)
+    wait = Waiter(driver, "finder", 5, MagicMock(name="logger"), event_driven=True)
+
+    wait.for_element_to_be_visible(PageElement(By.ID, "visible_element"))
+
+    assert_that(driver.script_args, equal_to(("visible", "id", "visible_element", [], 5000)),
+                "The visibility condition should be checked in the browser")
+
+
+def test_for_element_to_be_present_event_driven():
+    driver = MockAsyncDriver(True)
+    wait = Waiter(driver, "finder", 5, MagicMock(name="logger"), event_driven=True)
+
+    wait.for_element_to_be_present(PageElement(By.ID, "element_present"))
+
+    assert_that(driver.script_args, equal_to(("present", "id", "element_present", [], 5000)),
+                "The presence condition should be checked in the browser")
+
+
+def test_for_element_to_have_attribute_event_driven():
+    driver = MockAsyncDriver(True)
+    wait = Waiter(driver, "finder", 5, MagicMock(name="logger"), event_driven=True)
+
+    wait.for_element_to_have_attribute(PageElement(By.ID, "id_exists"), "test_attribute", "test_value")
+
+    assert_that(driver.script_args, equal_to(("attribute", "id", "id_exists", ["test_attribute", "test_value"], 5000)),
+                "The attribute condition should be checked in the browser")
+
+
+def test_for_element_to_be_visible_event_driven_timeout():
+    wait = Waiter(MockAsyncDriver(False), "finder", 0, MagicMock(name="logger"), event_driven=True)
+
+    assert_that(calling(wait.for_element_to_be_visible).with_args(PageElement(By.ID, "not_visible_element")),
+                raises(TimeoutException),
+                "Waiting for an element to be visible when the condition is not met should raise an exception")
+
+
+def test_event_driven_wait_runs_again_after_navigation():
+    driver = MockAsyncDriver(True, JavascriptException("javascript error: document unloaded while waiting for result"))
+    wait = Waiter(driver, "finder", 5, MagicMock(name="logger"), event_driven=True)
+
+    wait.for_element_to_be_visible(PageElement(By.ID, "visible_element"))
+
+    assert_that(driver.script_calls, equal_to(2), "The script should have been run again on the new page")
+    assert_that(0 < driver.script_args[4] <= 5000, equal_to(True), "The script should wait for the remaining time")
+
+
+def test_event_driven_wait_raises_script_errors():
+    driver = MockAsyncDriver(True, JavascriptException("javascript error: The string '//[' is not a valid XPath"))
+    wait = Waiter(driver, "finder", 5, MagicMock(name="logger"), event_driven=True)
+
+    assert_that(calling(wait.for_element_to_be_visible).with_args(PageElement(By.XPATH, "//[")),
+                raises(JavascriptException), "Errors other than navigation should be raised")
+
+
+def test_event_driven_wait_runs_again_after_script_timeout():
+    driver = MockAsyncDriver(True, TimeoutException("script timeout"))
+    wait = Waiter(driver, "finder", 5, MagicMock(name="logger"), event_driven=True)
+
+    wait.for_element_to_be_visible(PageElement(By.ID, "visible_element"))
+
+    assert_that(driver.script_calls, equal_to(2), "The script should have been run again for the remaining time")
+
+
+def test_event_driven_wait_script_timeout_raises_timeout_exception():
+    wait = Waiter(MockAsyncDriver(True, TimeoutException("script timeout")), "finder", 0,
+                  MagicMock(name="logger"), event_driven=True)
+
+    assert_that(calling(wait.for_element_to_be_visible).with_args(PageElement(By.ID, "not_visible_element")),
+                raises(TimeoutException, "was not visible after 0 seconds"),
+                "A script timeout at the end of the wait should be raised as the waiter's TimeoutException")
+
+
+class MockConditionMetAfterPolls:
+    def __init__(self, polls_needed):
+        self.polls_needed = polls_needed
+        self.polls = 0
+
+    def __call__(self, driver):
+        self.polls += 1
+        return self.polls >= self.polls_needed
+
+
+@mock.patch("time.sleep")
+@mock.patch("uitestcore.waiter.alert_is_present")
+def test_waits_use_polling_strategy(mock_alert_is_present, mock_sleep):
+    mock_alert_is_present.return_value = MockConditionMetAfterPolls(4)
+    polling = ExponentialBackoffPolling(floor=0.1, ceiling=0.3, factor=2)
+    wait = Waiter("driver", "finder", 10, MagicMock(name="logger"), polling=polling)
+
+    wait.for_alert_to_be_present()
+
+    sleeps = [call[0][0] for call in mock_sleep.call_args_list]
+    assert_that(sleeps, equal_to([0.1, 0.2, 0.3]), "The polling strategy intervals should have been used")
+    assert_that(polling.history["for_alert_to_be_present"][0][0], equal_to(4),
+                "The number of polls until success should have been recorded")
+    assert_that(polling.history["for_alert_to_be_present"][0][2], equal_to(True), "The wait should have succeeded")
+
+
+@mock.patch("time.sleep")
+@mock.patch("uitestcore.waiter.visibility_of_element_located", side_effect=MockVisibilityOfElementLocated)
+def test_waits_record_timeouts(mock_visibility_of_element_located, mock_sleep):
+    polling = FixedPolling()
+    wait = Waiter("driver", "finder", 0, MagicMock(name="logger"), polling=polling)
+    page_element = PageElement(By.ID, "not_visible_element")
+
+    assert_that(calling(wait.for_element_to_be_visible).with_args(page_element), raises(TimeoutException),
+                "Waiting for an element to be visible when the element is not displayed should raise an exception")
+
+    history = polling.history[f"for_element_to_be_visible {page_element}"]
+    assert_that(history[0][2], equal_to(False), "The timeout should have been recorded")
+    check_mocked_functions_called(mock_sleep, mock_visibility_of_element_located)
+
+
+class MockGroupsDriver:
+    def __init__(self, *results):
+        self.results = list(results)
+        self.script_args = []
+
+    def execute_script(self, _script, groups):
+        self.script_args.append(groups)
+        return self.results.pop(0) if len(self.results) > 1 else self.results[0]
+
+
+def test_for_all_conditions_met():
+    driver = MockGroupsDriver([True])
+    wait = Waiter(driver, "finder", 0, MagicMock(name="logger"))
+    visible = ElementCondition.visible(PageElement(By.ID, "test_id"))
+    has_attribute = ElementCondition.has_attribute(PageElement(By.NAME, "test_name"), "class", "test_value")
+
+    assert_that(calling(wait.for_all).with_args([visible, has_attribute]), is_not(raises(TimeoutException)),
+                "Waiting for all conditions when they are met should not raise an exception")
+
+    assert_that(driver.script_args, equal_to([[[["visible", By.ID, "test_id", []],
+                                                ["attribute", By.NAME, "test_name", ["class", "test_value"]]]]]),
+                "All the conditions should have been checked in one script call as one group")
+
+
+@mock.patch("time.sleep")
+def test_for_all_conditions_not_met(mock_sleep):
+    wait = Waiter(MockGroupsDriver([False]), "finder", 0, MagicMock(name="logger"))
+
+    assert_that(calling(wait.for_all).with_args([ElementCondition.present(PageElement(By.ID, "test_id"))]),
+                raises(TimeoutException), "Waiting for all conditions when they are not met should raise an exception")
+
+
+@mock.patch("time.sleep")
+def test_for_any_returns_first_met_branch(mock_sleep):
+    driver = MockGroupsDriver([False, False], [False, True])
+    wait = Waiter(driver, "finder", 10, MagicMock(name="logger"))
+    success = ElementCondition.visible(PageElement(By.ID, "success"))
+    error = ElementCondition.visible(PageElement(By.ID, "error"))
+    error_text = ElementCondition.present(PageElement(By.ID, "error_text"))
+
+    result = wait.for_any([success, [error, error_text]])
+
+    assert_that(result, equal_to(1), "The index of the branch which was met should have been returned")
+    assert_that(len(driver.script_args), equal_to(2), "There should have been one script call per poll")
+    assert_that(len(driver.script_args[0]), equal_to(2), "Each branch should have been sent as a group")
+    assert_that(len(driver.script_args[0][1]), equal_to(2), "A list branch should have been sent as one group")
+
+
+@mock.patch("time.sleep")
+def test_for_any_no_branch_met(mock_sleep):
+    wait = Waiter(MockGroupsDriver([False, False]), "finder", 0, MagicMock(name="logger"))
+    conditions = [ElementCondition.visible(PageElement(By.ID, "success")),
+                  ElementCondition.visible(PageElement(By.ID, "error"))]
+
+    assert_that(calling(wait.for_any).with_args(conditions), raises(TimeoutException),
+                "Waiting for any condition when none are met should raise an exception")
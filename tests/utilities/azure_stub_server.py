@@ -0,0 +1,145 @@
+import json
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+class AzureStubServer:
+    """
+    A local stand-in for the Azure DevOps test runs API, which lists test results, accepts and lists attachments
+    after an optional delay, and can inject faults such as throttling
+    Use as a context manager - the server runs on a background thread until the block exits
+    """
+
+    def __init__(self, delay=0, runs=None, continuation_tokens=False, faults=None):
+        """
+        :param delay: the number of seconds to wait before responding to each request, like the time taken by Azure
+        :param runs: dict mapping run IDs to their list of test results
+        :param continuation_tokens: whether to page results using continuation tokens rather than $skip
+        :param faults: list of (status code, headers) responses given instead of the normal response to the first
+            requests, one each - None gives the normal response
+        """
+        self.delay = delay
+        self.runs = runs or {}
+        self.continuation_tokens = continuation_tokens
+        self.faults = list(faults or [])
+        self.requests = []
+        self.faulted_requests = []
+        self.connections = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server.server_port}/org/project/_apis/test/runs"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self.server.shutdown()
+        self.server.server_close()
+
+    @contextmanager
+    def track_in_flight(self):
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            yield
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                with stub.lock:
+                    stub.connections += 1
+
+            def do_GET(self):
+                with stub.track_in_flight():
+                    self._get()
+
+            def do_POST(self):
+                with stub.track_in_flight():
+                    self._post()
+
+            def _get(self):
+                url = urlparse(self.path)
+                query = {name: values[0] for name, values in parse_qs(url.query).items()}
+                time.sleep(stub.delay)
+                if self._inject_fault(("GET", url.path, query)):
+                    return
+                with stub.lock:
+                    stub.requests.append(("GET", url.path, query))
+
+                if url.path.endswith("/attachments"):
+                    with stub.lock:
+                        attachments = [body for method, path, body in stub.requests
+                                       if method == "POST" and path.split("?")[0] == url.path]
+                    self._respond(200, {"count": len(attachments), "value": attachments})
+                    return
+
+                run_id = int(url.path.split("/")[-2])
+                if run_id not in stub.runs:
+                    self._respond(404, {"message": f"Run {run_id} not found"})
+                    return
+
+                results = stub.runs[run_id]
+                if "outcomes" in query:
+                    results = [result for result in results if result["outcome"] in query["outcomes"].split(",")]
+                start = int(query.get("continuationToken" if stub.continuation_tokens else "$skip", 0))
+                end = start + int(query.get("$top", len(results)))
+
+                headers = {}
+                if stub.continuation_tokens and end < len(results):
+                    headers["x-ms-continuationtoken"] = str(end)
+                self._respond(200, {"count": len(results[start:end]), "value": results[start:end]}, headers)
+
+            def _post(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                time.sleep(stub.delay)
+                if self._inject_fault(("POST", self.path, json.loads(body))):
+                    return
+                with stub.lock:
+                    stub.requests.append(("POST", self.path, json.loads(body)))
+                    response_id = len(stub.requests)
+                self._respond(200, {"id": response_id})
+
+            def _inject_fault(self, request):
+                with stub.lock:
+                    fault = stub.faults.pop(0) if stub.faults else None
+                    if fault:
+                        stub.faulted_requests.append(request)
+                if fault:
+                    status, headers = fault
+                    self._respond(status, {"message": "Injected fault"}, headers)
+                return bool(fault)
+
+            def _respond(self, status, response_json, headers=None):
+                content = json.dumps(response_json).encode("utf-8")
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
@@ -1,6 +1,10 @@
+import tracemalloc
 from unittest import mock
-from hamcrest import equal_to, starts_with, calling, is_not, raises
+from hamcrest import equal_to, starts_with, calling, is_not, raises, greater_than, less_than_or_equal_to
 from tests.unit_test_utils import *
+from tests.utilities.azure_stub_server import AzureStubServer
+from uitestcore.utilities.request_executor import RequestExecutor
+from uitestcore.utilities.upload_journal import UPLOAD_JOURNAL_FILE, UploadJournal
 from uitestcore.utilities.attachments_api import *
 
 
@@ -9,6 +13,7 @@ class MockResponse:
         self.content = content
         self.status_code = status_code
         self.mode = mode
+        self.headers = {}
 
     def json(self):
         if self.mode == "get_run_ids_from_response":
@@ -49,6 +54,10 @@ class MockBuiltIn:
         return "test data".encode()
 
 
+def mock_get_run_ids_response(*_args, **_kwargs):
+    return MockResponse("", 200, "get_run_ids_from_response")
+
+
 def mock_list_dir(file_path):
     if file_path == "test/folder":
         return ["file1.png", "file2.png", "file2.png"]
@@ -76,7 +85,7 @@ def test_print_response_info_does_not_print_when_response_has_no_title(mock_prin
 
 
 @mock.patch("builtins.print")
-@mock.patch("requests.get", side_effect=lambda *args, **kwargs: MockResponse("", 200, "get_run_ids_from_response"))
+@mock.patch("requests.Session.get", side_effect=mock_get_run_ids_response)
 def test_get_run_ids_by_release_performs_the_correct_request(mock_get, _mock_print):
     get_run_ids_by_release(100, "test-url", "test-token")
 
@@ -90,7 +99,7 @@ def test_get_run_ids_by_release_performs_the_correct_request(mock_get, _mock_pri
 
 
 @mock.patch("builtins.print")
-@mock.patch("requests.get", side_effect=lambda *args, **kwargs: MockResponse("", 200, "get_run_ids_from_response"))
+@mock.patch("requests.Session.get", side_effect=mock_get_run_ids_response)
 def test_get_run_ids_by_build_performs_the_correct_request(mock_get, _mock_print):
     get_run_ids_by_build(100, "test-url", "test-token")
 
@@ -104,7 +113,7 @@ def test_get_run_ids_by_build_performs_the_correct_request(mock_get, _mock_print
 
 
 @mock.patch("builtins.print")
-@mock.patch("requests.get", side_effect=lambda *args, **kwargs: MockResponse("", 200, "get_run_ids_from_response"))
+@mock.patch("requests.Session.get", side_effect=mock_get_run_ids_response)
 def test_get_run_ids_by_release_returns_ids_when_request_succeeds(mock_get, _mock_print):
     run_ids = get_run_ids_by_release(100, "test-url", "test-token")
 
@@ -112,7 +121,8 @@ def test_get_run_ids_by_release_returns_ids_when_request_succeeds(mock_get, _moc
     assert_that(run_ids, equal_to([1, 2, 3]), "Incorrect run IDs returned")
 
 
-@mock.patch("requests.get", side_effect=lambda *args, **kwargs: MockResponse("", 400, "get_run_ids_from_response"))
+@mock.patch("requests.Session.get",
+            side_effect=lambda *args, **kwargs: MockResponse("", 400, "get_run_ids_from_response"))
 @mock.patch("builtins.print")
 def test_get_run_ids_by_release_returns_no_ids_when_request_fails(mock_print, mock_get):
     run_ids = get_run_ids_by_release(100, "test-url", "test-token")
@@ -122,7 +132,7 @@ def test_get_run_ids_by_release_returns_no_ids_when_request_fails(mock_print, mo
     mock_print.assert_called_with("##vso[task.logissue type=error]Could not get run IDs for release/build 100")
 
 
-@mock.patch("requests.get", side_effect=lambda *args, **kwargs: MockResponse("", 400, "get_failed_tests"))
+@mock.patch("requests.Session.get", side_effect=lambda *args, **kwargs: MockResponse("", 400, "get_failed_tests"))
 @mock.patch("builtins.print")
 def test_get_failed_tests_returns_no_failed_tests_when_request_fails(mock_print, mock_get):
     failed_tests = get_failed_tests([100, 101, 102], "test-url", "test-token")
@@ -134,7 +144,7 @@ def test_get_failed_tests_returns_no_failed_tests_when_request_fails(mock_print,
 
 
 @mock.patch("builtins.print")
-@mock.patch("requests.get", side_effect=lambda *args, **kwargs: MockResponse("", 200, "get_failed_tests"))
+@mock.patch("requests.Session.get", side_effect=lambda *args, **kwargs: MockResponse("", 200, "get_failed_tests"))
 def test_get_failed_tests_returns_failed_tests_when_request_succeeds(mock_get, _mock_print):
     failed_tests = get_failed_tests([100], "test-url", "test-token")
 
@@ -144,7 +154,7 @@ def test_get_failed_tests_returns_failed_tests_when_request_succeeds(mock_get, _
 
 
 @mock.patch("builtins.print")
-@mock.patch("requests.get", side_effect=lambda *args, **kwargs: MockResponse("", 200, "get_failed_tests"))
+@mock.patch("requests.Session.get", side_effect=lambda *args, **kwargs: MockResponse("", 200, "get_failed_tests"))
 def test_get_failed_tests_performs_the_correct_request(mock_get, _mock_print):
     get_failed_tests([100], "test-url", "test-token")
 
@@ -154,6 +164,66 @@ def test_get_failed_tests_performs_the_correct_request(mock_get, _mock_print):
     assert_that(request_args[0][0], equal_to("test-url/100/results"), "request_url incorrect")
     assert_that(request_args[1]["params"]["api-version"], equal_to("6.0"), "api-version for GET incorrect")
     assert_that(request_args[1]["auth"][1], equal_to("test-token"), "Auth token incorrect")
+    assert_that(request_args[1]["params"]["outcomes"], equal_to("Failed"), "Only failed results should be requested")
+    assert_that(request_args[1]["params"]["$top"], equal_to(1000), "The page size should be set")
+
+
+def make_test_results(run_id, count):
+    return [{"id": result_id, "outcome": "Failed" if result_id % 2 else "Passed",
+             "testCase": {"name": f"run{run_id} test{result_id}"}} for result_id in range(count)]
+
+
+@mock.patch("builtins.print")
+@mock.patch("uitestcore.utilities.attachments_api.RESULTS_PAGE_SIZE", 100)
+def test_get_failed_tests_pages_with_skip(_mock_print):
+    with AzureStubServer(runs={1: make_test_results(1, 450)}) as server:
+        failed_tests = get_failed_tests([1], server.url, "test-token")
+
+    assert_that(failed_tests, equal_to([(1, result_id, f"run1 test{result_id}") for result_id in range(1, 450, 2)]),
+                "Every failed test should be returned")
+    assert_that([query.get("$skip") for _method, _path, query in server.requests], equal_to([None, "100", "200"]),
+                "The failed results should have been read a page at a time")
+
+
+@mock.patch("builtins.print")
+@mock.patch("uitestcore.utilities.attachments_api.RESULTS_PAGE_SIZE", 100)
+def test_get_failed_tests_follows_continuation_tokens(_mock_print):
+    with AzureStubServer(runs={1: make_test_results(1, 450)}, continuation_tokens=True) as server:
+        failed_tests = get_failed_tests([1], server.url, "test-token")
+
+    assert_that(len(failed_tests), equal_to(225), "Every failed test should be returned")
+    assert_that([query.get("continuationToken") for _method, _path, query in server.requests],
+                equal_to([None, "100", "200"]), "The continuation tokens should have been followed")
+
+
+@mock.patch("builtins.print")
+def test_get_failed_tests_queries_runs_concurrently(_mock_print):
+    runs = {run_id: make_test_results(run_id, 4) for run_id in range(1, 9)}
+
+    with AzureStubServer(delay=0.05, runs=runs) as server:
+        failed_tests = get_failed_tests([*runs, 99], server.url, "test-token", max_workers=9)
+
+    assert_that(failed_tests, equal_to([(run_id, result_id, f"run{run_id} test{result_id}")
+                                        for run_id in runs for result_id in (1, 3)]),
+                "The failed tests should be returned in the order of the runs, skipping the missing run")
+    assert_that(server.max_in_flight, greater_than(1), "The runs should have been queried at the same time")
+
+
+@mock.patch("builtins.print")
+def test_get_failed_tests_continues_when_a_run_cannot_be_reached(mock_print):
+    def mock_get(url, **_kwargs):
+        if url.startswith("test-url/100/"):
+            raise requests.ConnectionError("connection reset")
+        return MockResponse("", 200, "get_failed_tests")
+
+    with mock.patch("requests.Session.get", side_effect=mock_get), mock.patch("time.sleep") as mock_sleep:
+        failed_tests = get_failed_tests([100, 101], "test-url", "test-token")
+
+    assert_that(failed_tests, equal_to([(101, 1, "test1"), (101, 3, "test3")]),
+                "The failed tests from the other runs should be returned")
+    assert_that(mock_sleep.call_count, equal_to(5), "The request should have been retried before giving up")
+    mock_print.assert_any_call("##vso[task.logissue type=error]Could not get failed test IDs for run 100 - "
+                               "connection reset")
 
 
 @mock.patch("builtins.open", side_effect=MockBuiltIn)
@@ -171,134 +241,178 @@ def test_attach_files_fails_when_passed_no_parameters(_mock_print):
     assert_that(result, equal_to(1), "Result should be a failure when no parameters passed")
 
 
+@mock.patch("requests.Session.get", side_effect=mock_get_run_ids_response)
 @mock.patch("builtins.print")
 @mock.patch("uitestcore.utilities.attachments_api.get_run_ids_from_response", side_effect=lambda *args: None)
-def test_attach_files_release_fails_when_there_are_no_run_ids(mock_get_run_ids_from_response, _mock_print):
+def test_attach_files_release_fails_when_there_are_no_run_ids(mock_get_run_ids_from_response, _mock_print, _mock_get):
     result = attach_files_release("test-org", "test-project", "screenshots", "100", "test-token")
 
     check_mocked_functions_called(mock_get_run_ids_from_response)
     assert_that(result, equal_to(1), "Result should be a failure when there are no run IDs")
 
 
+@mock.patch("requests.Session.get", side_effect=mock_get_run_ids_response)
 @mock.patch("builtins.print")
 @mock.patch("uitestcore.utilities.attachments_api.get_run_ids_from_response", side_effect=lambda *args: None)
-def test_attach_files_build_fails_when_there_are_no_run_ids(mock_get_run_ids_from_response, _mock_print):
+def test_attach_files_build_fails_when_there_are_no_run_ids(mock_get_run_ids_from_response, _mock_print, _mock_get):
     result = attach_files_build("test-org", "test-project", "screenshots", "100", "test-token")
 
     check_mocked_functions_called(mock_get_run_ids_from_response)
     assert_that(result, equal_to(1), "Result should be a failure when there are no run IDs")
 
 
+@mock.patch("requests.Session.get", side_effect=mock_get_run_ids_response)
 @mock.patch("builtins.print")
 @mock.patch("uitestcore.utilities.attachments_api.get_run_ids_from_response", side_effect=lambda *args: [10, 11])
 @mock.patch("uitestcore.utilities.attachments_api.get_failed_tests", side_effect=lambda *args: None)
-def test_attach_files_fails_when_there_are_no_failed_tests(mock_get_failed_tests, mock_get_run_ids_from_response, _mock_print):
+def test_attach_files_fails_when_there_are_no_failed_tests(mock_get_failed_tests, mock_get_run_ids_from_response,
+                                                           _mock_print, _mock_get):
     result = attach_files_release("test-org", "test-project", "screenshots", "100", "test-token")
 
     check_mocked_functions_called(mock_get_failed_tests, mock_get_run_ids_from_response)
     assert_that(result, equal_to(1), "Result should be a failure when there are no failed tests")
 
 
+@mock.patch("requests.Session.get", side_effect=mock_get_run_ids_response)
 @mock.patch("builtins.print")
 @mock.patch("uitestcore.utilities.attachments_api.get_run_ids_from_response", side_effect=lambda *args: [10, 11])
 @mock.patch("uitestcore.utilities.attachments_api.listdir", side_effect=lambda *args: None)
 @mock.patch("uitestcore.utilities.attachments_api.get_failed_tests", side_effect=lambda *args: [[10, 100, "test1"],
                                                                                                 [11, 101, "test2"]])
-def test_attach_files_fails_when_there_are_no_files(mock_get_failed_tests, mock_listdir, mock_get_run_ids_from_response, _mock_print):
+def test_attach_files_fails_when_there_are_no_files(mock_get_failed_tests, mock_listdir, mock_get_run_ids_from_response,
+                                                    _mock_print, _mock_get):
     result = attach_files_release("test-org", "test-project", "screenshots", "100", "test-token")
 
     check_mocked_functions_called(mock_listdir, mock_get_failed_tests, mock_get_run_ids_from_response)
     assert_that(result, equal_to(1), "Result should be a failure when there are no files")
 
 
+def write_attachments(folder, tests, files_per_test):
+    for test in range(tests):
+        test_folder = folder / f"test{test}"
+        test_folder.mkdir()
+        for file in range(files_per_test):
+            (test_folder / f"screenshot{file}.png").write_bytes(f"test{test} screenshot{file}".encode())
+    return [(10, test, f"test{test}") for test in range(tests)]
+
+
+def make_failed_test_runs(tests):
+    return {10: [{"id": test, "outcome": "Failed", "testCase": {"name": f"test{test}"}} for test in range(tests)]}
+
+
+def mock_post_reading_body(bodies, status_code=200):
+    def mock_post(*_args, **kwargs):
+        bodies.append(kwargs["data"].read())
+        return MockResponse("", status_code)
+    return mock_post
+
+
+@mock.patch("requests.Session.get", side_effect=mock_get_run_ids_response)
 @mock.patch("builtins.print")
 @mock.patch("uitestcore.utilities.attachments_api.get_run_ids_from_response", side_effect=lambda *args: [10, 11])
 @mock.patch("uitestcore.utilities.attachments_api.listdir", side_effect=lambda *args: ["test1", "test2"])
-@mock.patch("uitestcore.utilities.attachments_api.get_file_base64", side_effect=lambda *args: None)
 @mock.patch("uitestcore.utilities.attachments_api.get_failed_tests", side_effect=lambda *args: [[10, 100, "test1"],
                                                                                                 [11, 101, "test2"]])
-def test_attach_files_fails_when_there_base64_conversion_fails(mock_get_failed_tests, mock_get_file_base64,
-                                                               mock_listdir, mock_get_run_ids_from_response, _mock_print):
+def test_attach_files_fails_when_a_file_cannot_be_read(mock_get_failed_tests, mock_listdir,
+                                                       mock_get_run_ids_from_response, mock_print, _mock_get):
     result = attach_files_release("test-org", "test-project", "screenshots", "100", "test-token")
 
-    check_mocked_functions_called(mock_get_failed_tests, mock_get_file_base64, mock_listdir, mock_get_run_ids_from_response)
-    assert_that(result, equal_to(1), "Result should be a failure when base64 conversion fails")
+    check_mocked_functions_called(mock_get_failed_tests, mock_listdir, mock_get_run_ids_from_response)
+    assert_that(result, equal_to(1), "Result should be a failure when a file cannot be read")
+    read_error = "##vso[task.logissue type=error]Could not read file screenshots/test1/test2 - "
+    assert_that(any(call[0][0].startswith(read_error) for call in mock_print.call_args_list), equal_to(True),
+                "The read error should be printed")
+
+
+@mock.patch("builtins.print")
+def test_upload_file_rejects_empty_file(mock_print, tmp_path):
+    (tmp_path / "empty.png").write_bytes(b"")
+    executor = mock.MagicMock(name="executor")
+
+    result = upload_file(executor, "https://dev.azure.com/org/project/_apis/test/runs", "test-token",
+                         [10, 100, "test1"], str(tmp_path), "empty.png", AttachedDigests())
 
+    assert_that(result, equal_to(False), "An empty file should not be attached")
+    executor.post.assert_not_called()
+    mock_print.assert_any_call(f"##vso[task.logissue type=error]Could not convert file to Base64: {tmp_path}/empty.png")
 
+
+@mock.patch("requests.Session.get", side_effect=mock_get_run_ids_response)
 @mock.patch("builtins.print")
 @mock.patch("uitestcore.utilities.attachments_api.get_run_ids_from_response", side_effect=lambda *args: [10, 11])
 @mock.patch("uitestcore.utilities.attachments_api.listdir", side_effect=lambda *args: ["file1"])
-@mock.patch("uitestcore.utilities.attachments_api.get_file_base64", side_effect=lambda *args: None)
+@mock.patch("uitestcore.utilities.attachments_api.file_digest", side_effect=FileNotFoundError)
 @mock.patch("uitestcore.utilities.attachments_api.get_failed_tests", side_effect=lambda *args: [[10, 100, "test1"]])
-def test_attach_files_gets_the_base64_of_the_correct_file(mock_get_failed_tests, mock_get_file_base64,
-                                                          mock_listdir, mock_get_run_ids_from_response, _mock_print):
+def test_attach_files_reads_the_correct_file(mock_get_failed_tests, mock_file_digest, mock_listdir,
+                                             mock_get_run_ids_from_response, _mock_print, _mock_get):
     attach_files_release("test-org", "test-project", "screenshots", "100", "test-token")
 
     check_mocked_functions_called(mock_get_failed_tests, mock_listdir, mock_get_run_ids_from_response)
-    mock_get_file_base64.assert_called_with("screenshots/test1/file1")
+    mock_file_digest.assert_called_with("screenshots/test1/file1")
 
 
+@mock.patch("requests.Session.get", side_effect=mock_get_run_ids_response)
 @mock.patch("builtins.print")
 @mock.patch("uitestcore.utilities.attachments_api.get_run_ids_from_response", side_effect=lambda *args: [10, 11])
-@mock.patch("uitestcore.utilities.attachments_api.listdir", side_effect=lambda *args: ["test1", "test2"])
-@mock.patch("uitestcore.utilities.attachments_api.get_file_base64", side_effect=lambda *args: b"test-base64-string")
-@mock.patch("requests.post", side_effect=lambda *args, **kwargs: MockResponse("", 400))
+@mock.patch("requests.Session.post", side_effect=lambda *args, **kwargs: MockResponse("", 400))
 @mock.patch("uitestcore.utilities.attachments_api.get_failed_tests", side_effect=lambda *args: [[10, 100, "test1"],
                                                                                                 [11, 101, "test2"]])
-def test_attach_files_fails_when_the_request_fails(mock_get_failed_tests, mock_post, mock_get_file_base64,
-                                                   mock_listdir, mock_get_run_ids_from_response, _mock_print):
-    result = attach_files_release("test-org", "test-project", "screenshots", "100", "test-token")
+def test_attach_files_fails_when_the_request_fails(mock_get_failed_tests, mock_post, mock_get_run_ids_from_response,
+                                                   _mock_print, _mock_get, tmp_path):
+    write_attachments(tmp_path, tests=3, files_per_test=2)
 
-    check_mocked_functions_called(mock_get_failed_tests, mock_post, mock_get_file_base64,
-                                  mock_listdir, mock_get_run_ids_from_response)
+    result = attach_files_release("test-org", "test-project", str(tmp_path), "100", "test-token")
+
+    check_mocked_functions_called(mock_get_failed_tests, mock_post, mock_get_run_ids_from_response)
     assert_that(result, equal_to(1), "Result should be a failure when the request fails")
 
 
+@mock.patch("requests.Session.get", side_effect=mock_get_run_ids_response)
 @mock.patch("builtins.print")
 @mock.patch("uitestcore.utilities.attachments_api.get_run_ids_from_response", side_effect=lambda *args: [10, 11])
-@mock.patch("uitestcore.utilities.attachments_api.listdir", side_effect=lambda *args: ["test1", "test2"])
-@mock.patch("uitestcore.utilities.attachments_api.get_file_base64", side_effect=lambda *args: b"test-base64-string")
-@mock.patch("requests.post", side_effect=lambda *args, **kwargs: MockResponse("", 200))
+@mock.patch("requests.Session.post", side_effect=lambda *args, **kwargs: MockResponse("", 200))
 @mock.patch("uitestcore.utilities.attachments_api.get_failed_tests", side_effect=lambda *args: [[10, 100, "test1"],
                                                                                                 [11, 101, "test2"]])
-def test_attach_files_release_succeeds(mock_get_failed_tests, mock_post, mock_get_file_base64,
-                               mock_listdir, mock_get_run_ids_from_response, _mock_print):
-    result = attach_files_release("test-org", "test-project", "screenshots", "100", "test-token")
+def test_attach_files_release_succeeds(mock_get_failed_tests, mock_post, mock_get_run_ids_from_response, _mock_print,
+                                       _mock_get, tmp_path):
+    write_attachments(tmp_path, tests=3, files_per_test=2)
 
-    check_mocked_functions_called(mock_get_failed_tests, mock_post, mock_get_file_base64,
-                                  mock_listdir, mock_get_run_ids_from_response)
+    result = attach_files_release("test-org", "test-project", str(tmp_path), "100", "test-token")
+
+    check_mocked_functions_called(mock_get_failed_tests, mock_post, mock_get_run_ids_from_response)
     assert_that(result, equal_to(0), "Result should be a success when everything works")
 
 
+@mock.patch("requests.Session.get", side_effect=mock_get_run_ids_response)
 @mock.patch("builtins.print")
 @mock.patch("uitestcore.utilities.attachments_api.get_run_ids_from_response", side_effect=lambda *args: [10, 11])
-@mock.patch("uitestcore.utilities.attachments_api.listdir", side_effect=lambda *args: ["test1", "test2"])
-@mock.patch("uitestcore.utilities.attachments_api.get_file_base64", side_effect=lambda *args: b"test-base64-string")
-@mock.patch("requests.post", side_effect=lambda *args, **kwargs: MockResponse("", 200))
+@mock.patch("requests.Session.post", side_effect=lambda *args, **kwargs: MockResponse("", 200))
 @mock.patch("uitestcore.utilities.attachments_api.get_failed_tests", side_effect=lambda *args: [[10, 100, "test1"],
                                                                                                 [11, 101, "test2"]])
-def test_attach_files_build_succeeds(mock_get_failed_tests, mock_post, mock_get_file_base64,
-                               mock_listdir, mock_get_run_ids_from_response, _mock_print):
-    result = attach_files_build("test-org", "test-project", "screenshots", "100", "test-token")
+def test_attach_files_build_succeeds(mock_get_failed_tests, mock_post, mock_get_run_ids_from_response, _mock_print,
+                                     _mock_get, tmp_path):
+    write_attachments(tmp_path, tests=3, files_per_test=2)
 
-    check_mocked_functions_called(mock_get_failed_tests, mock_post, mock_get_file_base64,
-                                  mock_listdir, mock_get_run_ids_from_response)
+    result = attach_files_build("test-org", "test-project", str(tmp_path), "100", "test-token")
+
+    check_mocked_functions_called(mock_get_failed_tests, mock_post, mock_get_run_ids_from_response)
     assert_that(result, equal_to(0), "Result should be a success when everything works")
 
 
+@mock.patch("requests.Session.get", side_effect=mock_get_run_ids_response)
 @mock.patch("builtins.print")
 @mock.patch("uitestcore.utilities.attachments_api.get_run_ids_from_response", side_effect=lambda *args: [10, 11])
-@mock.patch("uitestcore.utilities.attachments_api.listdir", side_effect=lambda *args: ["test1", "test2"])
-@mock.patch("uitestcore.utilities.attachments_api.get_file_base64", side_effect=lambda *args: b"test-base64-string")
-@mock.patch("requests.post", side_effect=lambda *args, **kwargs: MockResponse("", 200))
-@mock.patch("uitestcore.utilities.attachments_api.get_failed_tests", side_effect=lambda *args: [[10, 100, "test1"],
-                                                                                                [11, 101, "test2"]])
-def test_attach_files_performs_the_correct_request(mock_get_failed_tests, mock_post, mock_get_file_base64,
-                                                   mock_listdir, mock_get_run_ids_from_response, _mock_print):
-    attach_files_release("test-org", "test-project", "screenshots", "100", "test-token")
+@mock.patch("uitestcore.utilities.attachments_api.get_failed_tests", side_effect=lambda *args: [[11, 101, "test2"]])
+def test_attach_files_performs_the_correct_request(mock_get_failed_tests, mock_get_run_ids_from_response, _mock_print,
+                                                   _mock_get, tmp_path):
+    (tmp_path / "test2").mkdir()
+    (tmp_path / "test2" / "test2").write_bytes(b"test data")
+    bodies = []
 
-    check_mocked_functions_called(mock_get_failed_tests, mock_post, mock_get_file_base64,
-                                  mock_listdir, mock_get_run_ids_from_response)
+    with mock.patch("requests.Session.post", side_effect=mock_post_reading_body(bodies)) as mock_post:
+        attach_files_release("test-org", "test-project", str(tmp_path), "100", "test-token")
+
+    check_mocked_functions_called(mock_get_failed_tests, mock_post, mock_get_run_ids_from_response)
     request_args = mock_post.call_args
 
     assert_that(request_args[0][0], equal_to("https://dev.azure.com/test-org/test-project/_apis/"
@@ -306,9 +420,147 @@ def test_attach_files_performs_the_correct_request(mock_get_failed_tests, mock_p
     assert_that(request_args[1]["params"]["api-version"], equal_to("5.0-preview.1"), "api-version for POST incorrect")
     assert_that(request_args[1]["auth"][1], equal_to("test-token"), "Auth token incorrect")
     assert_that(request_args[1]["headers"]["Content-Type"], equal_to("application/json"), "Incorrect request header")
-    assert_that(request_args[1]["data"], equal_to("{\"attachmentType\": \"GeneralAttachment\", \"comment\": "
-                                                  "\"Attached by UiTestCore\", \"fileName\": \"test2\", \"stream\": "
-                                                  "\"test-base64-string\"}"), "Incorrect request body")
+    assert_that(bodies, equal_to([b"{\"attachmentType\": \"GeneralAttachment\", \"comment\": "
+                                  b"\"Attached by UiTestCore\", \"fileName\": \"test2\", \"stream\": "
+                                  b"\"dGVzdCBkYXRh\"}"]), "Incorrect request body")
+
+
+@mock.patch("builtins.print")
+@mock.patch("requests.Session.post", side_effect=lambda *args, **kwargs: MockResponse("", 200))
+@mock.patch("uitestcore.utilities.attachments_api.get_failed_tests", side_effect=lambda *args: [[10, 100, "test1"]])
+def test_attach_files_skips_identical_files(mock_get_failed_tests, mock_post, _mock_print, tmp_path):
+    (tmp_path / "test1").mkdir()
+    for file_name, contents in [("first.png", b"first"), ("second.png", b"same"), ("third.png", b"same")]:
+        (tmp_path / "test1" / file_name).write_bytes(contents)
+
+    result = attach_files([10], "https://test-url", "test-token", str(tmp_path))
+
+    check_mocked_functions_called(mock_get_failed_tests)
+    assert_that(result, equal_to(0), "Skipping identical files should not be a failure")
+    assert_that(mock_post.call_count, equal_to(2), "Identical files should only be attached once")
+
+
+def test_attachment_body_streams_the_file(tmp_path):
+    contents = os.urandom(BASE64_CHUNK_SIZE * 2 + 1)
+    (tmp_path / "video.webm").write_bytes(contents)
+    body = AttachmentBody(str(tmp_path / "video.webm"), "video.webm")
+
+    parts = iter(lambda: body.read(8192), b"")
+    data = b"".join(parts)
+
+    assert_that(len(data), equal_to(len(body)), "The length should be known before the body is read")
+    request_json = json.loads(data)
+    assert_that(request_json["fileName"], equal_to("video.webm"), "The file name should be in the body")
+    assert_that(base64.b64decode(request_json["stream"]), equal_to(contents), "The file should be Base64 encoded")
+
+
+def test_attachment_body_memory_does_not_grow_with_file_size(tmp_path):
+    file_size = 32 * 1024 * 1024
+    with open(tmp_path / "large.png", "wb") as file:
+        file.truncate(file_size)
+    body = AttachmentBody(str(tmp_path / "large.png"), "large.png")
+
+    tracemalloc.start()
+    try:
+        while body.read(8192):
+            pass
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    assert_that(peak < 3 * 1024 * 1024, equal_to(True), "Only a chunk of the file should be held in memory at once")
+
+
+def test_attach_files_uploads_concurrently(tmp_path):
+    failed_tests = write_attachments(tmp_path, tests=4, files_per_test=6)
+
+    for max_workers in (1, 8):
+        with AzureStubServer(delay=0.02) as server, mock.patch("builtins.print"), \
+                mock.patch("uitestcore.utilities.attachments_api.get_failed_tests", return_value=failed_tests):
+            result = attach_files([10], server.url, "test-token", str(tmp_path), max_workers=max_workers,
+                                  journal_file=str(tmp_path / f"journal-{max_workers}.jsonl"))
+
+        assert_that(result, equal_to(0), "Every file should have been attached")
+        assert_that(len(server.requests), equal_to(24), "Every file should have been uploaded once")
+        assert_that(server.connections, less_than_or_equal_to(max_workers),
+                    "Connections should be reused rather than opened for each file")
+        assert_that(server.max_in_flight, less_than_or_equal_to(max_workers),
+                    "No more uploads than workers should be in flight")
+        if max_workers > 1:
+            assert_that(server.max_in_flight, greater_than(1), "Files should have been uploaded at the same time")
+
+
+@mock.patch("builtins.print")
+def test_attach_files_retries_when_throttled(_mock_print, tmp_path):
+    write_attachments(tmp_path, tests=3, files_per_test=4)
+    runs = make_failed_test_runs(3)
+    # Let the failed tests be found, then throttle the uploads - fewer faults than retries so every file gets through
+    faults = [None] + [(429, {"Retry-After": "0.05"})] * 3 + [(503, {})] * 2
+
+    with AzureStubServer(runs=runs, faults=faults) as server, RequestExecutor(backoff_factor=0.01) as executor:
+        result = attach_files([10], server.url, "test-token", str(tmp_path), executor=executor)
+
+    uploaded = sorted((path, body["fileName"]) for method, path, body in server.requests if method == "POST")
+    assert_that(result, equal_to(0), "Every file should have been attached despite the throttling")
+    assert_that(len(uploaded), equal_to(12), "Every file should have been uploaded")
+    assert_that(len(set(uploaded)), equal_to(12), "No file should have been uploaded twice")
+    assert_that(len(server.faulted_requests), equal_to(5), "The faults should have been retried")
+
+
+@mock.patch("builtins.print")
+def test_attach_files_rerun_only_uploads_remaining_files(_mock_print, tmp_path):
+    write_attachments(tmp_path, tests=3, files_per_test=4)
+
+    # Let the failed tests be found, then fail 2 of the uploads
+    with AzureStubServer(runs=make_failed_test_runs(3), faults=[None, (400, {}), (400, {})]) as server:
+        first_result = attach_files([10], server.url, "test-token", str(tmp_path))
+        first_uploads = len(server.requests) - 1
+        second_result = attach_files([10], server.url, "test-token", str(tmp_path))
+        third_result = attach_files([10], server.url, "test-token", str(tmp_path))
+
+    uploaded = [(path, body["fileName"]) for method, path, body in server.requests if method == "POST"]
+    assert_that((first_result, second_result, third_result), equal_to((1, 0, 0)),
+                "The first run should fail and the reruns should succeed")
+    assert_that(first_uploads, equal_to(10), "The first run should have attached the other files")
+    assert_that(len(uploaded), equal_to(12), "The rerun should only have uploaded the 2 files which failed")
+    assert_that(len(set(uploaded)), equal_to(12), "No file should have been uploaded twice")
+
+
+@mock.patch("builtins.print")
+def test_attach_files_checks_uploads_which_did_not_finish(_mock_print, tmp_path):
+    write_attachments(tmp_path, tests=1, files_per_test=2)
+    test_folder = tmp_path / "test0"
+    journal = UploadJournal(str(tmp_path / UPLOAD_JOURNAL_FILE))
+
+    with AzureStubServer(runs=make_failed_test_runs(1)) as server:
+        # The previous run was stopped after uploading the first file but before recording that it had finished
+        for file_name in ("screenshot0.png", "screenshot1.png"):
+            journal.record_started(10, 0, file_digest(str(test_folder / file_name)), file_name)
+        requests.post(f"{server.url}/10/Results/0/attachments", json={"fileName": "screenshot0.png"})
+
+        result = attach_files([10], server.url, "test-token", str(tmp_path))
+
+    uploaded = [body["fileName"] for method, _path, body in server.requests if method == "POST"]
+    assert_that(result, equal_to(0), "The run should succeed")
+    assert_that(uploaded, equal_to(["screenshot0.png", "screenshot1.png"]),
+                "Only the file which had not reached Azure should have been uploaded again")
+    assert_that(UploadJournal(str(tmp_path / UPLOAD_JOURNAL_FILE)).is_completed(
+        10, 0, file_digest(str(test_folder / "screenshot0.png"))), equal_to(True),
+        "The file found on Azure should have been recorded as finished")
+
+
+@mock.patch("builtins.print")
+@mock.patch("requests.Session.post", side_effect=lambda *args, **kwargs: MockResponse("", 200))
+def test_attach_files_reports_each_file(mock_post, mock_print, tmp_path):
+    failed_tests = write_attachments(tmp_path, tests=2, files_per_test=2)
+
+    with mock.patch("uitestcore.utilities.attachments_api.get_failed_tests", return_value=failed_tests):
+        result = attach_files([10], "https://test-url", "test-token", str(tmp_path), max_workers=3)
+
+    assert_that(result, equal_to(0), "Result should be a success when every file is attached")
+    assert_that(mock_post.call_count, equal_to(4), "Every file should have been attached")
+    for file in ("screenshot0.png", "screenshot1.png"):
+        mock_print.assert_any_call(f"Attach file {file} - response 200")
 
 
 @mock.patch("uitestcore.utilities.attachments_api.listdir", side_effect=mock_list_dir)
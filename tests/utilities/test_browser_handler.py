@@ -1,7 +1,10 @@
+import base64
 import io
+import struct
+import zlib
 from datetime import datetime
 from unittest import mock
-from unittest.mock import mock_open
+from unittest.mock import MagicMock, mock_open
 from hamcrest import equal_to, raises, calling, not_, has_property, contains_string, has_length
 from tests.unit_test_utils import *
 from uitestcore.utilities.browser_handler import *
@@ -178,6 +181,188 @@ def test_prepare_browser(mock_set_browser_size, mock_open_browser, mock_parse_co
     assert_that(context.browser.implicit_wait, equal_to(10), "Implicit wait not set correctly")
 
 
+@mock.patch.dict(os.environ, {"UITESTCORE_WORKER_ID": "2"})
+@mock.patch.object(BrowserHandler, "saved_screenshot_file_names", [])
+@mock.patch("os.path.exists", side_effect=lambda *args: True)
+@mock.patch("uitestcore.utilities.browser_handler.get_current_datetime",
+            side_effect=lambda: datetime(2019, 1, 1, 12, 0, 0, 0))
+def test_take_screenshot_in_parallel_worker(mock_get_current_datetime, mock_path_exists):
+    driver = MockDriver(1000, 1000, 500)
+
+    BrowserHandler.take_screenshot(driver, "test")
+
+    assert_that(driver.screenshot_filename,
+                equal_to(f"{os.path.join(SCREENSHOTS_PATH, 'worker-2')}/2019-01-01_12.00.00.000000_test.png"),
+                "Screenshots should be saved in the worker's folder")
+
+
+class MockChromiumDriver(MockDriver):
+    def __init__(self):
+        super().__init__(1000, 1000, 3000)
+        self.cdp_commands = []
+
+    def execute_cdp_cmd(self, cmd, cmd_args):
+        self.cdp_commands.append((cmd, cmd_args))
+        if cmd == "Page.getLayoutMetrics":
+            return {"cssContentSize": {"width": 1000, "height": 3000}}
+        return {"data": base64.b64encode(b"chromium png").decode("ascii")}
+
+
+class MockFirefoxDriver(MockDriver):
+    def __init__(self):
+        super().__init__(1000, 1000, 3000)
+
+    @staticmethod
+    def get_full_page_screenshot_as_base64():
+        return base64.b64encode(b"firefox png").decode("ascii")
+
+
+@mock.patch.object(BrowserHandler, "saved_screenshot_file_names", [])
+@mock.patch("os.path.exists", side_effect=lambda *args: True)
+def test_take_screenshot_chromium_full_page(mock_path_exists):
+    driver = MockChromiumDriver()
+
+    with mock.patch("builtins.open", mock_open()) as mock_file:
+        result = BrowserHandler.take_screenshot(driver, "test")
+
+    assert_that(result, equal_to(True), "The screenshot should have been saved")
+    mock_file().write.assert_called_once_with(b"chromium png")
+    assert_that(driver.cdp_commands[1][1]["captureBeyondViewport"], equal_to(True),
+                "The page beyond the window should have been captured")
+    assert_that(driver.cdp_commands[1][1]["clip"]["height"], equal_to(3000), "The whole page should be captured")
+    assert_that(driver.num_resizes, equal_to(0), "The window should not have been resized")
+    assert_that(len(BrowserHandler.saved_screenshot_file_names), equal_to(1), "The file name should have been saved")
+
+
+@mock.patch.object(BrowserHandler, "saved_screenshot_file_names", [])
+@mock.patch("os.path.exists", side_effect=lambda *args: True)
+def test_take_screenshot_firefox_full_page(mock_path_exists):
+    driver = MockFirefoxDriver()
+
+    with mock.patch("builtins.open", mock_open()) as mock_file:
+        result = BrowserHandler.take_screenshot(driver, "test")
+
+    assert_that(result, equal_to(True), "The screenshot should have been saved")
+    mock_file().write.assert_called_once_with(b"firefox png")
+    assert_that(driver.num_resizes, equal_to(0), "The window should not have been resized")
+
+
+@mock.patch.object(BrowserHandler, "saved_screenshot_file_names", [])
+@mock.patch("os.path.exists", side_effect=lambda *args: True)
+def test_take_screenshot_native_full_page_disabled(mock_path_exists):
+    driver = MockFirefoxDriver()
+
+    BrowserHandler.take_screenshot(driver, "test", native_full_page=False)
+
+    assert_that(driver.num_resizes, equal_to(2), "The window should have been resized to capture the full page")
+
+
+def make_png(compression_level):
+    def chunk(chunk_type, data):
+        return struct.pack(">I", len(data)) + chunk_type + data + struct.pack(">I", zlib.crc32(chunk_type + data))
+
+    image_data = zlib.compress(b"\x00" + b"\xff" * 300, compression_level)
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", struct.pack(">IIBBBBB", 100, 1, 8, 2, 0, 0, 0)) + \
+        chunk(b"IDAT", image_data[:10]) + chunk(b"IDAT", image_data[10:]) + chunk(b"IEND", b"")
+
+
+@mock.patch.object(BrowserHandler, "saved_screenshot_file_names", [])
+@mock.patch.object(BrowserHandler, "pending_screenshots", [])
+def test_take_screenshot_in_background(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    driver = MockChromiumDriver()
+
+    future = BrowserHandler.take_screenshot(driver, "test", in_background=True)
+
+    assert_that(BrowserHandler.wait_for_screenshots(), equal_to(True), "The screenshot should have been saved")
+    assert_that(future.result(), equal_to(True), "The future should give the result")
+    with open(BrowserHandler.saved_screenshot_file_names[0], "rb") as screenshot_file:
+        assert_that(screenshot_file.read(), equal_to(b"chromium png"), "The decoded screenshot should be saved")
+    assert_that(BrowserHandler.pending_screenshots, equal_to([]), "There should be no pending screenshots")
+
+
+@mock.patch.object(BrowserHandler, "saved_screenshot_file_names", [])
+@mock.patch.object(BrowserHandler, "pending_screenshots", [])
+def test_take_screenshot_in_background_resizes_without_native_full_page(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    driver = MockDriver(1000, 1000, 3000)
+    driver.get_screenshot_as_base64 = lambda: base64.b64encode(b"resized png").decode("ascii")
+
+    BrowserHandler.take_screenshot(driver, "test", in_background=True)
+    BrowserHandler.wait_for_screenshots()
+
+    assert_that(driver.num_resizes, equal_to(2), "The window should have been resized around the screenshot")
+    with open(BrowserHandler.saved_screenshot_file_names[0], "rb") as screenshot_file:
+        assert_that(screenshot_file.read(), equal_to(b"resized png"), "The decoded screenshot should be saved")
+
+
+@mock.patch.object(BrowserHandler, "pending_screenshots", [])
+@mock.patch("os.listdir", side_effect=lambda *args: [])
+@mock.patch("os.path.exists", side_effect=lambda *args: True)
+def test_move_screenshots_to_folder_waits_for_pending_screenshots(mock_path_exists, mock_listdir):
+    pending = MagicMock(name="future")
+    pending.exception.return_value = None
+    BrowserHandler.pending_screenshots.append(pending)
+
+    with mock.patch("uitestcore.utilities.browser_handler.wait") as mock_wait:
+        BrowserHandler.move_screenshots_to_folder("test")
+
+    mock_wait.assert_called_once_with([pending])
+
+
+def test_recompress_png():
+    png = make_png(0)
+
+    recompressed = recompress_png(png)
+
+    assert_that(len(recompressed) < len(png), equal_to(True), "The PNG should be smaller")
+    assert_that(recompressed.count(b"IDAT"), equal_to(1), "The image data should be in a single chunk")
+    length = struct.unpack(">I", recompressed[33:37])[0]
+    image_data = recompressed[41:41 + length]
+    assert_that(zlib.decompress(image_data), equal_to(b"\x00" + b"\xff" * 300), "The image should be unchanged")
+    assert_that(recompressed[41 + length:45 + length], equal_to(struct.pack(">I", zlib.crc32(b"IDAT" + image_data))),
+                "The chunk checksum should be correct")
+
+
+def test_recompress_png_keeps_smaller_original():
+    png = make_png(9)
+
+    assert_that(recompress_png(png, level=0), equal_to(png), "The original should be kept if it is smaller")
+
+
+def test_recompress_png_keeps_invalid_png():
+    png = make_png(0)
+    corrupt = png.replace(zlib.compress(b"\x00" + b"\xff" * 300, 0)[10:], b"\x00" * 10)
+
+    for invalid_png in [png[:40], png[:-15], corrupt, b"not a png"]:
+        assert_that(recompress_png(invalid_png), equal_to(invalid_png),
+                    "The original bytes should be kept when the PNG cannot be read")
+
+
+def test_capture_full_page_png_falls_back_on_error():
+    driver = MockChromiumDriver()
+    driver.execute_cdp_cmd = MagicMock(side_effect=WebDriverException("not supported"))
+
+    assert_that(capture_full_page_png(driver), equal_to(None), "None should be returned so the fallback is used")
+
+
+def test_capture_full_page_png_falls_back_on_unexpected_response():
+    for layout_metrics in [{"contentSize": {"width": 1000, "height": 3000}}, None, {"cssContentSize": None}]:
+        driver = MockChromiumDriver()
+        driver.execute_cdp_cmd = MagicMock(return_value=layout_metrics)
+
+        assert_that(capture_full_page_png(driver), equal_to(None), "None should be returned so the fallback is used")
+
+
+def test_release_browser_without_pool():
+    context = MockContext()
+    context.browser = MagicMock(name="browser")
+
+    BrowserHandler.release_browser(context)
+
+    context.browser.quit.assert_called_once()
+
+
 @mock.patch("os.path.exists", side_effect=lambda *args: False)
 @mock.patch("os.makedirs")
 @mock.patch("uitestcore.utilities.browser_handler.get_current_datetime",
@@ -0,0 +1,238 @@
+from unittest import mock
+from unittest.mock import MagicMock
+
+from hamcrest import assert_that, equal_to
+from selenium.common.exceptions import WebDriverException
+from uitestcore.utilities.browser_handler import BrowserHandler
+from uitestcore.utilities.browser_pool import BrowserPool, reset_browser
+
+
+class MockSwitchTo:
+    def __init__(self, driver):
+        self.driver = driver
+
+    def window(self, handle):
+        self.driver.current_window = handle
+
+
+class MockDriver:
+    def __init__(self, healthy=True, window_handles=None):
+        self.healthy = healthy
+        self.handles = window_handles or ["window_1"]
+        self.switch_to = MockSwitchTo(self)
+        self.current_window = self.handles[0]
+        self.calls = []
+        self.quit_called = False
+
+    @property
+    def window_handles(self):
+        if not self.healthy:
+            raise WebDriverException("browser crashed")
+        return list(self.handles)
+
+    def close(self):
+        self.handles.remove(self.current_window)
+
+    def quit(self):
+        self.quit_called = True
+
+
+class MockChromiumDriver(MockDriver):
+    def __init__(self, devtools_available=True, **kwargs):
+        super().__init__(**kwargs)
+        self.devtools_available = devtools_available
+        # Target.getBrowserContexts does not include the browser's default context
+        self.contexts = []
+        self.created_contexts = 0
+
+    def execute_cdp_cmd(self, cmd, args):
+        if not self.devtools_available:
+            raise WebDriverException("DevTools is not available")
+        self.calls.append((cmd, args.get("browserContextId")))
+        if cmd == "Target.createBrowserContext":
+            self.created_contexts += 1
+            self.contexts.append(f"context_{self.created_contexts}")
+            return {"browserContextId": self.contexts[-1]}
+        if cmd == "Target.createTarget":
+            self.handles.append(f"window_in_{args['browserContextId']}")
+            return {"targetId": self.handles[-1]}
+        if cmd == "Target.getBrowserContexts":
+            return {"browserContextIds": list(self.contexts)}
+        if cmd == "Target.disposeBrowserContext":
+            self.contexts.remove(args["browserContextId"])
+        return {}
+
+
+class MockContext:
+    browser_name = "chrome"
+    browser_options = ["--headless"]
+    maximize_browser = False
+
+
+def mock_open_browser(launch_context):
+    launch_context.browser = MockChromiumDriver()
+
+
+@mock.patch("uitestcore.utilities.browser_pool.open_browser", side_effect=mock_open_browser)
+def test_start_opens_browsers(mock_open_browser_function):
+    pool = BrowserPool(MockContext(), size=3, existing_logger=MagicMock(name="logger"))
+
+    pool.start()
+    pool.close()
+
+    assert_that(mock_open_browser_function.call_count, equal_to(3), "The pool should have opened 3 browsers")
+    launch_context = mock_open_browser_function.call_args[0][0]
+    assert_that(launch_context.browser_options, equal_to(["--headless"]),
+                "The browser options from the context should be used")
+
+
+@mock.patch("uitestcore.utilities.browser_pool.open_browser", side_effect=mock_open_browser)
+def test_checkout_reuses_idle_browser(mock_open_browser_function):
+    pool = BrowserPool(MockContext(), size=1, existing_logger=MagicMock(name="logger"))
+    driver = MockDriver()
+    pool.idle.append(driver)
+
+    assert_that(pool.checkout(), equal_to(driver), "The idle browser should have been checked out")
+    mock_open_browser_function.assert_not_called()
+
+
+@mock.patch("uitestcore.utilities.browser_pool.open_browser", side_effect=mock_open_browser)
+def test_checkout_opens_browser_when_none_idle(mock_open_browser_function):
+    pool = BrowserPool(MockContext(), size=1, existing_logger=MagicMock(name="logger"))
+
+    driver = pool.checkout()
+
+    assert_that(isinstance(driver, MockChromiumDriver), equal_to(True), "A new browser should have been opened")
+    mock_open_browser_function.assert_called_once()
+
+
+@mock.patch("uitestcore.utilities.browser_pool.open_browser", side_effect=mock_open_browser)
+def test_checkout_retires_crashed_browser(mock_open_browser_function):
+    pool = BrowserPool(MockContext(), size=1, existing_logger=MagicMock(name="logger"))
+    crashed_driver = MockDriver(healthy=False)
+    healthy_driver = MockDriver()
+    pool.idle.extend([crashed_driver, healthy_driver])
+
+    driver = pool.checkout()
+    pool.close()
+
+    assert_that(driver, equal_to(healthy_driver), "The crashed browser should have been skipped")
+    assert_that(crashed_driver.quit_called, equal_to(True), "The crashed browser should have been closed")
+    mock_open_browser_function.assert_called_once()
+
+
+@mock.patch("uitestcore.utilities.browser_pool.open_browser", side_effect=mock_open_browser)
+def test_checkin_resets_browser(mock_open_browser_function):
+    pool = BrowserPool(MockContext(), size=1, existing_logger=MagicMock(name="logger"))
+    driver = MockChromiumDriver(window_handles=["window_1", "window_2"])
+
+    pool.checkin(driver)
+
+    assert_that(pool.idle, equal_to([driver]), "The browser should have been returned to the pool")
+    assert_that(driver.quit_called, equal_to(False), "The browser should not have been closed")
+    assert_that(driver.handles, equal_to(["window_in_context_1"]),
+                "The scenario's windows should have been closed, leaving a window in a new browser context")
+    mock_open_browser_function.assert_not_called()
+
+
+@mock.patch("uitestcore.utilities.browser_pool.open_browser", side_effect=mock_open_browser)
+def test_checkin_closes_browser_which_cannot_be_reset_completely(mock_open_browser_function):
+    pool = BrowserPool(MockContext(), size=1, existing_logger=MagicMock(name="logger"))
+    driver = MockDriver()
+
+    pool.checkin(driver)
+    pool.close()
+
+    assert_that(driver.quit_called, equal_to(True), "A browser without DevTools should not be reused")
+    mock_open_browser_function.assert_called_once()
+
+
+@mock.patch("uitestcore.utilities.browser_pool.open_browser", side_effect=mock_open_browser)
+def test_checkin_after_close(mock_open_browser_function):
+    pool = BrowserPool(MockContext(), size=1, existing_logger=MagicMock(name="logger"))
+    driver = pool.checkout()
+    other_driver = pool.checkout()
+    pool.close()
+
+    pool.checkin(driver)
+    pool.checkin(MockDriver())
+    other_driver.healthy = False
+    pool.checkin(other_driver)
+
+    assert_that(driver.quit_called and other_driver.quit_called, equal_to(True),
+                "Browsers checked in after the pool was closed should be closed")
+    assert_that(pool.idle, equal_to([]), "No browsers should be left in the pool")
+    assert_that(mock_open_browser_function.call_count, equal_to(2), "No replacement browsers should be opened")
+
+
+@mock.patch("uitestcore.utilities.browser_pool.open_browser", side_effect=mock_open_browser)
+def test_checkin_retires_browser_after_max_uses(mock_open_browser_function):
+    pool = BrowserPool(MockContext(), size=1, max_uses=2, existing_logger=MagicMock(name="logger"))
+    driver = MockDriver()
+
+    pool.checkin(driver)
+    pool.checkin(pool.checkout())
+    pool.close()
+
+    assert_that(driver.quit_called, equal_to(True), "The browser should have been closed after 2 uses")
+    assert_that(len(pool.idle), equal_to(0), "The replacement should be closed when the pool is closed")
+    mock_open_browser_function.assert_called_once()
+
+
+@mock.patch("uitestcore.utilities.browser_pool.open_browser", side_effect=mock_open_browser)
+def test_checkin_retires_browser_which_cannot_be_reset(mock_open_browser_function):
+    pool = BrowserPool(MockContext(), size=1, existing_logger=MagicMock(name="logger"))
+    driver = MockChromiumDriver(healthy=False)
+
+    pool.checkin(driver)
+    pool.close()
+
+    assert_that(driver.quit_called, equal_to(True), "The browser should have been closed")
+    mock_open_browser_function.assert_called_once()
+
+
+def test_reset_browser_chromium():
+    driver = MockChromiumDriver(window_handles=["window_1"])
+
+    assert_that(reset_browser(driver), equal_to(True), "The browser should have been reset")
+    assert_that(reset_browser(driver), equal_to(True), "The browser should have been reset again")
+
+    assert_that(driver.handles, equal_to(["window_in_context_2"]), "Only the newest window should be open")
+    assert_that(driver.contexts, equal_to(["context_2"]),
+                "The browser contexts of previous scenarios should have been disposed of")
+
+
+def test_reset_browser_other_browsers():
+    driver = MockDriver()
+
+    assert_that(reset_browser(driver), equal_to(False), "Browsers without DevTools cannot be reset completely")
+    assert_that(driver.handles, equal_to(["window_1"]), "The browser should not have been changed")
+
+
+@mock.patch("uitestcore.utilities.browser_pool.open_browser", side_effect=mock_open_browser)
+def test_checkin_retires_browser_when_reset_fails(mock_open_browser_function):
+    pool = BrowserPool(MockContext(), size=1, existing_logger=MagicMock(name="logger"))
+    driver = MockChromiumDriver(devtools_available=False)
+
+    pool.checkin(driver)
+    pool.close()
+
+    assert_that(driver.quit_called, equal_to(True), "The browser which could not be reset should have been closed")
+    assert_that(driver in pool.uses, equal_to(False), "The closed browser should no longer be counted")
+    mock_open_browser_function.assert_called_once()
+
+
+@mock.patch("uitestcore.utilities.browser_handler.parse_config_data")
+@mock.patch("uitestcore.utilities.browser_handler.open_browser")
+def test_prepare_and_release_browser_with_pool(mock_open_browser_function, mock_parse_config_data):
+    context = MockContext()
+    context.implicit_wait = 0
+    context.browser_pool = MagicMock(name="browser_pool")
+
+    BrowserHandler.prepare_browser(context)
+    BrowserHandler.release_browser(context)
+
+    assert_that(context.browser, equal_to(context.browser_pool.checkout.return_value),
+                "The browser should have been checked out of the pool")
+    context.browser_pool.checkin.assert_called_once_with(context.browser)
+    mock_open_browser_function.assert_not_called()
@@ -0,0 +1,131 @@
+from unittest import mock
+
+from hamcrest import assert_that, equal_to, contains_string
+from uitestcore.page import BasePage
+from uitestcore.utilities.command_metrics import CommandStats, instrument_driver
+
+
+class MockDriver:
+    def __init__(self):
+        self.commands = []
+
+    def execute(self, driver_command, params=None):
+        self.commands.append((driver_command, params))
+        return {"value": driver_command}
+
+
+class MockElement:
+    def __init__(self, parent):
+        self._parent = parent
+
+    def get_attribute(self, name):
+        return self._parent.execute("getElementAttribute", {"name": name})
+
+
+def test_commands_are_counted():
+    driver = MockDriver()
+    metrics = instrument_driver(driver)
+
+    result = driver.execute("findElements", {"using": "id"})
+    MockElement(driver).get_attribute("class")
+    driver.execute("findElements")
+
+    assert_that(result, equal_to({"value": "findElements"}), "The driver response should be returned")
+    assert_that(driver.commands[0], equal_to(("findElements", {"using": "id"})),
+                "The command should be sent to the driver")
+    assert_that(dict(metrics.total.counts), equal_to({"findElements": 2, "getElementAttribute": 1}),
+                "Commands sent through the driver and elements should be counted by type")
+
+
+def test_instrument_driver_only_once():
+    driver = MockDriver()
+
+    first = instrument_driver(driver)
+    second = instrument_driver(driver)
+    driver.execute("findElements")
+
+    assert_that(second, equal_to(first), "The existing metrics should be returned")
+    assert_that(first.total.total_commands, equal_to(1), "The command should only be counted once")
+
+
+def test_commands_counted_per_scenario_and_step():
+    driver = MockDriver()
+    metrics = instrument_driver(driver)
+
+    driver.execute("get")
+    metrics.start_scenario("scenario 1")
+    metrics.start_step("step 1")
+    driver.execute("findElements")
+    metrics.start_step("step 2")
+    driver.execute("clickElement")
+    driver.execute("clickElement")
+
+    scenario = metrics.scenarios[0]
+    assert_that(metrics.total.total_commands, equal_to(4), "All commands should be counted in the total")
+    assert_that(scenario.total_commands, equal_to(3), "Only commands in the scenario should be counted")
+    assert_that([dict(step.counts) for step in scenario.steps],
+                equal_to([{"findElements": 1}, {"clickElement": 2}]), "Commands should be counted per step")
+
+
+def test_latency_histogram():
+    stats = CommandStats("test")
+
+    for duration in [0.0005, 0.003, 0.003, 0.004, 0.04, 10]:
+        stats.add("findElements", duration)
+
+    assert_that(stats.histograms["findElements"][:7], equal_to([1, 0, 3, 0, 0, 1, 0]),
+                "Each command should be counted in the bucket for its latency")
+    assert_that(stats.histograms["findElements"][-1], equal_to(1), "Slow commands should be in the overflow bucket")
+    assert_that(stats.percentile("findElements", 0.5), equal_to(5), "The p50 bucket should be returned")
+    assert_that(stats.percentile("findElements", 1), equal_to(None), "The overflow bucket has no upper bound")
+
+
+def test_report():
+    driver = MockDriver()
+    metrics = instrument_driver(driver)
+    metrics.start_scenario("my scenario")
+    metrics.start_step("my step")
+
+    with mock.patch("time.perf_counter", side_effect=[0, 0.002]):
+        driver.execute("findElements")
+
+    report = metrics.report()
+
+    assert_that(report, contains_string("Total: 1 command(s)"), "The total should be in the report")
+    assert_that(report, contains_string("    my scenario: 1 command(s)"), "The scenario should be in the report")
+    assert_that(report, contains_string("        my step: 1 command(s)"), "The step should be in the report")
+    assert_that(report, contains_string("findElements: 1 in 0.002s (p50 <= 2ms, p95 <= 2ms)"),
+                "The command latency should be in the report")
+
+
+def test_detach():
+    driver = MockDriver()
+    metrics = instrument_driver(driver)
+
+    metrics.detach()
+    driver.execute("findElements")
+
+    assert_that(metrics.total.total_commands, equal_to(0), "Commands should not be counted after detaching")
+    assert_that(instrument_driver(driver) is metrics, equal_to(False), "The driver can be measured again")
+
+
+def test_detach_keeps_other_wrappers():
+    driver = MockDriver()
+    metrics = instrument_driver(driver)
+    other_wrapper = mock.Mock(name="other_wrapper")
+    driver.execute = other_wrapper
+
+    metrics.detach()
+
+    assert_that(driver.execute, equal_to(other_wrapper), "A wrapper installed after measuring should be kept")
+
+
+def test_base_page_measure_commands():
+    driver = MockDriver()
+
+    page = BasePage(driver, measure_commands=True)
+    other_page = BasePage(driver, measure_commands=True)
+
+    assert_that(other_page.command_metrics, equal_to(page.command_metrics),
+                "Pages using the same driver should share the metrics")
+    assert_that(BasePage(MockDriver()).command_metrics, equal_to(None), "Commands should not be measured by default")
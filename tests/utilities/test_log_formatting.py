@@ -0,0 +1,92 @@
+from unittest import mock
+
+from hamcrest import assert_that, equal_to, contains_string
+from selenium.webdriver.remote.webelement import WebElement
+from uitestcore.utilities import log_formatting
+from uitestcore.utilities.log_formatting import LazyLogValue, format_size, register_summarizer, summarize
+
+
+class MockPage:
+    def __repr__(self):
+        return "MockPage"
+
+
+def mock_web_element(element_id="test_id"):
+    return WebElement("parent", element_id)
+
+
+def test_summarize_short_values():
+    assert_that(summarize("short string"), equal_to("'short string'"), "Short strings should be shown in full")
+    assert_that(summarize([1, "two"]), equal_to("[1, 'two']"), "Short lists should be shown in full")
+    assert_that(summarize((MockPage(),)), equal_to("(MockPage)"), "Other values should use their repr")
+    assert_that(summarize({"key": None}), equal_to("{'key': None}"), "Short dicts should be shown in full")
+
+
+def test_summarize_large_string():
+    result = summarize("a" * 1258291)
+
+    assert_that(result, equal_to(f"str(1.2MB) {'a' * 50!r}"), "A large string should be shown as its size and start")
+
+
+def test_summarize_large_bytes():
+    result = summarize(b"a" * 2048)
+
+    assert_that(result, contains_string("bytes(2.0KB) b'aaa"), "Large bytes should be shown as their size and start")
+
+
+def test_summarize_list_of_web_elements():
+    result = summarize([mock_web_element() for _ in range(240)])
+
+    assert_that(result, equal_to("list of 240 WebElements"), "A list of WebElements should only show the count")
+
+
+def test_summarize_web_element():
+    assert_that(summarize(mock_web_element("abc")), equal_to("WebElement(abc)"), "The element ID should be shown")
+
+
+def test_summarize_long_collections():
+    assert_that(summarize(list(range(1000))), equal_to("[0, 1, 2, 3, 4, ... 995 more]"),
+                "Only the first items of a long list should be shown")
+    assert_that(summarize(dict.fromkeys(range(1000))),
+                equal_to("{0: None, 1: None, 2: None, 3: None, 4: None, ... 995 more}"),
+                "Only the first items of a long dict should be shown")
+    assert_that(summarize({1, 2}), equal_to("{1, 2}"), "Sets should be summarised")
+
+
+def test_summarize_nested_values():
+    result = summarize(("x" * 1000, [mock_web_element()]))
+
+    assert_that(result, equal_to(f"(str(1000B) {'x' * 50!r}, list of 1 WebElement)"),
+                "Each item in a collection should be summarised")
+
+
+def test_summarize_caps_length():
+    with mock.patch.object(log_formatting, "MAX_LENGTH", 10):
+        result = summarize("a" * 25)
+
+    assert_that(result, equal_to("str(25B) '..."), "Long summaries should be cut short")
+
+
+def test_register_summarizer():
+    class MockSubPage(MockPage):
+        pass
+
+    with mock.patch.dict(log_formatting._summarizers):
+        register_summarizer(MockPage, lambda page: "summarised page")
+
+        assert_that(summarize(MockSubPage()), equal_to("summarised page"), "The registered summarizer should be used")
+
+
+def test_lazy_log_value_only_summarises_when_formatted():
+    with mock.patch.object(log_formatting, "summarize", return_value="summary") as mock_summarize:
+        value = LazyLogValue([1, 2, 3])
+        mock_summarize.assert_not_called()
+
+        assert_that(str(value), equal_to("summary"), "The summary should be used when formatted")
+        assert_that(f"{value!r}", equal_to("summary"), "The summary should be used for repr")
+
+
+def test_format_size():
+    assert_that(format_size(512), equal_to("512B"))
+    assert_that(format_size(3482), equal_to("3.4KB"))
+    assert_that(format_size(1258291), equal_to("1.2MB"))
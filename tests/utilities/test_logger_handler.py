@@ -1,11 +1,13 @@
 import logging
+import threading
 from unittest import mock
 from unittest.mock import MagicMock
 
 import pytest
-from hamcrest import assert_that, equal_to, contains_string
+from hamcrest import assert_that, equal_to, contains_string, has_item, is_not
 from tests.unit_test_utils import check_mocked_functions_called
-from uitestcore.utilities.logger_handler import init_unique_log_file_logger, auto_log
+from uitestcore.utilities.logger_handler import init_unique_log_file_logger, auto_log, BatchedRotatingFileHandler, \
+    stop_queue_logging
 
 test_class_name = "test_class"
 return_value = "my return value"
@@ -27,6 +29,25 @@ def dummy_method(throw_exception=False, do_logging=False, do_return=False):
     # method itself doesn't need to do anything
 
 
+@pytest.fixture
+def restore_root_logger():
+    handlers, level = logging.root.handlers[:], logging.root.level
+    yield
+    stop_queue_logging()
+    for handler in logging.root.handlers:
+        handler.close()
+    logging.root.handlers = handlers
+    logging.root.setLevel(level)
+
+
+@pytest.fixture
+def mock_logger():
+    logger = logging.getLogger(test_class_name)
+    with mock.patch.object(logger, "isEnabledFor", return_value=True), mock.patch.object(logger, "debug"), \
+            mock.patch.object(logger, "exception"):
+        yield logger
+
+
 @mock.patch("os.path.exists", side_effect=lambda *args: True)
 @mock.patch("uitestcore.utilities.logger_handler.logging")
 def test_init_unique_log_file_logger(mock_logging, mock_path_exists):
@@ -54,28 +75,88 @@ def test_init_unique_log_file_logger_creates_folder(mock_makedirs, mock_logging,
     mock_makedirs.assert_called_with("test/logs")
 
 
-@mock.patch("uitestcore.utilities.logger_handler.logging")
-def test_auto_log(mock_logging):
-    mock_logger = MagicMock(name="mock_logger")
-    mock_logging.getLogger = mock_logger
-
+def test_auto_log(mock_logger):
     dummy_method()
-    mock_logging.getLogger.assert_called_once()
 
-    assert_that(mock_logger.mock_calls[1][1][0], contains_string("Entering function %s"),
+    assert_that(mock_logger.debug.call_args_list[0][0][0], contains_string("Entering function %s"),
                 "Expected to find entry message in logs")
-    assert_that(mock_logger.mock_calls[1][1][1], contains_string("dummy_method"),
+    assert_that(mock_logger.debug.call_args_list[0][0][1], contains_string("dummy_method"),
                 "Expected to find method name in entry message in logs")
-    assert_that(mock_logger.mock_calls[2][1][0], contains_string("Exited function %s"),
+    assert_that(mock_logger.debug.call_args_list[1][0][0], contains_string("Exited function %s"),
                 "Expected to find exit message in logs")
-    assert_that(mock_logger.mock_calls[2][1][1], contains_string("dummy_method"),
+    assert_that(mock_logger.debug.call_args_list[1][0][1], contains_string("dummy_method"),
                 "Expected to find method name in exit message in logs")
 
 
+def test_init_unique_log_file_logger_with_queue(tmp_path, restore_root_logger):
+    listener = init_unique_log_file_logger(str(tmp_path), level=logging.DEBUG, use_queue=True)
+    logging.getLogger(test_class_name).debug("Queued log message")
+    stop_queue_logging()
+
+    log_files = list(tmp_path.iterdir())
+    assert_that(len(log_files), equal_to(1), "One log file should have been created")
+    assert_that(log_files[0].read_text(), contains_string("DEBUG - test_class: Queued log message"),
+                "The queued log message should have been written to the file")
+    assert_that(listener.handlers[0].stream, equal_to(None), "The file should have been closed")
+
+
+def test_queued_records_are_formatted_by_listener_thread(tmp_path, restore_root_logger):
+    formatted_on = []
+
+    class Argument:
+        def __str__(self):
+            formatted_on.append(threading.current_thread())
+            return "argument"
+
+    init_unique_log_file_logger(str(tmp_path), level=logging.DEBUG, use_queue=True)
+    logging.getLogger(test_class_name).debug("Logged %s", Argument())
+    stop_queue_logging()
+
+    assert_that(list(tmp_path.iterdir())[0].read_text(), contains_string("Logged argument"),
+                "The message should have been written to the file")
+    assert_that(formatted_on, is_not(has_item(threading.current_thread())),
+                "The message should not have been formatted on the thread which logged it")
+
+
+def test_init_unique_log_file_logger_without_queue_returns_none(tmp_path, restore_root_logger):
+    assert_that(init_unique_log_file_logger(str(tmp_path)), equal_to(None),
+                "There should be no queue listener by default")
+
+
+def test_batched_rotating_file_handler_flushes_in_batches(tmp_path):
+    handler = BatchedRotatingFileHandler(str(tmp_path / "test.log"), "w", flush_every=3)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    record = logging.LogRecord(test_class_name, logging.INFO, "", 0, "message", None, None)
+
+    with mock.patch.object(handler.stream, "flush") as mock_flush:
+        for _ in range(4):
+            handler.handle(record)
+        flushes_after_four_records = mock_flush.call_count
+        handler.flush_now()
+
+    assert_that(flushes_after_four_records, equal_to(1), "The file should only be flushed after every 3 records")
+    assert_that(handler.unflushed, equal_to(0), "Nothing should be left unflushed")
+    handler.close()
+
+
+def test_batched_rotating_file_handler_rotates(tmp_path):
+    handler = BatchedRotatingFileHandler(str(tmp_path / "test.log"), "w", max_bytes=20, backup_count=2)
+    record = logging.LogRecord(test_class_name, logging.INFO, "", 0, "a message of 20 bytes", None, None)
+
+    for _ in range(3):
+        handler.handle(record)
+    handler.close()
+
+    assert_that(sorted(file.name for file in tmp_path.iterdir()), equal_to(["test.log", "test.log.1", "test.log.2"]),
+                "The log file should have been rotated")
+
+
 @mock.patch("uitestcore.utilities.logger_handler.logging")
 def test_auto_log_class_name_is_correct(mock_logging):
+    decorated_method = auto_log(test_class_name)(lambda: None)
+    decorated_method()
+    decorated_method()
 
-    dummy_method()
     mock_logging.getLogger.assert_called_once_with(test_class_name)
 
 
@@ -92,51 +173,96 @@ def test_auto_log_inner_function_logging(mock_test_logging):
                 "Logged message from within function not logged at expected level")
 
 
-@mock.patch("uitestcore.utilities.logger_handler.logging")
-def test_auto_log_exception_handling(mock_logging):
-    mock_logger = MagicMock(name="mock_logger")
-    mock_logging.getLogger = mock_logger
-
+def test_auto_log_exception_handling(mock_logger):
     with pytest.raises(ValueError) as excinfo:
         dummy_method(throw_exception=True)
 
     assert_that(str(excinfo.value), contains_string("Throwing value exception as part of test"),
                 "Unexpected exception thrown")
-    assert_that(mock_logger.mock_calls[1][1][0], contains_string("Entering function %s"),
+    assert_that(mock_logger.debug.call_args_list[0][0][0], contains_string("Entering function %s"),
                 "Expected to find entry message in logs")
-    assert_that(mock_logger.mock_calls[2][1][0],
+    assert_that(mock_logger.exception.call_args[0][0],
                 contains_string("There was an exception thrown in function %s"),
                 "Expected to find exception thrown message from the auto_log decorator in logs")
-    assert_that(mock_logger.mock_calls[2][1][1],
+    assert_that(mock_logger.exception.call_args[0][1],
                 contains_string("dummy_method"),
                 "Expected to find method name in exception thrown message from the auto_log decorator in logs")
-    assert_that(mock_logger.mock_calls[2][0], contains_string("exception"),
-                "Exception log message not logged at expected level")
 
 
-@mock.patch("uitestcore.utilities.logger_handler.logging")
-def test_auto_log_return_value(mock_logging):
-    mock_logger = MagicMock(name="mock_logger")
-    mock_logging.getLogger = mock_logger
-
+def test_auto_log_return_value(mock_logger):
     val_returned = dummy_method(do_return=True)
 
     assert_that(val_returned, equal_to(return_value))
-    assert_that(mock_logger.mock_calls[2][1][0], contains_string(f"with return value %s"),
+    assert_that(mock_logger.debug.call_args_list[1][0][0], contains_string("with return value %s"),
                 "Expected to find return value in exit message in logs")
-    assert_that(mock_logger.mock_calls[2][1][3], contains_string(return_value),
+    assert_that(str(mock_logger.debug.call_args_list[1][0][3]), contains_string(return_value),
                 "Expected to find return value in exit message in logs")
 
 
-@mock.patch("uitestcore.utilities.logger_handler.logging")
-def test_auto_log_none_return_value(mock_logging):
-    mock_logger = MagicMock(name="mock_logger")
-    mock_logging.getLogger = mock_logger
-
+def test_auto_log_none_return_value(mock_logger):
     val_returned = dummy_method(do_return=False)
 
     assert_that(val_returned, equal_to(None))
-    assert_that(mock_logger.mock_calls[2][1][0], contains_string("with return value %s"),
+    assert_that(mock_logger.debug.call_args_list[1][0][0], contains_string("with return value %s"),
                 "Expected to find blank return value in exit message in logs")
-    assert_that(mock_logger.mock_calls[2][1][3], equal_to(None),
+    assert_that(str(mock_logger.debug.call_args_list[1][0][3]), equal_to("None"),
                 "Expected to find blank return value in exit message in logs")
+
+
+def test_auto_log_call_ids_are_unique(mock_logger):
+    dummy_method()
+    dummy_method()
+
+    first_id = mock_logger.debug.call_args_list[0][0][2]
+    second_id = mock_logger.debug.call_args_list[2][0][2]
+    assert_that(mock_logger.debug.call_args_list[1][0][2], equal_to(first_id),
+                "The entry and exit messages should have the same function call ID")
+    assert_that(second_id > first_id, equal_to(True), "Each call should have a new function call ID")
+
+
+def test_auto_log_debug_disabled():
+    logger = logging.getLogger(test_class_name)
+    with mock.patch.object(logger, "isEnabledFor", return_value=False), mock.patch.object(logger, "debug"):
+        val_returned = dummy_method(do_return=True)
+
+        assert_that(val_returned, equal_to(return_value))
+        logger.debug.assert_not_called()
+
+
+def test_auto_log_debug_disabled_still_logs_exceptions():
+    logger = logging.getLogger(test_class_name)
+    with mock.patch.object(logger, "isEnabledFor", return_value=False), mock.patch.object(logger, "exception"):
+        with pytest.raises(ValueError):
+            dummy_method(throw_exception=True)
+
+        logger.exception.assert_called_once()
+
+
+def test_auto_log_keeps_function_metadata():
+    assert_that(dummy_method.__name__, equal_to("dummy_method"), "The function name should have been kept")
+    assert_that(dummy_method.__wrapped__.__module__, equal_to(__name__), "The wrapped function should be available")
+
+
+def test_auto_log_does_no_work_with_debug_disabled():
+    class Argument:
+        represented = 0
+
+        def __repr__(self):
+            Argument.represented += 1
+            return "Argument()"
+
+        __str__ = __repr__
+
+    decorated = auto_log(test_class_name)(lambda value: value)
+    argument = Argument()
+    logger = logging.getLogger(test_class_name)
+    logger.setLevel(logging.INFO)
+    try:
+        with mock.patch.object(logger, "_log") as mock_log:
+            result = decorated(argument)
+    finally:
+        logger.setLevel(logging.NOTSET)
+
+    assert_that(result, equal_to(argument), "The function's return value should be returned")
+    assert_that(mock_log.call_count, equal_to(0), "Nothing should be logged when DEBUG is disabled")
+    assert_that(Argument.represented, equal_to(0), "The arguments should never be turned into strings")
@@ -0,0 +1,196 @@
+import os
+from unittest import mock
+from xml.etree import ElementTree
+
+from hamcrest import assert_that, equal_to
+from uitestcore.utilities.parallel_runner import WORKER_ID_VARIABLE, find_feature_files, load_durations, main, \
+    merge_junit_reports, read_feature_durations, run_in_parallel, run_shard, save_durations, shard_features
+
+JUNIT_REPORT = """<?xml version="1.0" encoding="UTF-8"?>
+<testsuite name="{class_name}.{title}" tests="2" failures="{failures}" errors="0" skipped="0" time="{time}">
+    <testcase classname="{class_name}.{title}" name="Scenario 1" time="1"/>
+    <testcase classname="{class_name}.{title}" name="Scenario 2" time="1"/>
+</testsuite>
+"""
+
+
+def write_feature(folder, name, title):
+    path = os.path.join(folder, f"{name}.feature")
+    with open(path, "w", encoding="utf-8") as feature_file:
+        feature_file.write(f"@tag\nFeature: {title}\n\n  Scenario: Scenario 1\n")
+    return path
+
+
+def write_junit_report(folder, feature, title, time, failures=0, base_dir=None):
+    # behave names each report after the feature file's path relative to the folder containing the steps folder, with
+    # dots for separators
+    base_dir = base_dir or os.path.dirname(feature)
+    class_name = os.path.relpath(feature, base_dir)[:-len(".feature")].replace(os.sep, ".")
+    os.makedirs(folder, exist_ok=True)
+    with open(os.path.join(folder, f"TESTS-{class_name}.xml"), "w", encoding="utf-8") as report:
+        report.write(JUNIT_REPORT.format(class_name=class_name, title=title, time=time, failures=failures))
+
+
+def test_find_feature_files(tmp_path):
+    (tmp_path / "sub").mkdir()
+    first = write_feature(str(tmp_path), "first", "First")
+    second = write_feature(str(tmp_path / "sub"), "second", "Second")
+    (tmp_path / "notes.txt").write_text("not a feature")
+
+    assert_that(find_feature_files([str(tmp_path), first]), equal_to(sorted([first, second])),
+                "Feature files should be found in sub folders without duplicates")
+
+
+def test_shard_features_balances_durations():
+    durations = {"a.feature": 10, "b.feature": 7, "c.feature": 5, "d.feature": 4, "e.feature": 2}
+
+    shards = shard_features(sorted(durations), durations, 2)
+
+    assert_that(shards, equal_to([["a.feature", "d.feature"], ["b.feature", "c.feature", "e.feature"]]),
+                "The features should be shared so the workers take about the same time")
+
+
+def test_shard_features_unknown_durations_use_median():
+    durations = {"a.feature": 10, "b.feature": 1, "c.feature": 3}
+
+    shards = shard_features(["a.feature", "b.feature", "c.feature", "new.feature"], durations, 2)
+
+    assert_that(shards, equal_to([["a.feature"], ["c.feature", "new.feature", "b.feature"]]),
+                "A new feature should be assumed to take the median duration")
+
+
+def test_shard_features_more_workers_than_features():
+    shards = shard_features(["a.feature"], {}, 4)
+
+    assert_that(shards, equal_to([["a.feature"]]), "Workers with no features should not be started")
+
+
+def test_save_and_load_durations(tmp_path):
+    durations_file = str(tmp_path / "durations.json")
+    save_durations({"a.feature": 1, "b.feature": 2}, durations_file)
+
+    save_durations({"b.feature": 3}, durations_file)
+
+    assert_that(load_durations(durations_file), equal_to({"a.feature": 1, "b.feature": 3}),
+                "New durations should be saved and old ones kept")
+    assert_that(load_durations(str(tmp_path / "missing.json")), equal_to({}), "A missing file should be empty")
+
+
+def test_read_feature_durations(tmp_path):
+    (tmp_path / "steps").mkdir()
+    login = write_feature(str(tmp_path), "login", "Log in")
+    search = write_feature(str(tmp_path), "search", "Search")
+    write_junit_report(str(tmp_path / "worker-1"), login, "Log in", 12.5)
+    write_junit_report(str(tmp_path / "worker-2"), search, "Search", 3)
+
+    durations = read_feature_durations([str(tmp_path / "worker-1"), str(tmp_path / "worker-2")], [login, search])
+
+    assert_that(durations, equal_to({login: 12.5, search: 3}), "The duration of each feature should be read")
+
+
+def test_read_feature_durations_with_same_title(tmp_path):
+    (tmp_path / "steps").mkdir()
+    (tmp_path / "login").mkdir()
+    login = write_feature(str(tmp_path), "login", "Log in")
+    admin_login = write_feature(str(tmp_path / "login"), "admin", "Log in")
+    write_junit_report(str(tmp_path / "worker-1"), login, "Log in", 12.5)
+    write_junit_report(str(tmp_path / "worker-2"), admin_login, "Log in", 3, base_dir=str(tmp_path))
+
+    durations = read_feature_durations([str(tmp_path / "worker-1"), str(tmp_path / "worker-2")], [login, admin_login])
+
+    assert_that(durations, equal_to({login: 12.5, admin_login: 3}),
+                "Features with the same title should each have their own duration")
+
+
+def test_read_feature_durations_from_behave_report(tmp_path):
+    # A report written by behave 1.2.6 for "behave --junit features/login.feature features/login/admin.feature"
+    features_path = tmp_path / "features"
+    (features_path / "steps").mkdir(parents=True)
+    (features_path / "login").mkdir()
+    login = write_feature(str(features_path), "login", "Log in")
+    admin_login = write_feature(str(features_path / "login"), "admin", "Admin log in")
+    (tmp_path / "reports").mkdir()
+    (tmp_path / "reports" / "TESTS-login.xml").write_text(
+        '<testsuite name="login.Log in" tests="1" errors="0" failures="0" skipped="0" time="6.7e-05" '
+        'timestamp="2026-10-18T02:07:46.540742" hostname="vm"><testcase classname="login.Log in" name="works" '
+        'status="passed" time="6.7e-05"><system-out>\n<![CDATA[\n@scenario.begin\n  Scenario: works\n    Given '
+        'nothing ... passed in 0.000s\n\n@scenario.end\n]]>\n</system-out></testcase></testsuite>')
+    (tmp_path / "reports" / "TESTS-login.admin.xml").write_text(
+        '<testsuite name="login.admin.Admin log in" tests="1" errors="0" failures="0" skipped="0" time="6.4e-05" '
+        'timestamp="2026-10-18T02:07:46.541916" hostname="vm"><testcase classname="login.admin.Admin log in" '
+        'name="works" status="passed" time="6.4e-05"><system-out>\n<![CDATA[\n@scenario.begin\n  Scenario: works\n'
+        '    Given nothing ... passed in 0.000s\n\n@scenario.end\n]]>\n</system-out></testcase></testsuite>')
+
+    durations = read_feature_durations([str(tmp_path / "reports")], [login, admin_login])
+
+    assert_that(durations, equal_to({login: 6.7e-05, admin_login: 6.4e-05}),
+                "The durations should be read from the reports written by behave")
+
+
+def test_merge_junit_reports(tmp_path):
+    write_junit_report(str(tmp_path / "worker-1"), str(tmp_path / "login.feature"), "Log in", 12.5, failures=1)
+    write_junit_report(str(tmp_path / "worker-2"), str(tmp_path / "search.feature"), "Search", 3)
+    output_file = str(tmp_path / "merged" / "junit.xml")
+
+    merge_junit_reports([str(tmp_path / "worker-1"), str(tmp_path / "worker-2")], output_file)
+
+    merged = ElementTree.parse(output_file).getroot()
+    assert_that(len(merged.findall("testsuite")), equal_to(2), "Every test suite should be in the merged report")
+    assert_that((merged.get("tests"), merged.get("failures"), merged.get("time")), equal_to(("4", "1", "15.500000")),
+                "The totals should be added up")
+
+
+@mock.patch("subprocess.run")
+def test_run_shard(mock_run):
+    mock_run.return_value.returncode = 1
+
+    result = run_shard(3, ["a.feature", "b.feature"], ["--tags=@smoke"], "reports")
+
+    command = mock_run.call_args[0][0]
+    assert_that(result, equal_to((1, os.path.join("reports", "worker-3"))), "The exit code should be returned")
+    assert_that(command[1:], equal_to(["-m", "behave", "--junit", "--junit-directory",
+                                       os.path.join("reports", "worker-3"), "--tags=@smoke", "a.feature",
+                                       "b.feature"]), "Behave should be run with the worker's features")
+    assert_that(mock_run.call_args[1]["env"][WORKER_ID_VARIABLE], equal_to("3"), "The worker ID should be set")
+
+
+@mock.patch("subprocess.run")
+def test_run_shard_deletes_previous_reports(mock_run, tmp_path):
+    mock_run.return_value.returncode = 0
+    write_junit_report(str(tmp_path / "worker-1"), str(tmp_path / "removed.feature"), "Removed", 5)
+
+    _return_code, junit_directory = run_shard(1, ["a.feature"], [], str(tmp_path))
+
+    assert_that(os.path.exists(junit_directory), equal_to(False), "The reports from the previous run should be deleted")
+
+
+def test_run_in_parallel(tmp_path):
+    (tmp_path / "steps").mkdir()
+    features = [write_feature(str(tmp_path), name, name.title()) for name in ["login", "search", "basket"]]
+    reports_path = str(tmp_path / "reports")
+    durations_file = str(tmp_path / "durations.json")
+
+    def mock_run_shard(worker_id, feature_files, _behave_args, _reports_path):
+        junit_directory = os.path.join(reports_path, f"worker-{worker_id}")
+        for feature in feature_files:
+            write_junit_report(junit_directory, feature, os.path.basename(feature)[:-len(".feature")].title(), 2)
+        return worker_id - 1, junit_directory
+
+    with mock.patch("uitestcore.utilities.parallel_runner.run_shard", side_effect=mock_run_shard) as mock_run:
+        result = run_in_parallel([str(tmp_path)], 2, (), reports_path, durations_file)
+
+    assert_that(mock_run.call_count, equal_to(2), "There should have been 2 workers")
+    assert_that(result, equal_to(1), "The run should fail when any worker fails")
+    assert_that(ElementTree.parse(os.path.join(reports_path, "junit.xml")).getroot().get("tests"), equal_to("6"),
+                "The reports should have been merged")
+    assert_that(load_durations(durations_file), equal_to(dict.fromkeys(features, 2.0)),
+                "The feature durations should have been saved")
+
+
+@mock.patch("uitestcore.utilities.parallel_runner.run_in_parallel", return_value=0)
+def test_main(mock_run_in_parallel):
+    result = main(["features/login", "--workers", "3", "--", "--tags=@smoke", "--no-capture"])
+
+    assert_that(result, equal_to(0), "The result should be returned")
+    mock_run_in_parallel.assert_called_once_with(["features/login"], 3, ["--tags=@smoke", "--no-capture"], "reports",
+                                                 "feature_durations.json")
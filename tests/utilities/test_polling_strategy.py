@@ -0,0 +1,82 @@
+from itertools import islice
+from hamcrest import assert_that, calling, equal_to, raises
+from uitestcore.utilities.polling_strategy import DEFAULT_HISTORY_SIZE, ExponentialBackoffPolling, FixedPolling, \
+    LearnedPolling, PollingStrategy
+
+
+def test_fixed_polling_intervals():
+    polling = FixedPolling(0.5)
+
+    intervals = list(islice(polling.intervals("condition"), 3))
+
+    assert_that(intervals, equal_to([0.5, 0.5, 0.5]), "Fixed polling should always use the same interval")
+
+
+def test_exponential_backoff_polling_intervals():
+    polling = ExponentialBackoffPolling(floor=0.1, ceiling=0.5, factor=2)
+
+    intervals = list(islice(polling.intervals("condition"), 5))
+
+    assert_that(intervals, equal_to([0.1, 0.2, 0.4, 0.5, 0.5]),
+                "Intervals should double from the floor until they reach the ceiling")
+
+
+def test_learned_polling_intervals_without_history():
+    polling = LearnedPolling(floor=0.1, ceiling=0.5, factor=2)
+
+    intervals = list(islice(polling.intervals("condition"), 3))
+
+    assert_that(intervals, equal_to([0.1, 0.2, 0.4]), "Exponential backoff should be used when there is no history")
+
+
+def test_learned_polling_intervals_with_history():
+    polling = LearnedPolling(floor=0.1, ceiling=0.5, factor=2, lead_fraction=0.5)
+    polling.record("condition", 3, 2.0, True)
+    polling.record("condition", 4, 4.0, True)
+    polling.record("condition", 5, 6.0, True)
+    polling.record("condition", 20, 10.0, False)
+
+    intervals = list(islice(polling.intervals("condition"), 3))
+
+    assert_that(intervals, equal_to([2.0, 0.1, 0.2]),
+                "The first interval should be based on the median duration of the successful waits")
+
+
+def test_learned_polling_does_not_add_history_for_unknown_conditions():
+    polling = LearnedPolling()
+
+    list(islice(polling.intervals("condition"), 1))
+
+    assert_that(polling.summary(), equal_to({}), "Reading the schedule should not add to the history")
+
+
+def test_polling_summary():
+    polling = FixedPolling()
+    polling.record("condition_1", 2, 1.0, True)
+    polling.record("condition_1", 4, 3.0, False)
+    polling.record("condition_2", 1, 0.0, True)
+
+    summary = polling.summary()
+
+    assert_that(summary["condition_1"], equal_to({"waits": 2, "timeouts": 1, "mean_polls": 3, "mean_duration": 2.0}),
+                "Incorrect summary for condition_1")
+    assert_that(summary["condition_2"], equal_to({"waits": 1, "timeouts": 0, "mean_polls": 1, "mean_duration": 0.0}),
+                "Incorrect summary for condition_2")
+
+
+def test_polling_strategy_must_provide_intervals():
+    assert_that(calling(PollingStrategy), raises(TypeError), "A strategy without intervals should not be created")
+
+
+def test_history_keeps_most_recent_waits():
+    class ShortHistoryPolling(LearnedPolling):
+        history_size = 2
+
+    polling = ShortHistoryPolling()
+    for duration in (1.0, 2.0, 3.0):
+        polling.record("condition", 1, duration, True)
+
+    assert_that(list(polling.history["condition"]), equal_to([(1, 2.0, True), (1, 3.0, True)]),
+                "Only the most recent waits should be kept")
+    assert_that(LearnedPolling().history["condition"].maxlen, equal_to(DEFAULT_HISTORY_SIZE),
+                "The history should be limited by default")
@@ -0,0 +1,197 @@
+import email.utils
+import io
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from unittest import mock
+from unittest.mock import MagicMock
+
+import requests
+from hamcrest import assert_that, equal_to, calling, raises, greater_than_or_equal_to
+from tests.utilities.azure_stub_server import AzureStubServer
+from urllib3.exceptions import MaxRetryError, NewConnectionError, ProtocolError
+from uitestcore.utilities.request_executor import DEFAULT_TIMEOUT, OrganisationLimiter, RequestExecutor, \
+    get_rate_limit_wait, is_connect_failure, organisation_limiter
+
+RESULTS = {1: [{"id": 1, "outcome": "Failed", "testCase": {"name": "test1"}}]}
+
+
+@mock.patch("builtins.print")
+def test_request_retries_until_success(_mock_print):
+    with AzureStubServer(runs=RESULTS, faults=[(503, {}), (500, {})]) as server, \
+            RequestExecutor(backoff_factor=0.01) as executor:
+        response = executor.get(server.url + "/1/results")
+
+    assert_that(response.status_code, equal_to(200), "The request should have succeeded after retrying")
+    assert_that(len(server.faulted_requests), equal_to(2), "The request should have been retried twice")
+
+
+@mock.patch("builtins.print")
+def test_request_waits_for_retry_after(_mock_print):
+    with AzureStubServer(runs=RESULTS, faults=[(429, {"Retry-After": "0.2"})]) as server, \
+            RequestExecutor(backoff_factor=0) as executor:
+        start = time.perf_counter()
+        response = executor.get(server.url + "/1/results")
+        duration = time.perf_counter() - start
+
+    assert_that(response.status_code, equal_to(200), "The request should have succeeded after waiting")
+    assert_that(duration, greater_than_or_equal_to(0.2), "The time given by Retry-After should have been waited")
+
+
+@mock.patch("builtins.print")
+def test_request_gives_up_after_max_retries(_mock_print):
+    with AzureStubServer(runs=RESULTS, faults=[(503, {})] * 3) as server, \
+            RequestExecutor(max_retries=2, backoff_factor=0) as executor:
+        response = executor.get(server.url + "/1/results")
+
+    assert_that(response.status_code, equal_to(503), "The last response should be returned")
+    assert_that(len(server.faulted_requests), equal_to(3), "The request should have been sent 3 times")
+
+
+def test_request_does_not_retry_client_errors():
+    with AzureStubServer(runs=RESULTS, faults=[(400, {})]) as server, RequestExecutor() as executor:
+        response = executor.get(server.url + "/1/results")
+
+    assert_that(response.status_code, equal_to(400), "The error should be returned")
+    assert_that(len(server.faulted_requests) + len(server.requests), equal_to(1), "The request should not be retried")
+
+
+@mock.patch("builtins.print")
+def test_request_raises_connection_error_after_retries(_mock_print):
+    session = MagicMock(name="session")
+    session.get.side_effect = requests.ConnectionError("connection refused")
+    executor = RequestExecutor(session, max_retries=2, backoff_factor=0)
+
+    assert_that(calling(executor.get).with_args("https://dev.azure.com/org/project/_apis/test/runs"),
+                raises(requests.ConnectionError), "The connection error should be raised")
+    assert_that(session.get.call_count, equal_to(3), "The request should have been sent 3 times")
+
+
+@mock.patch("builtins.print")
+def test_post_creates_body_for_each_attempt(_mock_print):
+    bodies = []
+
+    def make_data():
+        bodies.append(io.BytesIO(b'{"fileName": "test.png"}'))
+        return bodies[-1]
+
+    with AzureStubServer(faults=[(503, {"Retry-After": "0"})]) as server, RequestExecutor() as executor:
+        response = executor.post(server.url + "/1/Results/1/attachments", make_data=make_data)
+
+    assert_that(response.status_code, equal_to(200), "The request should have succeeded after retrying")
+    assert_that(len(bodies), equal_to(2), "A new body should have been made for the retry")
+    assert_that(all(body.closed for body in bodies), equal_to(True), "Each body should have been closed")
+    assert_that(server.requests, equal_to([("POST", "/org/project/_apis/test/runs/1/Results/1/attachments",
+                                            {"fileName": "test.png"})]), "The body should have been sent")
+
+
+def test_post_is_not_retried_when_azure_may_have_acted_on_it():
+    with AzureStubServer(faults=[(500, {}), (502, {})]) as server, RequestExecutor(backoff_factor=0) as executor:
+        response = executor.post(server.url + "/1/Results/1/attachments", data=b'{"fileName": "test.png"}')
+
+    assert_that(response.status_code, equal_to(500), "The error should be returned")
+    assert_that(len(server.faulted_requests), equal_to(1), "The request should not be retried")
+
+
+@mock.patch("time.sleep")
+@mock.patch("builtins.print")
+def test_post_is_only_retried_when_connection_could_not_be_made(_mock_print, _mock_sleep):
+    refused = requests.ConnectionError(MaxRetryError(None, "/", NewConnectionError(None, "connection refused")))
+    aborted = requests.ConnectionError(ProtocolError("Connection aborted.", ConnectionResetError()))
+    session = MagicMock(name="session")
+    session.post.side_effect = [refused, requests.ConnectTimeout("connect timeout"), aborted]
+    executor = RequestExecutor(session, max_retries=5)
+
+    assert_that(calling(executor.post).with_args("https://dev.azure.com/org/project/_apis/test/runs", data=b""),
+                raises(requests.ConnectionError, "Connection aborted"), "The error after sending should be raised")
+    assert_that(session.post.call_count, equal_to(3), "Only failures to connect should have been retried")
+
+
+def test_is_connect_failure():
+    assert_that(is_connect_failure(requests.ConnectTimeout("connect timeout")), equal_to(True))
+    assert_that(is_connect_failure(requests.ConnectionError(
+        MaxRetryError(None, "/", NewConnectionError(None, "connection refused")))), equal_to(True))
+    assert_that(is_connect_failure(requests.ReadTimeout("read timeout")), equal_to(False))
+    assert_that(is_connect_failure(requests.ConnectionError(ProtocolError("Connection aborted."))), equal_to(False))
+
+
+def test_requests_in_flight_are_limited_for_each_organisation():
+    with AzureStubServer(delay=0.02, runs=RESULTS) as server, RequestExecutor(max_concurrent=2) as executor, \
+            ThreadPoolExecutor(max_workers=8) as thread_pool:
+        responses = list(thread_pool.map(lambda _: executor.get(server.url + "/1/results"), range(16)))
+
+    assert_that([response.status_code for response in responses], equal_to([200] * 16), "Every request should succeed")
+    assert_that(server.max_in_flight, equal_to(2), "Only 2 requests should have been in flight at once")
+
+
+def test_limiter_holds_back_requests_when_paused():
+    limiter = OrganisationLimiter(1)
+    limiter.pause(0.1)
+
+    start = time.perf_counter()
+    with limiter:
+        duration = time.perf_counter() - start
+
+    assert_that(duration, greater_than_or_equal_to(0.1), "The request should have been held back")
+
+
+def test_organisation_limiter_is_shared_by_projects():
+    first = organisation_limiter("https://dev.azure.com/limiter-org/project-1/_apis/test/runs")
+    second = organisation_limiter("https://dev.azure.com/limiter-org/project-2/_apis/test/runs/1/results")
+    other = organisation_limiter("https://dev.azure.com/other-limiter-org/project-1/_apis/test/runs")
+
+    assert_that(first is second, equal_to(True), "Projects in an organisation should share a limiter")
+    assert_that(first is other, equal_to(False), "Each organisation should have its own limiter")
+
+
+def test_organisation_limiter_for_each_limit():
+    default = organisation_limiter("https://dev.azure.com/limit-org/project/_apis/test/runs")
+    limited = organisation_limiter("https://dev.azure.com/limit-org/project/_apis/test/runs", max_concurrent=2)
+
+    assert_that(default is limited, equal_to(False), "A different limit should get its own limiter")
+    assert_that(limited.semaphore._initial_value, equal_to(2), "The limiter should allow the requested requests")
+
+
+def test_get_rate_limit_wait_retry_after_seconds():
+    response = SimpleNamespace(headers={"Retry-After": "3"})
+
+    assert_that(get_rate_limit_wait(response), equal_to(3), "The Retry-After seconds should be used")
+
+
+def test_get_rate_limit_wait_retry_after_date():
+    response = SimpleNamespace(headers={"Retry-After": email.utils.formatdate(time.time() + 30, usegmt=True)})
+
+    assert_that(28 < get_rate_limit_wait(response) <= 30, equal_to(True), "The wait until the date should be used")
+
+
+def test_get_rate_limit_wait_no_requests_remaining():
+    reset = str(int(time.time()) + 10)
+
+    no_requests_remaining = SimpleNamespace(headers={"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": reset})
+    requests_remaining = SimpleNamespace(headers={"X-RateLimit-Remaining": "5", "X-RateLimit-Reset": reset})
+
+    assert_that(8 < get_rate_limit_wait(no_requests_remaining) <= 10, equal_to(True),
+                "The wait until the rate limit resets should be used")
+    assert_that(get_rate_limit_wait(requests_remaining), equal_to(0), "There should be no wait when within the limit")
+    assert_that(get_rate_limit_wait(SimpleNamespace(headers={})), equal_to(0), "There should be no wait by default")
+
+
+def test_get_rate_limit_wait_malformed_header():
+    response = SimpleNamespace(headers={"X-RateLimit-Remaining": "none", "X-RateLimit-Reset": "soon"})
+
+    assert_that(get_rate_limit_wait(response), equal_to(0), "A malformed header should be ignored")
+
+
+@mock.patch("time.sleep")
+@mock.patch("builtins.print")
+def test_request_times_out_and_retries(_mock_print, _mock_sleep):
+    session = MagicMock(name="session")
+    session.get.side_effect = [requests.ReadTimeout("read timeout"), SimpleNamespace(status_code=200, headers={})]
+
+    with RequestExecutor(session) as executor:
+        response = executor.get("https://dev.azure.com/organisation/project/_apis/test/runs")
+
+    assert_that(response.status_code, equal_to(200), "The request should have succeeded after timing out")
+    assert_that([call.kwargs["timeout"] for call in session.get.call_args_list], equal_to([DEFAULT_TIMEOUT] * 2),
+                "The default timeout should be used for each attempt")
+    session.close.assert_not_called()
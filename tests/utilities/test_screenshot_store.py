@@ -0,0 +1,54 @@
+import os
+from unittest import mock
+
+from hamcrest import assert_that, equal_to
+from uitestcore.utilities.screenshot_store import STORE_FOLDER, ScreenshotStore, file_digest
+
+
+def write_file(path, contents):
+    with open(path, "wb") as file:
+        file.write(contents)
+    return str(path)
+
+
+def test_add_links_new_screenshot_into_store(tmp_path):
+    screenshot = write_file(tmp_path / "first.png", b"image")
+
+    digest = ScreenshotStore(str(tmp_path)).add(screenshot)
+
+    stored_file_name = os.path.join(str(tmp_path), STORE_FOLDER, digest + ".png")
+    assert_that(digest, equal_to(file_digest(screenshot)), "The SHA-256 hash should be returned")
+    assert_that(os.path.samefile(screenshot, stored_file_name), equal_to(True),
+                "The screenshot should have been linked into the store")
+
+
+def test_add_links_identical_screenshots(tmp_path):
+    store = ScreenshotStore(str(tmp_path))
+    first = write_file(tmp_path / "first.png", b"image")
+    second = write_file(tmp_path / "second.png", b"image")
+    different = write_file(tmp_path / "different.png", b"other image")
+
+    store.add(first)
+    store.add(second)
+    store.add(different)
+
+    assert_that(os.path.samefile(first, second), equal_to(True), "Identical screenshots should share one file")
+    assert_that(os.path.samefile(first, different), equal_to(False), "Different screenshots should not be linked")
+    assert_that(len(os.listdir(os.path.join(str(tmp_path), STORE_FOLDER))), equal_to(2),
+                "Each unique screenshot should be stored once")
+    with open(second, "rb") as file:
+        assert_that(file.read(), equal_to(b"image"), "The screenshot contents should not change")
+
+
+def test_add_copies_when_links_are_not_supported(tmp_path):
+    screenshot = write_file(tmp_path / "first.png", b"image")
+
+    with mock.patch("os.link", side_effect=OSError("links not supported")):
+        digest = ScreenshotStore(str(tmp_path)).add(screenshot)
+        duplicate = write_file(tmp_path / "second.png", b"image")
+        ScreenshotStore(str(tmp_path)).add(duplicate)
+
+    stored_file_name = os.path.join(str(tmp_path), STORE_FOLDER, digest + ".png")
+    assert_that(os.path.samefile(screenshot, stored_file_name), equal_to(False), "The screenshot should be copied")
+    assert_that(os.path.exists(duplicate), equal_to(True), "The duplicate should be left in place")
+    assert_that(os.path.exists(duplicate + ".link"), equal_to(False), "No temporary file should be left behind")
@@ -0,0 +1,133 @@
+import json
+import logging
+import threading
+
+import pytest
+from hamcrest import assert_that, equal_to, contains_string
+from uitestcore.utilities import timing_spans
+from uitestcore.utilities.logger_handler import auto_log
+from uitestcore.utilities.timing_spans import SpanRecorder, record_span, start_span_recording, stop_span_recording
+
+test_class_name = "test_class"
+
+
+@auto_log(test_class_name)
+def inner_method():
+    return "inner"
+
+
+@auto_log(test_class_name)
+def outer_method(throw_exception=False):
+    if throw_exception:
+        raise ValueError("Throwing value exception as part of test")
+    return inner_method()
+
+
+@pytest.fixture
+def recorder():
+    yield start_span_recording()
+    stop_span_recording()
+
+
+def test_spans_not_recorded_by_default():
+    assert_that(timing_spans.active_recorder, equal_to(None), "Spans should not be recorded unless started")
+
+
+def test_spans_are_nested(recorder):
+    outer_method()
+
+    inner, outer = recorder.spans
+    assert_that(inner.name, equal_to("inner_method"), "The inner call should finish first")
+    assert_that(outer.name, equal_to("outer_method"), "The outer call should finish last")
+    assert_that(inner.parent_id, equal_to(outer.span_id), "The inner span should be a child of the outer span")
+    assert_that(outer.parent_id, equal_to(None), "The outer span should not have a parent")
+    assert_that(inner.category, equal_to(test_class_name), "The logger name should be used as the category")
+    assert_that(outer.duration_ns >= inner.duration_ns, equal_to(True),
+                "The outer span should be at least as long as the inner span")
+
+
+def test_spans_recorded_when_exception_thrown(recorder):
+    with pytest.raises(ValueError):
+        outer_method(throw_exception=True)
+
+    outer_method()
+
+    assert_that([span.parent_id for span in recorder.spans], equal_to([None, 2, None]),
+                "The span should be closed when an exception is thrown so the next call is not its child")
+
+
+def test_spans_on_other_threads_have_their_own_parents(recorder):
+    recorder.start("main", test_class_name)
+    thread = threading.Thread(target=inner_method)
+    thread.start()
+    thread.join()
+
+    assert_that(recorder.spans[0].parent_id, equal_to(None),
+                "A span on another thread should not be a child of a span on the main thread")
+
+
+def test_ring_buffer_keeps_latest_spans():
+    recorder = SpanRecorder(capacity=2)
+
+    for name in ["first", "second", "third"]:
+        recorder.finish(recorder.start(name, test_class_name))
+
+    assert_that([span.name for span in recorder.spans], equal_to(["second", "third"]),
+                "Only the most recent spans should be kept")
+
+
+def test_summary_self_time():
+    recorder = SpanRecorder()
+    recorder.spans.extend([
+        timing_spans.Span(2, 1, "inner", test_class_name, 100, 3000000000, 1),
+        timing_spans.Span(1, None, "outer", test_class_name, 0, 4000000000, 1)
+    ])
+
+    summary = recorder.summary()
+
+    assert_that(list(summary), equal_to(["inner", "outer"]), "The span with the most self time should be first")
+    assert_that(summary["outer"], equal_to({"calls": 1, "total_time": 4, "self_time": 1}),
+                "The time spent in child spans should not be counted as self time")
+
+
+def test_export_chrome_trace(recorder, tmp_path):
+    outer_method()
+
+    file_name = recorder.export_chrome_trace("my scenario: 1", folder=str(tmp_path))
+
+    assert_that(file_name, contains_string("my_scenario_1.json"), "The description should be used as the file name")
+    with open(file_name, encoding="utf-8") as trace_file:
+        events = json.load(trace_file)["traceEvents"]
+    assert_that([event["name"] for event in events], equal_to(["outer_method", "inner_method"]),
+                "The events should be in start order")
+    assert_that(events[0]["ph"], equal_to("X"), "Each span should be a complete event")
+    assert_that(events[1]["args"]["parent_id"], equal_to(events[0]["args"]["span_id"]),
+                "The parent of each span should be included")
+
+
+def test_stop_span_recording():
+    recorder = start_span_recording()
+
+    assert_that(stop_span_recording(), equal_to(recorder), "The recorder should be returned when stopping")
+    outer_method()
+    assert_that(len(recorder.spans), equal_to(0), "Spans should not be recorded after stopping")
+
+
+@record_span(test_class_name)
+def secret_method(access_token):
+    return inner_method()
+
+
+def test_record_span(recorder):
+    secret_method("SECRET-PAT-TOKEN")
+
+    inner, outer = recorder.spans
+    assert_that(outer.name, equal_to("secret_method"), "A span should be recorded for the decorated function")
+    assert_that(inner.parent_id, equal_to(outer.span_id), "Spans inside the function should be its children")
+
+
+def test_record_span_does_not_log_arguments(caplog):
+    with caplog.at_level(logging.DEBUG):
+        secret_method("SECRET-PAT-TOKEN")
+
+    assert_that("SECRET-PAT-TOKEN" in caplog.text, equal_to(False), "The arguments should not be logged")
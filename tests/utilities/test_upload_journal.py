@@ -0,0 +1,51 @@
+from unittest import mock
+
+from hamcrest import assert_that, equal_to
+from uitestcore.utilities.upload_journal import UploadJournal
+
+
+def test_journal_records_uploads(tmp_path):
+    journal = UploadJournal(str(tmp_path / "journal.jsonl"))
+
+    journal.record_started(10, 100, "abc", "screenshot.png")
+    started = journal.is_started(10, 100, "abc"), journal.is_completed(10, 100, "abc")
+    journal.record_completed(10, 100, "abc", "screenshot.png")
+
+    assert_that(started, equal_to((True, False)), "The upload should be started but not completed")
+    assert_that((journal.is_started(10, 100, "abc"), journal.is_completed(10, 100, "abc")), equal_to((False, True)),
+                "The upload should be completed")
+    assert_that(journal.is_completed(10, 101, "abc"), equal_to(False), "Other test results should not be completed")
+
+
+def test_journal_is_read_when_created(tmp_path):
+    journal_file = str(tmp_path / "journal.jsonl")
+    first_run = UploadJournal(journal_file)
+    first_run.record_started(10, 100, "abc", "first.png")
+    first_run.record_completed(10, 100, "abc", "first.png")
+    first_run.record_started(10, 100, "def", "second.png")
+
+    second_run = UploadJournal(journal_file)
+
+    assert_that(second_run.is_completed(10, 100, "abc"), equal_to(True), "The completed upload should be read")
+    assert_that(second_run.is_started(10, 100, "def"), equal_to(True), "The unfinished upload should be read")
+
+
+def test_journal_ignores_partly_written_entry(tmp_path):
+    journal_file = tmp_path / "journal.jsonl"
+    journal_file.write_text('{"state": "completed", "run_id": 10, "result_id": 100, "digest": "abc", '
+                            '"file_name": "first.png"}\n{"state": "completed", "run_id": 10, "resu')
+
+    journal = UploadJournal(str(journal_file))
+
+    assert_that(journal.is_completed(10, 100, "abc"), equal_to(True), "The complete entry should be read")
+
+
+@mock.patch("builtins.print")
+def test_journal_warns_when_it_cannot_be_written(mock_print, tmp_path):
+    journal = UploadJournal(str(tmp_path / "missing-folder" / "journal.jsonl"))
+
+    journal.record_completed(10, 100, "abc", "screenshot.png")
+
+    assert_that(journal.is_completed(10, 100, "abc"), equal_to(True), "The upload should still be recorded in memory")
+    assert_that(mock_print.call_args[0][0].startswith("##vso[task.logissue type=warning]Could not write to upload "
+                                                      "journal"), equal_to(True), "A warning should be printed")
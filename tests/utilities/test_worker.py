@@ -0,0 +1,16 @@
+import os
+from unittest import mock
+
+from hamcrest import assert_that, equal_to
+from uitestcore.utilities.worker import WORKER_ID_VARIABLE, worker_path
+
+
+def test_worker_path_not_parallel():
+    with mock.patch.dict(os.environ, clear=True):
+        assert_that(worker_path("screenshots"), equal_to("screenshots"), "The path should not be changed")
+
+
+def test_worker_path_in_worker():
+    with mock.patch.dict(os.environ, {WORKER_ID_VARIABLE: "2"}):
+        assert_that(worker_path("screenshots"), equal_to(os.path.join("screenshots", "worker-2")),
+                    "Each worker should have its own folder")
@@ -4,6 +4,8 @@ See these links for more details:
     https://selenium-python.readthedocs.io/api.html#module-selenium.webdriver.support.expected_conditions
     http://www.teachmeselenium.com/2018/04/07/python-selenium-waits-writing-own-custom-wait-conditions/
 """
+from uitestcore.utilities.browser_scripts import CHECK_CONDITION_GROUPS_SCRIPT, DOCUMENT_STATE_SCRIPT, \
+    NETWORK_IDLE_SCRIPT
 
 
 class BrowserIsReady:
@@ -19,6 +21,42 @@ class BrowserIsReady:
         return driver.execute_script("return document.readyState") == "complete"
 
 
+class NewPageIsReady:
+    """
+    This condition checks the browser has moved on from a previous page and the new page's ready state is 'complete'
+    Avoids the false positive of the previous page still being 'complete' without needing an initial wait
+    """
+
+    def __init__(self, previous_document):
+        """
+        :param previous_document: the (identity, url) of the page before navigating, from Waiter.get_document_identity
+        """
+        self.previous_identity, self.previous_url = previous_document
+
+    def __call__(self, driver):
+        identity, ready_state, url = driver.execute_script(DOCUMENT_STATE_SCRIPT)
+        if ready_state != "complete":
+            return False
+        # A new document has loaded, or the same document has navigated e.g. to a different #fragment
+        return identity != self.previous_identity or url != self.previous_url
+
+
+class NetworkIsIdle:
+    """
+    This condition uses JavaScript to check there have been no fetch/XHR requests in flight, resources loading or
+    animations running for a quiet period e.g. to wait for a single page app to finish loading its data
+    """
+
+    def __init__(self, quiet_period_ms=500):
+        """
+        :param quiet_period_ms: how long the page must have been inactive for, in milliseconds
+        """
+        self.quiet_period_ms = quiet_period_ms
+
+    def __call__(self, driver):
+        return driver.execute_script(NETWORK_IDLE_SCRIPT, self.quiet_period_ms) is True
+
+
 class ElementHasAttribute:
     """
     This condition checks if an element has a specific attribute e.g. to check if an animation has finished
@@ -35,3 +73,56 @@ class ElementHasAttribute:
             attribute_value = elements[0].get_attribute(self.attribute_name)
             return attribute_value == self.expected_attribute_value
         return False
+
+
+class ElementCondition:
+    """
+    This condition checks the first element matching a PageElement is present, visible or has an attribute value
+    The check is done in the browser, so several of these can be checked together with one script call using
+    check_condition_groups e.g. by Waiter.for_all and Waiter.for_any
+    """
+
+    def __init__(self, condition, page_element, *args):
+        """
+        Use the visible, present and has_attribute methods rather than calling this directly
+        :param condition: the name of the condition - "present", "visible" or "attribute"
+        :param page_element: PageElement instance representing the element
+        :param args: the attribute name and expected value for the "attribute" condition
+        """
+        self.condition = condition
+        self.page_element = page_element
+        self.args = list(args)
+
+    @classmethod
+    def visible(cls, page_element):
+        return cls("visible", page_element)
+
+    @classmethod
+    def present(cls, page_element):
+        return cls("present", page_element)
+
+    @classmethod
+    def has_attribute(cls, page_element, attribute_name, expected_attribute_value):
+        return cls("attribute", page_element, attribute_name, expected_attribute_value)
+
+    def script_argument(self):
+        return [self.condition, self.page_element.locator_type, self.page_element.locator_value, self.args]
+
+    def __call__(self, driver):
+        return check_condition_groups(driver, [[self]])[0]
+
+    def __str__(self):
+        if self.args:
+            return f"{self.page_element} {self.condition} {'='.join(str(arg) for arg in self.args)}"
+        return f"{self.page_element} {self.condition}"
+
+
+def check_condition_groups(driver, groups):
+    """
+    Check groups of ElementConditions with a single script call
+    :param driver: the Selenium web driver
+    :param groups: list of lists of ElementCondition instances
+    :return: list with one boolean per group, True if every condition in the group holds
+    """
+    return driver.execute_script(CHECK_CONDITION_GROUPS_SCRIPT,
+                                 [[condition.script_argument() for condition in group] for group in groups])
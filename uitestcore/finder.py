@@ -1,5 +1,7 @@
 import logging
 
+from uitestcore.utilities.browser_scripts import DOM_GENERATION_SCRIPT, FIND_ELEMENTS_MANY_SCRIPT, \
+    VISIBLE_ELEMENTS_SCRIPT
 from uitestcore.utilities.logger_handler import auto_log
 
 
@@ -9,14 +11,24 @@ class Finder:
     Use this class to first find an element(s) before interacting with it
     """
 
-    def __init__(self, driver, existing_logger=None):
+    def __init__(self, driver, existing_logger=None, cache_elements=False):
         """
         Default constructor which passes the control of webDriver to the current page
         :param driver: the Selenium web driver
         :param existing_logger: logger object used to save information to a log file
+        :param cache_elements: if True, elements found by elements() are reused until the page changes (default False)
+            The cache is trusted until page_may_have_changed or context_changed is called - the Interactor calls these
+            after every action, navigation and window or frame switch, and the Waiter before every poll. The next find
+            then checks a DOM generation counter in the page, and the cache is cleared if the page has changed
         """
         self.driver = driver
         self.logger = existing_logger or logging.getLogger(__name__)
+        self.cache_elements = cache_elements
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._cache = {}
+        # The DOM generation the cached elements were found at, and whether it can be trusted without checking the page
+        self._cache_generation = (None, False)
 
     @auto_log(__name__)
     def elements(self, page_element):
@@ -25,11 +37,89 @@ class Finder:
         :param page_element: PageElement instance representing the element
         :return: list of matching WebElements
         """
+        if self.cache_elements:
+            return self._cached_elements(page_element)
+
+        self.logger.info(f"Looking for elements matching {page_element}")
+        elements = self.driver.find_elements(page_element.locator_type, page_element.locator_value)
+        self.logger.info(f"Found {len(elements)} element(s)")
+        return elements
+
+    def _cached_elements(self, page_element):
+        """
+        Find the elements matching the given page element object, reusing them from the cache if the page is unchanged
+        The DOM generation is only read on the first find after page_may_have_changed is called, so repeated finds
+        between actions do not go back to the browser. It is read before finding the elements, so a change made while
+        they are being found means they are found again after the next action
+        Empty results are not cached so that waiting for an element to appear still works
+        :param page_element: PageElement instance representing the element
+        :return: list of matching WebElements
+        """
+        locator = (page_element.locator_type, page_element.locator_value)
+        generation, trusted = self._cache_generation
+        if not trusted:
+            current_generation = self.driver.execute_script(DOM_GENERATION_SCRIPT, self._cache.get(locator, []))
+            if current_generation is None or current_generation != generation:
+                self._cache = {}
+            # If the generation could not be read, read it again next time rather than caching without one
+            generation = current_generation
+            self._cache_generation = (generation, generation is not None)
+
+        if locator in self._cache:
+            self.cache_hits += 1
+            self.logger.info(f"Reusing {len(self._cache[locator])} cached element(s) matching {page_element}")
+            return list(self._cache[locator])
+
+        self.cache_misses += 1
         self.logger.info(f"Looking for elements matching {page_element}")
         elements = self.driver.find_elements(page_element.locator_type, page_element.locator_value)
         self.logger.info(f"Found {len(elements)} element(s)")
+        if elements and generation is not None:
+            self._cache[locator] = list(elements)
         return elements
 
+    def page_may_have_changed(self):
+        """
+        Check the cached elements against the page on the next find - call this after anything which may change the
+        page without going through the Interactor e.g. clicking a WebElement directly
+        """
+        self._cache_generation = (self._cache_generation[0], False)
+
+    def context_changed(self):
+        """
+        Remove all elements from the cache without resetting the hit/miss counters - call this after navigating or
+        switching window or frame, as the cached elements belong to the previous document
+        """
+        self._cache = {}
+        self._cache_generation = (None, False)
+
+    def clear_cache(self):
+        """
+        Remove all elements from the cache and reset the hit/miss counters
+        """
+        self.context_changed()
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    @auto_log(__name__)
+    def elements_many(self, page_elements):
+        """
+        Find the elements matching each of the given page element objects using a single script call, rather than
+        one find_elements call per page element
+        Unlike elements(), this does not use the driver's implicit wait - the elements are found straight away, and a
+        page element which matches nothing yet gives an empty list rather than waiting for a match to appear
+        :param page_elements: list of PageElement instances representing the elements
+        :return: dict mapping each PageElement to its list of matching WebElements
+        """
+        page_elements = list(page_elements)
+        if not page_elements:
+            return {}
+
+        self.logger.info(f"Looking for elements matching {len(page_elements)} page element(s) in one call")
+        locators = [[page_element.locator_type, page_element.locator_value] for page_element in page_elements]
+        results = self.driver.execute_script(FIND_ELEMENTS_MANY_SCRIPT, locators)
+        return dict(zip(page_elements, results))
+
     @auto_log(__name__)
     def element(self, page_element):
         """
@@ -44,13 +134,18 @@ class Finder:
             return None
 
     @auto_log(__name__)
-    def visible_elements(self, page_element):
+    def visible_elements(self, page_element, in_browser=False):
         """
         Find the elements matching the given page element object, only returning the visible ones
         :param page_element: PageElement instance representing the element
+        :param in_browser: if True, the visibility and aria-hidden checks are done by a single script in the browser
+            instead of two calls per element (default False)
         :return: list of matching WebElements which are visible
         """
         elements = self.driver.find_elements(page_element.locator_type, page_element.locator_value)
+        if in_browser:
+            return self.visible_in_browser(elements)
+
         visible_elements = []
 
         for element in elements:
@@ -59,6 +154,17 @@ class Finder:
 
         return visible_elements
 
+    @auto_log(__name__)
+    def visible_in_browser(self, elements):
+        """
+        Filter a list of elements down to the visible ones with a single script call, rather than two calls per element
+        :param elements: list of WebElements
+        :return: list of the WebElements which are displayed and not aria-hidden
+        """
+        if not elements:
+            return []
+        return self.driver.execute_script(VISIBLE_ELEMENTS_SCRIPT, elements)
+
     @auto_log(__name__)
     def number_of_elements(self, page_element):
         """
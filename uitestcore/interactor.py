@@ -1,7 +1,9 @@
 import logging
+from urllib.parse import urldefrag
 from selenium.webdriver.remote.webelement import WebElement
 from selenium.webdriver.support.select import Select
 
+from uitestcore.finder import Finder
 from uitestcore.utilities.logger_handler import auto_log
 
 
@@ -33,6 +35,7 @@ class Interactor:
         :param page_element: PageElement instance representing the element
         """
         self.find.element(page_element).click()
+        self._page_may_have_changed()
 
     @auto_log(__name__)
     def execute_click_with_java_script(self, page_element):
@@ -42,7 +45,9 @@ class Interactor:
         :return: element clicked
         """
         element: WebElement = self.find.element(page_element)
-        return self.driver.execute_script("arguments[0].click();", element)
+        result = self.driver.execute_script("arguments[0].click();", element)
+        self._page_may_have_changed()
+        return result
 
     @auto_log(__name__)
     def select_by_visible_text(self, page_element, visible_text_to_select):
@@ -53,6 +58,7 @@ class Interactor:
         """
         element: WebElement = self.find.element(page_element)
         Select(element).select_by_visible_text(visible_text_to_select)
+        self._page_may_have_changed()
 
     @auto_log(__name__)
     def select_by_value(self, page_element, value):
@@ -63,6 +69,7 @@ class Interactor:
         """
         element: WebElement = self.find.element(page_element)
         Select(element).select_by_value(value)
+        self._page_may_have_changed()
 
     @auto_log(__name__)
     def select_by_index(self, page_element, index):
@@ -74,6 +81,7 @@ class Interactor:
         """
         element: WebElement = self.find.element(page_element)
         Select(element).select_by_index(index)
+        self._page_may_have_changed()
 
     @auto_log(__name__)
     def enter_text(self, page_element, field_input, clear_first=True):
@@ -87,6 +95,7 @@ class Interactor:
         if clear_first:
             element.clear()
         element.send_keys(field_input)
+        self._page_may_have_changed()
 
     @auto_log(__name__)
     def send_keys(self, page_element, key):
@@ -104,8 +113,14 @@ class Interactor:
         :param url:
         :return: None
         """
+        previous_document = self.wait.get_document_identity()
+        if previous_document is not None and urldefrag(previous_document[1]).url == urldefrag(url).url:
+            # Moving to the same URL or another #fragment may not load a new document, so NewPageIsReady could
+            # never be met - wait for the page to be ready in the usual way instead
+            previous_document = None
         self.driver.get(url)
-        self.wait.for_page_to_load()
+        self._page_may_have_changed(context_changed=True)
+        self.wait.for_page_to_load(previous_document)
         self.logger.info("Navigated to the URL - %s", url)
 
     @auto_log(__name__)
@@ -130,6 +145,7 @@ class Interactor:
         self.driver.close()
         if remaining_windows:
             self.driver.switch_to.window(remaining_windows[len(remaining_windows)-1])
+        self._page_may_have_changed(context_changed=True)
 
     @auto_log(__name__)
     def scroll_into_view(self, page_element):
@@ -141,6 +157,7 @@ class Interactor:
         self.logger.info("Scrolling to %s", page_element)
         element: WebElement = self.find.element(page_element)
         self.driver.execute_script("arguments[0].scrollIntoView();", element)
+        self._page_may_have_changed()
 
     @auto_log(__name__)
     def switch_to_next_window(self):
@@ -151,6 +168,7 @@ class Interactor:
         new_window = self.driver.window_handles[len(self.driver.window_handles) - 1]
         self.logger.info("Switching to next window")
         self.driver.switch_to.window(new_window)
+        self._page_may_have_changed(context_changed=True)
         self.logger.info("Switched to next window")
 
     @auto_log(__name__)
@@ -161,6 +179,7 @@ class Interactor:
         """
         old_window = self.driver.window_handles[0]
         self.driver.switch_to.window(old_window)
+        self._page_may_have_changed(context_changed=True)
 
     @auto_log(__name__)
     def switch_to_frame(self, page_element):
@@ -170,6 +189,7 @@ class Interactor:
         :return: None
         """
         self.driver.switch_to.frame(self.find.element(page_element))
+        self._page_may_have_changed(context_changed=True)
 
     @auto_log(__name__)
     def accept_alert(self):
@@ -178,6 +198,7 @@ class Interactor:
         :return:
         """
         self.driver.switch_to.alert.accept()
+        self._page_may_have_changed()
 
     @auto_log(__name__)
     def dismiss_alert(self):
@@ -186,6 +207,7 @@ class Interactor:
         :return: None
         """
         self.driver.switch_to.alert.dismiss()
+        self._page_may_have_changed()
 
     @auto_log(__name__)
     def enter_text_into_alert(self, text):
@@ -195,6 +217,7 @@ class Interactor:
         :return: None
         """
         self.driver.switch_to.alert.send_keys(text)
+        self._page_may_have_changed()
 
     @auto_log(__name__)
     def switch_to_default_content(self):
@@ -202,6 +225,7 @@ class Interactor:
         Switch focus to the default frame
         """
         self.driver.switch_to.default_content()
+        self._page_may_have_changed(context_changed=True)
 
     @auto_log(__name__)
     def clear_cookie_and_refresh_page(self, cookie_name):
@@ -211,6 +235,7 @@ class Interactor:
         """
         self.driver.delete_cookie(cookie_name)
         self.driver.refresh()
+        self._page_may_have_changed(context_changed=True)
 
     @auto_log(__name__)
     def clear_all_cookies(self):
@@ -218,3 +243,15 @@ class Interactor:
         Delete all cookies for the current page - this does not refresh the page
         """
         self.driver.delete_all_cookies()
+
+    def _page_may_have_changed(self, context_changed=False):
+        """
+        Tell the Finder that the page may have changed, so that it does not reuse cached elements without checking
+        :param context_changed: True if the document, window or frame has changed, so no cached element can be reused
+        """
+        if not isinstance(self.find, Finder):
+            return
+        if context_changed:
+            self.find.context_changed()
+        else:
+            self.find.page_may_have_changed()
@@ -4,6 +4,8 @@ import requests
 from selenium.common.exceptions import TimeoutException
 from selenium.webdriver.common.by import By
 
+from uitestcore.page_snapshot import PageSnapshot
+from uitestcore.utilities.browser_scripts import READ_ELEMENTS_SCRIPT
 from uitestcore.utilities.logger_handler import auto_log
 
 
@@ -14,19 +16,26 @@ class Interrogator:
     And get_attribute -> String
     """
 
-    def __init__(self, driver, finder, wait_time=10, existing_logger=None):
+    def __init__(self, driver, finder, wait_time=10, existing_logger=None, bulk_read_threshold=10,
+                 bulk_read_texts=False):
         """
         Default constructor which passes the control of webDriver to the current page
         :param driver: the Selenium web driver
         :param finder: Finder used to find elements before interrogating
         :param wait_time: number of seconds as an Integer, defaults to 10
         :param existing_logger: logger object used to save information to a log file
-
+        :param bulk_read_threshold: when more elements than this are matched, get_list_of_attributes reads all of the
+            values with a single script, defaults to 10. Use None to disable
+        :param bulk_read_texts: if True, get_list_of_texts also reads the texts with a single script above
+            bulk_read_threshold (default False). The script uses innerText, which can differ from WebElement.text in
+            its whitespace e.g. around inline elements and in preformatted text
         """
         self.driver = driver
         self.find = finder
         self.wait_time = wait_time
         self.logger = existing_logger or logging.getLogger(__name__)
+        self.bulk_read_threshold = bulk_read_threshold
+        self.bulk_read_texts = bulk_read_texts
 
     @auto_log(__name__)
     def table_is_not_empty(self, page_element, min_list_length=5):
@@ -140,12 +149,13 @@ class Interrogator:
         return len(elements) > 0 and elements[0].is_displayed()
 
     @auto_log(__name__)
-    def are_elements_visible(self, page_element):
+    def are_elements_visible(self, page_element, in_browser=False):
         """
         Finds a list of elements using the page_element passed in, and iterates over them to check they are all visible
         If one element is not visible, return false
         if no elements are found, return false
         :param page_element
+        :param in_browser: if True, the visibility checks are done by a single script in the browser (default False)
         :return: bool
         """
         elements = self.find.elements(page_element)
@@ -153,6 +163,9 @@ class Interrogator:
         if not elements:
             return False
 
+        if in_browser:
+            return len(self.find.visible_in_browser(elements)) == len(elements)
+
         for element in elements:
             if not element.is_displayed() or element.get_attribute("aria-hidden") == "true":
                 return False
@@ -220,14 +233,15 @@ class Interrogator:
         return len(elements) > 0 and elements[0].is_enabled()
 
     @auto_log(__name__)
-    def is_element_visible_and_contains_text(self, page_element, expected_text):
+    def is_element_visible_and_contains_text(self, page_element, expected_text, in_browser=False):
         """
         Check that an element is visible on the page and contains the expected text
         :param page_element: PageElement instance representing the element
         :param expected_text: the text to check against the element contents
+        :param in_browser: if True, the visibility checks are done by a single script in the browser (default False)
         :return: boolean representing whether the element with expected text was found
         """
-        visible_elements = self.find.visible_elements(page_element)
+        visible_elements = self.find.visible_elements(page_element, in_browser=in_browser)
 
         for element in visible_elements:
             if expected_text in element.text:
@@ -301,6 +315,9 @@ class Interrogator:
         elements_attributes = []
         elements = self.find.elements(page_element)
 
+        if self._use_bulk_read(elements):
+            return self._read_elements(elements, [attribute], include_text=False)[1][attribute]
+
         for element in elements:
             elements_attributes.append(element.get_attribute(attribute))
 
@@ -325,11 +342,52 @@ class Interrogator:
         elements_text = []
         elements = self.find.elements(page_element)
 
+        if self.bulk_read_texts and self._use_bulk_read(elements):
+            return self._read_elements(elements, [])[0]
+
         for element in elements:
             elements_text.append(element.text)
 
         return elements_text
 
+    @auto_log(__name__)
+    def get_texts_and_attributes(self, page_element, attributes=()):
+        """
+        Return the text and any number of attributes for every element matching the page element, read by a single
+        script in the browser rather than one call per element and value
+        The attributes are read in the same way as WebElement.get_attribute, but the text is read with innerText, which
+        can differ from WebElement.text in its whitespace
+        :param page_element: PageElement instance representing the element
+        :param attributes: the names of the attributes whose values you want e.g. ['href', 'class']
+        :return: tuple of (list of texts, dict mapping each attribute name to a list of values), with one entry per
+            element in each list
+        """
+        elements = self.find.elements(page_element)
+        return self._read_elements(elements, attributes)
+
+    def _use_bulk_read(self, elements):
+        """
+        Check whether enough elements were found for reading their values in bulk to be worthwhile
+        :param elements: list of WebElements which will be read
+        :return: bool
+        """
+        return self.bulk_read_threshold is not None and len(elements) > self.bulk_read_threshold
+
+    def _read_elements(self, elements, attributes, include_text=True):
+        """
+        Read the text and attributes of the given elements using a single script
+        :param elements: list of WebElements to read
+        :param attributes: the names of the attributes to read
+        :param include_text: whether the text of each element should be read
+        :return: tuple of (list of texts, dict mapping each attribute name to a list of values)
+        """
+        attributes = list(attributes)
+        if not elements:
+            return [], {attribute: [] for attribute in attributes}
+
+        result = self.driver.execute_script(READ_ELEMENTS_SCRIPT, elements, attributes, include_text)
+        return result["texts"], result["attributes"]
+
     @auto_log(__name__)
     def element_has_class(self, page_element, expected_class):
         """
@@ -405,3 +463,13 @@ class Interrogator:
             if cookie['name'] == name_to_find:
                 return cookie['value']
         return ""
+
+    @auto_log(__name__)
+    def take_snapshot(self, page_elements=None):
+        """
+        Capture a read-only copy of the page with a single script call - the snapshot answers the same read-only
+        queries as this class e.g. get_text and element_has_class without going back to the browser
+        :param page_elements: list of PageElement instances to find while capturing e.g. those using CSS selectors
+        :return: PageSnapshot
+        """
+        return PageSnapshot(self.driver, page_elements, self.logger)
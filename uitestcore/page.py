@@ -3,6 +3,7 @@ import logging
 from uitestcore.finder import Finder
 from uitestcore.interactor import Interactor
 from uitestcore.interrogator import Interrogator
+from uitestcore.utilities.command_metrics import instrument_driver
 from uitestcore.waiter import Waiter
 
 
@@ -10,17 +11,25 @@ class BasePage:
     """
     This is the base page class from which common functionality can be inherited
     """
-    def __init__(self, driver, existing_logger=None, wait_time=10):
+    def __init__(self, driver, existing_logger=None, wait_time=10, cache_elements=False, measure_commands=False,
+                 event_driven=False, polling=None):
         """
         Default constructor which passes the control of webDriver to the current page
         :param driver: the Selenium web driver
         :param existing_logger: logger object used to save information to a log file, None by default
         :param wait_time: number of seconds as an Integer, defaults to 10
+        :param cache_elements: whether the Finder should reuse elements until the page changes, defaults to False
+        :param measure_commands: whether to count the commands sent to the driver and how long they take, defaults to
+            False. The metrics are shared by every page using the same driver and are available as command_metrics
+        :param event_driven: whether the Waiter should wait for elements inside the browser, defaults to False
+        :param polling: PollingStrategy used by the Waiter, defaults to FixedPolling - pass the same instance to every
+            page so that e.g. a LearnedPolling learns from the waits of all of them
         """
         self.driver = driver
         self.logger = existing_logger or logging.getLogger(__name__)
         self.implicit_wait = wait_time
-        self.find = Finder(driver, existing_logger)
-        self.wait = Waiter(driver, self.find, wait_time, existing_logger)
+        self.command_metrics = instrument_driver(driver) if measure_commands else None
+        self.find = Finder(driver, existing_logger, cache_elements)
+        self.wait = Waiter(driver, self.find, wait_time, existing_logger, event_driven, polling)
         self.interrogate = Interrogator(driver, self.find, wait_time, existing_logger)
         self.interact = Interactor(driver, self.find, self.interrogate, self.wait, existing_logger)
@@ -0,0 +1,404 @@
+import logging
+import re
+from xml.etree import ElementTree
+
+from selenium.webdriver.common.by import By
+
+from uitestcore.utilities.browser_scripts import BOOLEAN_ATTRIBUTES, CAPTURE_PAGE_SCRIPT, ELEMENT_INDEXES_SCRIPT
+from uitestcore.utilities.logger_handler import auto_log
+
+# XPath predicates which ElementTree evaluates the same way as the browser - an attribute being present or equal to a
+# value, or a position. Text is not part of the tree, and href, src, value and the boolean attributes are captured from
+# the element properties rather than the attributes, so predicates on them are left to the browser
+SIMPLE_XPATH_PREDICATE = re.compile(r"""\[(?:@(?!(?:""" + "|".join(("href", "src", "value") + BOOLEAN_ATTRIBUTES) +
+                                    r""")\b)[\w:-]+"""
+                                    r"""(?:\s*=\s*(?:"[^"]*"|'[^']*'))?|\d+)\]""")
+SIMPLE_XPATH_STEPS = re.compile(r"[\w/.*-]*")
+
+
+class PageSnapshot:
+    """
+    A read-only copy of the current page, captured with a single script call
+    Use this in place of the Interrogator when a step makes many assertions about a page which is not changing - each
+    query is answered from the copy without going back to the browser
+    """
+
+    def __init__(self, driver, page_elements=None, existing_logger=None):
+        """
+        Default constructor which captures the page straight away
+        ID, name, class name, tag name and link text locators can always be answered from the copy, as can simple XPath
+        locators. Other XPath locators, e.g. those matching on text, are found in the browser the first time they are
+        used, which is only correct while the page has not changed. Any other locators e.g. CSS selectors must be passed
+        in page_elements so they can be found in the browser at the time the page is captured
+        :param driver: the Selenium web driver
+        :param page_elements: list of PageElement instances to find while capturing the page
+        :param existing_logger: logger object used to save information to a log file
+        """
+        self.driver = driver
+        self.logger = existing_logger or logging.getLogger(__name__)
+        page_elements = list(page_elements or [])
+        locators = [[page_element.locator_type, page_element.locator_value] for page_element in page_elements]
+
+        self.logger.info(f"Capturing page snapshot with {len(page_elements)} page element(s)")
+        snapshot = driver.execute_script(CAPTURE_PAGE_SCRIPT, locators)
+
+        self.url = snapshot["url"]
+        self.cookies = _parse_cookies(snapshot["cookies"])
+        self.nodes = snapshot["nodes"]
+        self.located = {tuple(locator): indexes for locator, indexes in zip(locators, snapshot["located"])}
+        self.texts = {}
+        self._build_tree()
+        self.logger.info(f"Captured {len(self.nodes)} element(s)")
+
+    def _build_tree(self):
+        """
+        Parse the captured elements into an ElementTree so that they can be searched with XPath
+        """
+        self.tree = ElementTree.Element("document")
+        self.tree_elements = []
+        self.children = [[] for _ in self.nodes]
+        self.tree_indexes = {}
+
+        for index, node in enumerate(self.nodes):
+            parent = self.tree_elements[node["parent"]] if node["parent"] >= 0 else self.tree
+            tree_element = ElementTree.SubElement(parent, node["tag"], node["attributes"])
+            self.tree_elements.append(tree_element)
+            self.tree_indexes[tree_element] = index
+            if node["parent"] >= 0:
+                self.children[node["parent"]].append(index)
+
+    def _find(self, page_element):
+        """
+        Find the captured elements matching the given page element object
+        :param page_element: PageElement instance representing the element
+        :return: list of matching node indexes in document order
+        """
+        locator = (page_element.locator_type, page_element.locator_value)
+        if locator in self.located:
+            return self.located[locator]
+
+        locator_type, value = locator
+        matchers = {
+            By.ID: lambda index, node: node["attributes"].get("id") == value,
+            By.NAME: lambda index, node: node["attributes"].get("name") == value,
+            By.CLASS_NAME: lambda index, node: value in node["attributes"].get("class", "").split(),
+            By.TAG_NAME: lambda index, node: node["tag"] == value.lower(),
+            By.LINK_TEXT: lambda index, node: node["tag"] == "a" and self._text(index) == value,
+            By.PARTIAL_LINK_TEXT: lambda index, node: node["tag"] == "a" and value in self._text(index)
+        }
+
+        if locator_type in matchers:
+            return [index for index, node in enumerate(self.nodes) if matchers[locator_type](index, node)]
+
+        if locator_type == By.XPATH:
+            if _is_simple_xpath(value):
+                try:
+                    return sorted(self.tree_indexes[element] for element in self.tree.findall("." + value))
+                except (SyntaxError, KeyError):
+                    pass
+            self.logger.debug(f"Finding {page_element} in the browser as it cannot be answered from the snapshot")
+            indexes = self.driver.execute_script(ELEMENT_INDEXES_SCRIPT, locator_type, value)
+            self.located[locator] = [index for index in indexes if index is not None and index < len(self.nodes)]
+            return self.located[locator]
+
+        raise ValueError(f"{page_element} cannot be found in the snapshot - "
+                         f"pass it in page_elements when capturing the snapshot")
+
+    def _text(self, index):
+        """
+        Put together the text of a captured element as it is rendered, like WebElement.text - hidden elements have no
+        text, each block element and line break starts a new line, and non-breaking spaces become spaces
+        The text is worked out the first time it is needed, as most elements are never asked for theirs
+        :param index: the node index of the captured element
+        :return: the text with surrounding whitespace removed
+        """
+        if index not in self.texts:
+            lines = (re.sub(" +", " ", line).strip() for line in self._rendered_text(index).split("\n"))
+            self.texts[index] = "\n".join(line for line in lines if line).replace("\u00a0", " ")
+        return self.texts[index]
+
+    def _rendered_text(self, index):
+        """
+        Join the text directly inside a captured element with the text of its children, in document order
+        :param index: the node index of the captured element
+        :return: the text, with a newline around each block element
+        """
+        node = self.nodes[index]
+        if not node["visible"]:
+            return ""
+
+        parts = [node["text"]]
+        for child in self.children[index]:
+            child_node = self.nodes[child]
+            if child_node["tag"] == "br":
+                parts.append("\n")
+            elif child_node["block"]:
+                parts.extend(["\n", self._rendered_text(child), "\n"])
+            else:
+                parts.append(self._rendered_text(child))
+            parts.append(child_node["tail"])
+        return "".join(parts)
+
+    def _first(self, page_element):
+        """
+        Find the first captured element matching the given page element object
+        :param page_element: PageElement instance representing the element
+        :return: the captured node or None
+        """
+        indexes = self._find(page_element)
+        return self.nodes[indexes[0]] if indexes else None
+
+    def _descendants_with_tag(self, index, tag):
+        """
+        Count the descendants of a captured element which have the given tag
+        :param index: the node index of the captured element
+        :param tag: the tag name to count e.g. 'tr'
+        :return: int
+        """
+        return sum(1 for element in self.tree_elements[index].iter(tag)) - (self.nodes[index]["tag"] == tag)
+
+    @auto_log(__name__)
+    def get_number_of_elements(self, page_element):
+        """
+        Count the number of matching elements on the page
+        :param page_element: PageElement instance representing the element
+        :return: the number of elements found
+        """
+        return len(self._find(page_element))
+
+    @auto_log(__name__)
+    def is_element_visible(self, page_element):
+        """
+        Check that an element is visible
+        :param page_element: PageElement instance representing the element
+        :return: bool
+        """
+        node = self._first(page_element)
+        return node is not None and node["visible"]
+
+    @auto_log(__name__)
+    def are_elements_visible(self, page_element):
+        """
+        Check that all of the elements matching the page element are visible and not aria-hidden
+        if no elements are found, return false
+        :param page_element: PageElement instance representing the element
+        :return: bool
+        """
+        nodes = [self.nodes[index] for index in self._find(page_element)]
+        return len(nodes) > 0 and all(_is_visible(node) for node in nodes)
+
+    @auto_log(__name__)
+    def is_element_visible_and_contains_text(self, page_element, expected_text):
+        """
+        Check that an element is visible on the page and contains the expected text
+        :param page_element: PageElement instance representing the element
+        :param expected_text: the text to check against the element contents
+        :return: boolean representing whether the element with expected text was found
+        """
+        return any(_is_visible(self.nodes[index]) and expected_text in self._text(index)
+                   for index in self._find(page_element))
+
+    @auto_log(__name__)
+    def is_element_selected(self, page_element):
+        """
+        Check if an element such as a radio button or checkbox is selected
+        :param page_element: PageElement instance representing the element
+        :return: boolean representing whether the element was selected
+        """
+        node = self._first(page_element)
+        return node is not None and ("checked" in node["attributes"] or "selected" in node["attributes"])
+
+    @auto_log(__name__)
+    def is_element_enabled(self, page_element):
+        """
+        Check if an element is enabled
+        :param page_element: PageElement instance representing the element
+        :return: boolean representing whether the element is enabled
+        """
+        node = self._first(page_element)
+        return node is not None and "disabled" not in node["attributes"]
+
+    @auto_log(__name__)
+    def get_text(self, page_element):
+        """
+        Return the text value of an element
+        :param page_element: PageElement instance representing the element
+        :return: String or None
+        """
+        indexes = self._find(page_element)
+        return self._text(indexes[0]) if indexes else None
+
+    @auto_log(__name__)
+    def get_list_of_texts(self, page_element):
+        """
+        Return a list of text values of an element
+        :param page_element: PageElement instance representing the element
+        :return: list of Strings or empty list
+        """
+        return [self._text(index) for index in self._find(page_element)]
+
+    @auto_log(__name__)
+    def get_attribute(self, page_element, attribute):
+        """
+        Get any attribute on an element
+        :param page_element: PageElement instance representing the element
+        :param attribute: the name of the attribute whose value you want e.g. 'type'
+        :return: attribute as string
+        """
+        node = self._first(page_element)
+        if node is None:
+            return ""
+        return node["attributes"].get(attribute)
+
+    @auto_log(__name__)
+    def get_list_of_attributes(self, page_element, attribute):
+        """
+        Return a list of attributes of an element
+        :param page_element: PageElement instance representing the element
+        :param attribute: the name of the attribute whose value you want e.g. 'type' or 'href'
+        :return: list of attributes as Strings or empty list
+        """
+        return [self.nodes[index]["attributes"].get(attribute) for index in self._find(page_element)]
+
+    @auto_log(__name__)
+    def element_has_class(self, page_element, expected_class):
+        """
+        Find an element and check it has the correct class
+        :param page_element: PageElement instance representing the element
+        :param expected_class: the class to look for on the element - it can be one of several classes
+        :return: boolean representing whether the class was found on the element
+        """
+        node = self._first(page_element)
+        return node is not None and node["visible"] and expected_class in node["attributes"].get("class", "")
+
+    @auto_log(__name__)
+    def element_parent_has_class(self, page_element, expected_class):
+        """
+        Find an element and check its parent has the correct class
+        :param page_element: PageElement instance representing the element
+        :param expected_class: the class to look for on the parent - it can be one of several classes
+        :return: boolean representing whether the class was found on the parent
+        """
+        node = self._first(page_element)
+        if node is None or node["parent"] < 0:
+            return False
+        parent = self.nodes[node["parent"]]
+        return parent["visible"] and expected_class in parent["attributes"].get("class", "")
+
+    @auto_log(__name__)
+    def element_sibling_has_class(self, page_element, expected_class):
+        """
+        Find an element and check that any of its sibling elements has the correct class
+        :param page_element: PageElement instance representing the element
+        :param expected_class: the class to look for on the sibling - it can be one of several classes
+        :return: boolean representing whether the class was found on the sibling
+        """
+        node = self._first(page_element)
+        if node is None or node["parent"] < 0:
+            return False
+        siblings_with_class = [self.nodes[index] for index in self.children[node["parent"]]
+                               if expected_class in self.nodes[index]["attributes"].get("class", "")]
+        return len(siblings_with_class) > 0 and siblings_with_class[0]["visible"]
+
+    @auto_log(__name__)
+    def element_contains_link(self, page_element, expected_url):
+        """
+        Check if an element contains a link to the given URL
+        :param page_element: PageElement instance representing the element
+        :param expected_url: the URL expected for the link
+        :return: boolean representing whether the link was valid
+        """
+        node = self._first(page_element)
+        return node is not None and node["visible"] and expected_url in node["attributes"].get("href", "")
+
+    @auto_log(__name__)
+    def get_table_row_count(self, page_element):
+        """
+        Finds the page element, and then finds the number of tr tags
+        :param page_element: PageElement instance representing the element
+        :return: int
+        """
+        return self._descendants_with_tag(self._find(page_element)[0], "tr")
+
+    @auto_log(__name__)
+    def table_is_not_empty(self, page_element, min_list_length=5):
+        """
+        check if a table is empty by counting the rows
+        :param page_element: PageElement instance representing the element
+        :param min_list_length: the number of rows needed for the table to count as not empty. Defaults to 5
+        :return: bool whether table is empty
+        """
+        indexes = self._find(page_element)
+        return len(indexes) > 0 and self._descendants_with_tag(indexes[0], "tr") >= min_list_length
+
+    @auto_log(__name__)
+    def list_is_not_empty(self, page_element, min_list_length=1):
+        """
+        check if a list is empty by counting the number of li tags
+        :param page_element: PageElement instance representing the element
+        :param min_list_length: Some lists might have a default number of rows so it could be 'empty' but have some
+            li tags. Defaults to 1
+        :return: bool if number of li tags is less than expected
+        """
+        return self._descendants_with_tag(self._find(page_element)[0], "li") > min_list_length
+
+    @auto_log(__name__)
+    def get_current_url(self):
+        """
+        :return: the url of the page when it was captured
+        """
+        return self.url
+
+    @auto_log(__name__)
+    def get_all_cookies(self):
+        """
+        Gets the cookies which were readable by scripts when the page was captured - HttpOnly cookies are not included,
+        use Interrogator.get_all_cookies for those
+        :return: list of dictionaries with the name and value of each cookie
+        """
+        return self.cookies
+
+    @auto_log(__name__)
+    def get_value_from_cookie(self, name_to_find):
+        """
+        Return the value of a named cookie. The name of the cookie must be supplied and matched
+        :param name_to_find: The name of the cookie to search for and return
+        :return: The value of the named cookie or an empty string
+        """
+        for cookie in self.cookies:
+            if cookie["name"] == name_to_find:
+                return cookie["value"]
+        return ""
+
+
+def _is_visible(node):
+    """
+    Check a captured element is displayed and not hidden from assistive technology
+    :param node: the captured element
+    :return: bool
+    """
+    return node["visible"] and node["attributes"].get("aria-hidden") != "true"
+
+
+def _is_simple_xpath(xpath):
+    """
+    Check whether an XPath locator can be answered from the snapshot - an absolute path of element steps using only
+    the predicates in SIMPLE_XPATH_PREDICATE
+    :param xpath: the XPath locator value
+    :return: bool
+    """
+    return xpath.startswith("/") and SIMPLE_XPATH_STEPS.fullmatch(SIMPLE_XPATH_PREDICATE.sub("", xpath)) is not None
+
+
+def _parse_cookies(cookie_string):
+    """
+    Split the value of document.cookie into a list of cookies
+    :param cookie_string: the value of document.cookie e.g. 'name1=value1; name2=value2'
+    :return: list of dictionaries with the name and value of each cookie
+    """
+    cookies = []
+    for cookie in cookie_string.split(";"):
+        if cookie.strip():
+            name, _, value = cookie.strip().partition("=")
+            cookies.append({"name": name, "value": value})
+    return cookies
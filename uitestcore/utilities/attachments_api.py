@@ -7,13 +7,25 @@ https://docs.microsoft.com/en-us/rest/api/azure/devops/test/attachments?view=azu
 import base64
 import datetime
 import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from os import listdir
 from xml.etree.ElementTree import fromstring
 import requests
+from uitestcore.utilities.request_executor import RequestExecutor
+from uitestcore.utilities.screenshot_store import file_digest
 from uitestcore.utilities.string_util import remove_invalid_characters
+from uitestcore.utilities.timing_spans import record_span
+from uitestcore.utilities.upload_journal import UPLOAD_JOURNAL_FILE, UploadJournal
 
 AZURE_API_VERSION_GET = "6.0"
 AZURE_API_VERSION_POST = "5.0-preview.1"
+DEFAULT_UPLOAD_WORKERS = 8
+RESULTS_PAGE_SIZE = 1000
+CONTINUATION_TOKEN_HEADER = "x-ms-continuationtoken"
+BASE64_CHUNK_SIZE = 3 * 256 * 1024
 
 
 def attach_files_release(organisation, project, attachments_path, release_id, access_token):
@@ -30,14 +42,15 @@ def attach_files_release(organisation, project, attachments_path, release_id, ac
     # Set the URL for the required API
     request_url = f"https://dev.azure.com/{organisation}/{project}/_apis/test/runs"
 
-    # Get the run IDs for the given release
-    run_ids = get_run_ids_by_release(release_id, request_url, access_token)
-    if not run_ids:
-        print_azure_error(f"No test runs found for release {release_id}")
-        return 1
-    print(f"Run IDs found for release {release_id}: {run_ids}")
+    with RequestExecutor(max_concurrent=DEFAULT_UPLOAD_WORKERS) as executor:
+        # Get the run IDs for the given release
+        run_ids = get_run_ids_by_release(release_id, request_url, access_token, executor)
+        if not run_ids:
+            print_azure_error(f"No test runs found for release {release_id}")
+            return 1
+        print(f"Run IDs found for release {release_id}: {run_ids}")
 
-    return attach_files(run_ids, request_url, access_token, attachments_path)
+        return attach_files(run_ids, request_url, access_token, attachments_path, executor=executor)
 
 
 def attach_files_build(organisation, project, attachments_path, build_id, access_token):
@@ -54,129 +67,339 @@ def attach_files_build(organisation, project, attachments_path, build_id, access
     # Set the URL for the required API
     request_url = f"https://dev.azure.com/{organisation}/{project}/_apis/test/runs"
 
-    # Get the run IDs for the given build
-    run_ids = get_run_ids_by_build(build_id, request_url, access_token)
-    if not run_ids:
-        print_azure_error(f"No test runs found for build {build_id}")
-        return 1
-    print(f"Run IDs found for build {build_id}: {run_ids}")
+    with RequestExecutor(max_concurrent=DEFAULT_UPLOAD_WORKERS) as executor:
+        # Get the run IDs for the given build
+        run_ids = get_run_ids_by_build(build_id, request_url, access_token, executor)
+        if not run_ids:
+            print_azure_error(f"No test runs found for build {build_id}")
+            return 1
+        print(f"Run IDs found for build {build_id}: {run_ids}")
 
-    return attach_files(run_ids, request_url, access_token, attachments_path)
+        return attach_files(run_ids, request_url, access_token, attachments_path, executor=executor)
 
 
-def attach_files(run_ids, request_url, access_token, attachment_file_path):
+@record_span(__name__)
+def attach_files(run_ids, request_url, access_token, attachment_file_path, max_workers=DEFAULT_UPLOAD_WORKERS,
+                 executor=None, journal_file=None):
     """
     Get the details of the failed tests from a given set of run ids and attach the files using Microsoft Azure API calls
+    The failed tests are found and the files are uploaded by pools of threads sharing one session, so connections to
+    Azure are reused rather than opened for every request. Requests are retried when Azure is busy
+    Each upload is recorded in a journal, so if this is run again e.g. after the task was stopped partway through, only
+    the files which were not attached are uploaded
     :param run_ids: list of run ids to search for failed tests within and attach files to
     :param request_url: the url for the azure api
     :param access_token: access token to authenticate with the azure api
     :param attachment_file_path: the file path to the directory containing the files to attach
+    :param max_workers: the maximum number of requests to send at once
+    :param executor: the RequestExecutor to send the requests with, a new one is used if this is not given
+    :param journal_file: the path of the upload journal, defaults to .upload_journal.jsonl in the attachments folder
     :return: integer: a return value of 0 indicates success, 1 means that any file could not be attached
     """
 
-    # Get the list of failed tests
-    failed_tests = get_failed_tests(run_ids, request_url, access_token)
+    with use_executor(executor, max_workers) as request_executor:
+        # Get the list of failed tests
+        failed_tests = get_failed_tests(run_ids, request_url, access_token, request_executor, max_workers)
 
-    if not failed_tests:
-        return 1
+        if not failed_tests:
+            return 1
+
+        print(f"Failed tests found (run ID, test case result ID, test name): {failed_tests}")
 
-    print(f"Failed tests found (run ID, test case result ID, test name): {failed_tests}")
+        # A return value of 0 indicates success, 1 means that any file could not be attached
+        return_value = 0
 
-    # A return value of 0 indicates success, 1 means that any file could not be attached
-    return_value = 0
+        # Ensure that the file path ends with a "/"
+        if not attachment_file_path.endswith("/"):
+            attachment_file_path += "/"
 
-    # Ensure that the file path ends with a "/"
-    if not attachment_file_path.endswith("/"):
-        attachment_file_path += "/"
+        # Find the files to attach for each test
+        uploads = []
+        for failed_test in failed_tests:
+            file_path = attachment_file_path + remove_invalid_characters(failed_test[2])
+            file_names = []
 
-    # Attach the relevant files
-    for failed_test in failed_tests:
-        # Get all of the file names to attach for this test
-        file_path = attachment_file_path + remove_invalid_characters(failed_test[2])
-        file_names = []
+            if append_file_names(file_names, file_path) == 1:
+                return_value = 1
 
-        if append_file_names(file_names, file_path) == 1:
-            return_value = 1
+            uploads.extend((failed_test, file_path, file_name) for file_name in file_names)
 
-        if not file_names:
-            continue
+        if not uploads:
+            return return_value
 
-        # Attach any files found for this test
-        for file_name in file_names:
-            file_b64 = get_file_base64(f"{file_path}/{file_name}")
+        # Identical files e.g. screenshots from reruns are only attached once to each test
+        attached_digests = AttachedDigests()
+        journal = UploadJournal(journal_file or attachment_file_path + UPLOAD_JOURNAL_FILE)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as thread_pool:
+            futures = [thread_pool.submit(upload_file, request_executor, request_url, access_token, failed_test,
+                                          file_path, file_name, attached_digests, journal)
+                       for failed_test, file_path, file_name in uploads]
+
+            for future in futures:
+                if not future.result():
+                    return_value = 1
+
+        return return_value
+
+
+@contextmanager
+def use_executor(executor=None, max_workers=DEFAULT_UPLOAD_WORKERS):
+    """
+    :param executor: an existing RequestExecutor to use
+    :param max_workers: the maximum number of requests in flight at once for a new RequestExecutor
+    :return: context manager giving the executor, or a new RequestExecutor which is closed afterwards if none was given
+    """
+    if executor:
+        yield executor
+    else:
+        with RequestExecutor(max_concurrent=max_workers) as new_executor:
+            yield new_executor
+
+
+def upload_file(executor, request_url, access_token, failed_test, file_path, file_name, attached_digests,
+                journal=None):
+    """
+    Attach a file to a test result
+    :param executor: the RequestExecutor to send the request with
+    :param request_url: the url for the azure api
+    :param access_token: access token to authenticate with the azure api
+    :param failed_test: the failed test details in the format: (run ID, test ID, test name)
+    :param file_path: the folder containing the file
+    :param file_name: the name of the file to attach
+    :param attached_digests: the AttachedDigests used to skip files identical to one already attached to the test
+    :param journal: the UploadJournal used to skip files attached by a previous run and record this upload
+    :return: True if the file was attached or skipped as already attached, otherwise False
+    """
+    try:
+        digest = file_digest(f"{file_path}/{file_name}")
+        file_size = os.path.getsize(f"{file_path}/{file_name}")
+    except OSError as error:
+        print_azure_error(f"Could not read file {file_path}/{file_name} - {error}")
+        return False
+
+    if file_size == 0:
+        print_azure_error(f"Could not convert file to Base64: {file_path}/{file_name}")
+        return False
+
+    run_id = failed_test[0]
+    test_case_result_id = failed_test[1]
+
+    if not attached_digests.add((run_id, test_case_result_id), digest):
+        print(f"Skipping file {file_name} - it is identical to a file already attached")
+        return True
+
+    if journal:
+        if journal.is_completed(run_id, test_case_result_id, digest):
+            print(f"Skipping file {file_name} - it was attached by a previous run")
+            return True
+
+        # A previous run may have been stopped after the file was uploaded but before that was recorded
+        if journal.is_started(run_id, test_case_result_id, digest) and \
+                is_file_attached(executor, request_url, access_token, run_id, test_case_result_id, file_name):
+            print(f"Skipping file {file_name} - it was attached by a previous run")
+            journal.record_completed(run_id, test_case_result_id, digest, file_name)
+            return True
+
+        journal.record_started(run_id, test_case_result_id, digest, file_name)
+
+    try:
+        response = executor.post(
+            f"{request_url}/{run_id}/Results/{test_case_result_id}/attachments",
+            params={"api-version": AZURE_API_VERSION_POST},
+            auth=("", access_token),
+            headers={"Content-Type": "application/json"},
+            # A new body is needed for each attempt as the file is read while the request is sent
+            make_data=lambda: AttachmentBody(f"{file_path}/{file_name}", file_name)
+        )
+    except (requests.RequestException, OSError) as error:
+        print_azure_error(f"Could not attach file {file_name} - {error}")
+        return False
+
+    print(f"Attach file {file_name} - response {response.status_code}")
+
+    if not response.status_code == 200:
+        return False
+
+    if journal:
+        journal.record_completed(run_id, test_case_result_id, digest, file_name)
+    return True
+
+
+def is_file_attached(executor, request_url, access_token, run_id, test_case_result_id, file_name):
+    """
+    Check whether a test result already has an attachment with the given name
+    :param executor: the RequestExecutor to send the request with
+    :param request_url: the url for the azure api
+    :param access_token: access token to authenticate with the azure api
+    :param run_id: the run ID
+    :param test_case_result_id: the test result ID
+    :param file_name: the name of the attachment
+    :return: True if the attachment was found, False if not or if the attachments could not be listed
+    """
+    try:
+        response = executor.get(
+            f"{request_url}/{run_id}/Results/{test_case_result_id}/attachments",
+            params={"api-version": AZURE_API_VERSION_POST},
+            auth=("", access_token)
+        )
+    except requests.RequestException:
+        return False
+
+    if not response.status_code == 200:
+        return False
+
+    return any(attachment.get("fileName") == file_name for attachment in response.json()["value"])
 
-            if not file_b64:
-                print_azure_error(f"Could not convert file to Base64: {file_path}/{file_name}")
-                return_value = 1
-                continue
-
-            run_id = failed_test[0]
-            test_case_result_id = failed_test[1]
-
-            response = requests.post(
-                f"{request_url}/{run_id}/Results/{test_case_result_id}/attachments",
-                params={"api-version": AZURE_API_VERSION_POST},
-                auth=("", access_token),
-                headers={"Content-Type": "application/json"},
-                data=json.dumps({
-                    "attachmentType": "GeneralAttachment",
-                    "comment": "Attached by UiTestCore",
-                    "fileName": file_name,
-                    "stream": file_b64.decode("utf-8")
-                })
-            )
-
-            print(f"Attach file {file_name} - response {response.status_code}")
-
-            if not response.status_code == 200:
-                return_value = 1
 
-    return return_value
+class AttachmentBody:
+    """
+    The JSON request body for attaching a file, which is read like a file by requests - the file is read and Base64
+    encoded a chunk at a time while the request is sent, so the whole file is never held in memory
+    """
 
+    def __init__(self, file_path, file_name):
+        """
+        Default constructor
+        :param file_path: the path of the file to attach
+        :param file_name: the name to give the attachment
+        """
+        envelope = json.dumps({
+            "attachmentType": "GeneralAttachment",
+            "comment": "Attached by UiTestCore",
+            "fileName": file_name,
+            "stream": ""
+        }).encode("utf-8")
+        # Split the envelope either side of the empty "stream" value, which the Base64 text is written between
+        self.prefix, self.suffix = envelope[:-2], envelope[-2:]
+        self.file_size = os.path.getsize(file_path)
+        self.file_path = file_path
+        self.chunks = self._generate_chunks()
+        self.chunk = b""
+        self.position = 0
+
+    def __len__(self):
+        """
+        :return: the length of the body, so requests can send the Content-Length before reading it
+        """
+        return len(self.prefix) + -(-self.file_size // 3) * 4 + len(self.suffix)
+
+    def read(self, size=-1):
+        """
+        :param size: the maximum number of bytes to read, or -1 to read the rest of the body
+        :return: the next part of the body as bytes, empty when the whole body has been read
+        """
+        parts = []
+        remaining = size
+        while remaining != 0:
+            if self.position >= len(self.chunk):
+                # Let go of the previous chunk first so only one is held in memory
+                self.chunk = b""
+                self.chunk = next(self.chunks, b"")
+                self.position = 0
+                if not self.chunk:
+                    break
+            end = len(self.chunk) if remaining < 0 else min(len(self.chunk), self.position + remaining)
+            parts.append(self.chunk[self.position:end])
+            if remaining > 0:
+                remaining -= end - self.position
+            self.position = end
+        return b"".join(parts)
+
+    def close(self):
+        """
+        Close the file if the body was not read to the end
+        """
+        self.chunks.close()
+
+    def _generate_chunks(self):
+        """
+        :return: generator of the parts of the body - reading a multiple of 3 bytes at a time means each chunk of the
+            file can be encoded on its own without any padding
+        """
+        yield self.prefix
+        with open(self.file_path, "rb") as file:
+            for block in iter(lambda: file.read(BASE64_CHUNK_SIZE), b""):
+                yield base64.b64encode(block)
+        yield self.suffix
+
+
+class AttachedDigests:
+    """
+    The hashes of the files attached to each test, shared between the upload threads
+    """
 
-def get_run_ids_by_release(release_id, request_url, access_token):
+    def __init__(self):
+        """
+        Default constructor
+        """
+        self.digests = {}
+        self.lock = threading.Lock()
+
+    def add(self, test_result, digest):
+        """
+        Record that a file is being attached to a test
+        :param test_result: the (run ID, test ID) of the test
+        :param digest: the hash of the file contents
+        :return: True if no identical file has been attached to the test, otherwise False
+        """
+        with self.lock:
+            digests = self.digests.setdefault(test_result, set())
+            if digest in digests:
+                return False
+            digests.add(digest)
+            return True
+
+
+@record_span(__name__)
+def get_run_ids_by_release(release_id, request_url, access_token, executor=None):
     """
     Get the test run IDs for the given release ID - each feature will have a unique run ID
     :param release_id: the release ID from Azure DevOps
     :param request_url: the url for the azure api
     :param access_token: access token to authenticate with the azure api
+    :param executor: the RequestExecutor to send the request with, a new one is used if this is not given
     :return: list of run IDs which were found
     """
     max_last_updated_date = datetime.datetime.now()
     min_last_updated_date = max_last_updated_date - datetime.timedelta(days=1)
 
-    response = requests.get(
-        request_url,
-        params={"minLastUpdatedDate": min_last_updated_date,
-                "maxLastUpdatedDate": max_last_updated_date,
-                "releaseIds": release_id,
-                "api-version": AZURE_API_VERSION_GET
-                },
-        auth=("", access_token)
-    )
+    with use_executor(executor) as request_executor:
+        response = request_executor.get(
+            request_url,
+            params={"minLastUpdatedDate": min_last_updated_date,
+                    "maxLastUpdatedDate": max_last_updated_date,
+                    "releaseIds": release_id,
+                    "api-version": AZURE_API_VERSION_GET
+                    },
+            auth=("", access_token)
+        )
     return get_run_ids_from_response(release_id, response)
 
 
-def get_run_ids_by_build(build_id, request_url, access_token):
+@record_span(__name__)
+def get_run_ids_by_build(build_id, request_url, access_token, executor=None):
     """
     Get the test run IDs for the given build ID - each feature will have a unique run ID
     :param build_id: the build ID from Azure DevOps
     :param request_url: the url for the azure api
     :param access_token: access token to authenticate with the azure api
+    :param executor: the RequestExecutor to send the request with, a new one is used if this is not given
     :return: list of run IDs which were found
     """
     max_last_updated_date = datetime.datetime.now()
     min_last_updated_date = max_last_updated_date - datetime.timedelta(days=1)
 
-    response = requests.get(
-        request_url,
-        params={"minLastUpdatedDate": min_last_updated_date,
-                "maxLastUpdatedDate": max_last_updated_date,
-                "buildIds": build_id,
-                "api-version": AZURE_API_VERSION_GET
-                },
-        auth=("", access_token)
-    )
+    with use_executor(executor) as request_executor:
+        response = request_executor.get(
+            request_url,
+            params={"minLastUpdatedDate": min_last_updated_date,
+                    "maxLastUpdatedDate": max_last_updated_date,
+                    "buildIds": build_id,
+                    "api-version": AZURE_API_VERSION_GET
+                    },
+            auth=("", access_token)
+        )
     return get_run_ids_from_response(build_id, response)
 
 
@@ -214,43 +437,76 @@ def print_response_info(response):
             print(info)
 
 
-def get_failed_tests(run_ids, request_url, access_token):
+@record_span(__name__)
+def get_failed_tests(run_ids, request_url, access_token, executor=None, max_workers=DEFAULT_UPLOAD_WORKERS):
     """
     Get the required details of the failed tests from the given runs
+    The runs are queried at the same time, and only the failed results are requested from Azure a page at a time
     :param run_ids: list of run IDs to query
     :param request_url: the url for the azure api
     :param access_token: access token to authenticate with the azure api
+    :param executor: the RequestExecutor to send the requests with, a new one is used if this is not given
+    :param max_workers: the maximum number of runs to query at once
+    :return: list of test details in the format: (run ID, test ID, test name)
+    """
+    with use_executor(executor, max_workers) as request_executor, \
+            ThreadPoolExecutor(max_workers=max_workers) as thread_pool:
+        failed_tests_by_run = list(thread_pool.map(
+            lambda run_id: get_failed_tests_for_run(request_executor, run_id, request_url, access_token), run_ids))
+
+    failed_tests = [failed_test for run_failed_tests in failed_tests_by_run for failed_test in run_failed_tests]
+
+    if not failed_tests:
+        print_azure_warning("No failed tests were found. If this is because all of the tests passed, "
+                            "this task should be configured to be skipped by setting the 'Run this task' option to "
+                            "'Only when a previous task has failed'")
+
+    return failed_tests
+
+
+def get_failed_tests_for_run(executor, run_id, request_url, access_token):
+    """
+    Get the required details of the failed tests from one run, following Azure's continuation tokens or paging with
+    $skip until every failed result has been read
+    :param executor: the RequestExecutor to send the requests with
+    :param run_id: the run ID to query
+    :param request_url: the url for the azure api
+    :param access_token: access token to authenticate with the azure api
     :return: list of test details in the format: (run ID, test ID, test name)
     """
     failed_tests = []
+    params = {"outcomes": "Failed", "$top": RESULTS_PAGE_SIZE, "api-version": AZURE_API_VERSION_GET}
 
-    for run_id in run_ids:
-        response = requests.get(
-            request_url + f"/{run_id}/results",
-            params={"api-version": AZURE_API_VERSION_GET},
-            auth=("", access_token)
-        )
+    while True:
+        try:
+            response = executor.get(request_url + f"/{run_id}/results", params=params, auth=("", access_token))
+        except requests.RequestException as error:
+            print_azure_error(f"Could not get failed test IDs for run {run_id} - {error}")
+            return failed_tests
 
         print(f"Get failed tests for run ID {run_id} - response {response.status_code}")
 
         if not response.status_code == 200:
             print_azure_error(f"Could not get failed test IDs for run {run_id}")
-            continue
+            return failed_tests
 
-        response_json = response.json()
+        test_results = response.json()["value"]
 
-        for test_result in response_json["value"]:
+        # The outcome is still checked in case the outcomes filter is not supported
+        for test_result in test_results:
             if test_result["outcome"] == "Failed":
                 failed_tests.append((run_id, test_result["id"], test_result["testCase"]["name"]))
 
-    if not failed_tests:
-        print_azure_warning("No failed tests were found. If this is because all of the tests passed, "
-                            "this task should be configured to be skipped by setting the 'Run this task' option to "
-                            "'Only when a previous task has failed'")
-
-    return failed_tests
+        continuation_token = response.headers.get(CONTINUATION_TOKEN_HEADER)
+        if continuation_token:
+            params = dict(params, continuationToken=continuation_token)
+        elif len(test_results) >= RESULTS_PAGE_SIZE:
+            params = dict(params, **{"$skip": params.get("$skip", 0) + len(test_results)})
+        else:
+            return failed_tests
 
 
+@record_span(__name__)
 def get_file_base64(file_path):
     """
     Get the Base64 encoded string for a given file
@@ -1,16 +1,27 @@
+import base64
 import json
 import os
 import platform
 import shutil
+import struct
+import zlib
+from concurrent.futures import ThreadPoolExecutor, wait
 from pathlib import Path
 from axe_selenium_python import Axe
 from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
 from uitestcore.utilities.config_handler import parse_config_data
 from uitestcore.utilities.datetime_handler import get_current_datetime
+from uitestcore.utilities.logger_handler import auto_log
+from uitestcore.utilities.worker import worker_path
+from uitestcore.utilities.screenshot_store import ScreenshotStore
 from uitestcore.utilities.string_util import remove_invalid_characters
 
 SCREENSHOTS_PATH = "screenshots"
 
+# Decodes and saves screenshots taken with take_screenshot(in_background=True)
+screenshot_writer = ThreadPoolExecutor(max_workers=2, thread_name_prefix="screenshot-writer")
+
 
 class BrowserHandler:
     """
@@ -18,6 +29,7 @@ class BrowserHandler:
     """
 
     saved_screenshot_file_names = []
+    pending_screenshots = []
 
     @staticmethod
     def set_browser_size(context):
@@ -37,8 +49,12 @@ class BrowserHandler:
         # Check if we have any command line parameters to parse
         parse_config_data(context)
 
-        # Check the Browser specified in config and load the Selenium Web Driver
-        open_browser(context)
+        # Check the Browser specified in config and load the Selenium Web Driver - from the pool if there is one
+        browser_pool = getattr(context, "browser_pool", None)
+        if browser_pool is not None:
+            context.browser = browser_pool.checkout()
+        else:
+            open_browser(context)
 
         # Set Implicit Wait on Selenium Driver
         context.browser.implicitly_wait(context.implicit_wait)
@@ -46,43 +62,82 @@ class BrowserHandler:
         # Check if Maximize Browser Flag has been activated
         BrowserHandler.set_browser_size(context)
 
+    @staticmethod
+    def release_browser(context):
+        """
+        Finish with the browser at the end of a scenario - it is returned to the pool if there is one (see
+        BrowserPool), otherwise it is closed
+        :param context: the test context instance
+        """
+        browser_pool = getattr(context, "browser_pool", None)
+        if browser_pool is not None:
+            browser_pool.checkin(context.browser)
+        else:
+            context.browser.quit()
+
     @classmethod
-    def take_screenshot(cls, driver, description):
+    @auto_log(__name__)
+    def take_screenshot(cls, driver, description, native_full_page=True, in_background=False, recompress=False,
+                        deduplicate=False):
         """
         Save a screenshot of the browser window - should be used after a test fails
         :param driver: the browser driver
         :param description: information about the screenshot to be added to the file name
-        :return: boolean representing whether saving the screenshot succeeded
+        :param native_full_page: use the browser's own full page capture where it has one (Chrome, Edge and Firefox),
+            which is quicker than resizing the window and does not change the page layout. Defaults to True
+        :param in_background: only take the screenshot on this thread, and decode and save it on a background thread,
+            defaults to False. Use wait_for_screenshots to wait for the screenshots to be saved
+        :param recompress: with in_background, compress the PNG as much as possible before saving it, defaults to False
+        :param deduplicate: store the screenshot in the content-addressed store (see ScreenshotStore), so that identical
+            screenshots only use disk space once, defaults to False
+        :return: boolean representing whether saving the screenshot succeeded, or with in_background a Future which
+            gives the boolean once the screenshot is saved
         """
-        window_width = driver.get_window_size()["width"]
-        window_height = driver.get_window_size()["height"]
-        scroll_height = driver.execute_script("return document.body.scrollHeight")
-
-        # Set the browser to the full height of the page so that everything is captured
-        if scroll_height > window_height:
-            driver.set_window_size(window_width, scroll_height)
-
-        # Create the screenshots folder
-        if not os.path.exists(SCREENSHOTS_PATH):
-            os.makedirs(SCREENSHOTS_PATH)
+        # Create the screenshots folder - each parallel worker has its own
+        screenshots_path = worker_path(SCREENSHOTS_PATH)
+        if not os.path.exists(screenshots_path):
+            os.makedirs(screenshots_path)
 
         # Create a file name and ensure it is not too long
         timestamp = get_current_datetime().strftime("%Y-%m-%d_%H.%M.%S.%f")
         description = remove_invalid_characters(description)
-        file_name = f"{SCREENSHOTS_PATH}/{timestamp}_{description}"
+        file_name = f"{screenshots_path}/{timestamp}_{description}"
         file_name = (file_name[:100] + "---.png") if len(file_name) > 100 else file_name + ".png"
 
-        # Save the screenshot
-        result = driver.save_screenshot(file_name)
-
-        # Reset the browser size if it was changed
-        if scroll_height > window_height:
-            driver.set_window_size(window_width, window_height)
+        if in_background:
+            png_base64 = capture_full_page_base64(driver) if native_full_page else None
+            if png_base64 is None:
+                png_base64 = with_full_height_window(driver, driver.get_screenshot_as_base64)
+            future = screenshot_writer.submit(write_screenshot, file_name, png_base64, recompress, deduplicate)
+            cls.pending_screenshots.append(future)
+            cls.saved_screenshot_file_names.append(file_name)
+            return future
 
+        # Save the screenshot
+        png = capture_full_page_png(driver) if native_full_page else None
+        if png is not None:
+            with open(file_name, "wb") as screenshot_file:
+                screenshot_file.write(png)
+            result = True
+        else:
+            result = save_resized_screenshot(driver, file_name)
+
+        if result and deduplicate:
+            ScreenshotStore(SCREENSHOTS_PATH).add(file_name)
         if result:
             cls.saved_screenshot_file_names.append(file_name)
         return result
 
+    @classmethod
+    def wait_for_screenshots(cls):
+        """
+        Wait for all screenshots taken with in_background=True to be saved
+        :return: boolean representing whether every screenshot was saved
+        """
+        pending, cls.pending_screenshots = cls.pending_screenshots, []
+        wait(pending)
+        return all(future.exception() is None and future.result() for future in pending)
+
     @staticmethod
     def move_screenshots_to_folder(folder_name, file_names=None):
         """
@@ -91,9 +146,12 @@ class BrowserHandler:
         :param file_names: (optional) the name of the files to be moved. Default None. If None, then move any files
         ending with .png. Otherwise, move any files that match the given saved_screenshot_file_names.
         """
+        # Make sure any screenshots being saved in the background are finished before moving them
+        BrowserHandler.wait_for_screenshots()
+
         folder_name = remove_invalid_characters(folder_name)
-        source = f"{SCREENSHOTS_PATH}/"
-        destination = source + folder_name
+        source = f"{worker_path(SCREENSHOTS_PATH)}/"
+        destination = f"{SCREENSHOTS_PATH}/{folder_name}"
         files = os.listdir(source)
 
         if not os.path.exists(destination):
@@ -142,9 +200,136 @@ class BrowserHandler:
         return axe_results
 
 
+def capture_full_page_base64(driver):
+    """
+    Capture the whole page using the browser's own full page screenshot - the DevTools protocol in Chrome and Edge, or
+    get_full_page_screenshot_as_base64 in Firefox
+    :param driver: the browser driver
+    :return: the PNG as a Base64 string, or None if the browser does not support it or gave an unexpected response
+    """
+    try:
+        if hasattr(driver, "execute_cdp_cmd"):
+            content_size = driver.execute_cdp_cmd("Page.getLayoutMetrics", {})["cssContentSize"]
+            screenshot = driver.execute_cdp_cmd("Page.captureScreenshot", {
+                "format": "png",
+                "captureBeyondViewport": True,
+                "clip": {"x": 0, "y": 0, "width": content_size["width"], "height": content_size["height"], "scale": 1}
+            })
+            return screenshot["data"]
+        if hasattr(driver, "get_full_page_screenshot_as_base64"):
+            return driver.get_full_page_screenshot_as_base64()
+    except (WebDriverException, KeyError, TypeError):
+        # e.g. an older browser without cssContentSize in its layout metrics
+        pass
+    return None
+
+
+def capture_full_page_png(driver):
+    """
+    Capture the whole page using the browser's own full page screenshot
+    :param driver: the browser driver
+    :return: the PNG as bytes, or None if the browser does not support it
+    """
+    png_base64 = capture_full_page_base64(driver)
+    return base64.b64decode(png_base64) if png_base64 is not None else None
+
+
+def with_full_height_window(driver, capture):
+    """
+    Make the window as tall as the page while taking a screenshot - used for browsers without a full page screenshot
+    :param driver: the browser driver
+    :param capture: function which takes the screenshot
+    :return: the value returned by capture
+    """
+    window_size = driver.get_window_size()
+    window_width, window_height = window_size["width"], window_size["height"]
+    scroll_height = driver.execute_script("return document.body.scrollHeight")
+
+    # Set the browser to the full height of the page so that everything is captured
+    if scroll_height > window_height:
+        driver.set_window_size(window_width, scroll_height)
+
+    result = capture()
+
+    # Reset the browser size if it was changed
+    if scroll_height > window_height:
+        driver.set_window_size(window_width, window_height)
+
+    return result
+
+
+def save_resized_screenshot(driver, file_name):
+    """
+    Save a screenshot of the whole page by making the window as tall as the page
+    :param driver: the browser driver
+    :param file_name: the file to save the screenshot in
+    :return: boolean representing whether saving the screenshot succeeded
+    """
+    return with_full_height_window(driver, lambda: driver.save_screenshot(file_name))
+
+
+def write_screenshot(file_name, png_base64, recompress=False, deduplicate=False):
+    """
+    Decode a screenshot and save it - this is run on a background thread by take_screenshot(in_background=True)
+    :param file_name: the file to save the screenshot in
+    :param png_base64: the PNG as a Base64 string
+    :param recompress: whether to compress the PNG as much as possible before saving it
+    :param deduplicate: whether to add the screenshot to the content-addressed store
+    :return: True once the screenshot is saved
+    """
+    png = base64.b64decode(png_base64)
+    if recompress:
+        png = recompress_png(png)
+    with open(file_name, "wb") as screenshot_file:
+        screenshot_file.write(png)
+    if deduplicate:
+        ScreenshotStore(SCREENSHOTS_PATH).add(file_name)
+    return True
+
+
+def recompress_png(png, level=9):
+    """
+    Compress the image data in a PNG at the given zlib level - browsers save screenshots with fast, light compression
+    :param png: the PNG as bytes
+    :param level: the zlib compression level, defaults to 9 (smallest)
+    :return: the PNG as bytes, or the original PNG if it could not be made smaller or is not a valid PNG
+    """
+    signature, position = png[:8], 8
+    chunks, image_data = [], []
+    try:
+        while position < len(png):
+            length = struct.unpack(">I", png[position:position + 4])[0]
+            chunk_type = png[position + 4:position + 8]
+            chunk_data = png[position + 8:position + 8 + length]
+            position += 12 + length
+            if position > len(png):
+                return png
+            if chunk_type == b"IDAT":
+                if not image_data:
+                    chunks.append((b"IDAT", None))
+                image_data.append(chunk_data)
+            else:
+                chunks.append((chunk_type, chunk_data))
+
+        if not chunks or chunks[-1][0] != b"IEND":
+            return png
+        compressed = zlib.compress(zlib.decompress(b"".join(image_data)), level)
+    except (struct.error, zlib.error):
+        return png
+
+    output = [signature]
+    for chunk_type, chunk_data in chunks:
+        chunk_data = compressed if chunk_type == b"IDAT" else chunk_data
+        output.append(struct.pack(">I", len(chunk_data)) + chunk_type + chunk_data +
+                      struct.pack(">I", zlib.crc32(chunk_type + chunk_data)))
+    recompressed = b"".join(output)
+    return recompressed if len(recompressed) < len(png) else png
+
+
 def write_axe_violations_to_file(context, results):
-    Path("axe_reports/violations").mkdir(parents=True, exist_ok=True)
-    with open("axe_reports/violations/violations.txt", "a+", encoding="utf-8") as violations_file:
+    violations_path = worker_path("axe_reports/violations")
+    Path(violations_path).mkdir(parents=True, exist_ok=True)
+    with open(f"{violations_path}/violations.txt", "a+", encoding="utf-8") as violations_file:
         violations_file.write(f"{'=' * 75}\n\n\n"
                               f"Scenario name: {context.scenario_name}\n"
                               f"URL: {results['url']}\n"
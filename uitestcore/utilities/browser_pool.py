@@ -0,0 +1,209 @@
+"""
+Keeps browsers open between scenarios so that each scenario does not have to wait for a new browser to start
+Browsers are reset when they are returned to the pool, and are replaced if they crash or have been used many times
+Only Chromium based browsers can be reset completely (see reset_browser) - other browsers are closed at the end of each
+scenario, and the pool saves time by opening their replacements in the background
+
+e.g. in environment.py:
+    def before_all(context):
+        parse_config_data(context)
+        context.browser_pool = BrowserPool(context, size=2).start()
+
+    def before_scenario(context, scenario):
+        BrowserHandler.prepare_browser(context)
+
+    def after_scenario(context, scenario):
+        BrowserHandler.release_browser(context)
+
+    def after_all(context):
+        context.browser_pool.close()
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+from selenium.common.exceptions import WebDriverException
+from uitestcore.utilities.browser_handler import open_browser
+from uitestcore.utilities.logger_handler import auto_log
+
+
+class BrowserPool:
+    """
+    A pool of open browsers which are checked out for a scenario and checked back in at the end
+    """
+
+    def __init__(self, context, size=2, max_uses=50, existing_logger=None):
+        """
+        Default constructor - call start to open the browsers
+        :param context: the test context instance, with the browser config already parsed (see parse_config_data)
+        :param size: the number of browsers to keep open, defaults to 2
+        :param max_uses: the number of scenarios a browser is used for before it is replaced, defaults to 50. This
+            stops a browser which is slowly leaking memory from being used for the whole run
+        :param existing_logger: logger object used to save information to a log file
+        """
+        self.context = context
+        self.size = size
+        self.max_uses = max_uses
+        self.logger = existing_logger or logging.getLogger(__name__)
+        self.idle = []
+        self.uses = {}
+        self.closed = False
+        self._lock = threading.Lock()
+        self._launcher = ThreadPoolExecutor(max_workers=size)
+
+    def start(self):
+        """
+        Open the browsers in the background
+        :return: the pool, so that it can be created and started in one line
+        """
+        for _ in range(self.size):
+            self._launcher.submit(self._launch_idle)
+        return self
+
+    def _launch(self):
+        """
+        Open a new browser using the browser config from the context
+        :return: the new web driver
+        """
+        launch_context = SimpleNamespace(browser_name=self.context.browser_name,
+                                         browser_options=getattr(self.context, "browser_options", None),
+                                         maximize_browser=getattr(self.context, "maximize_browser", False))
+        open_browser(launch_context)
+        with self._lock:
+            self.uses[launch_context.browser] = 0
+        return launch_context.browser
+
+    def _launch_idle(self):
+        """
+        Open a new browser and add it to the idle browsers
+        """
+        try:
+            driver = self._launch()
+        except WebDriverException:
+            self.logger.exception("Could not open a browser for the pool")
+            return
+        with self._lock:
+            self.idle.append(driver)
+
+    @auto_log(__name__)
+    def checkout(self):
+        """
+        Take a browser from the pool - if none are ready, a new browser is opened
+        :return: the web driver
+        """
+        while True:
+            with self._lock:
+                driver = self.idle.pop(0) if self.idle else None
+            if driver is None:
+                self.logger.info("No browsers ready in the pool - opening a new browser")
+                return self._launch()
+            if self.is_healthy(driver):
+                return driver
+            self._retire(driver)
+
+    @auto_log(__name__)
+    def checkin(self, driver):
+        """
+        Reset a browser and return it to the pool - if the browser has been used max_uses times or cannot be reset
+        completely, it is closed and a new browser is opened in the background to replace it
+        :param driver: the web driver which was checked out
+        """
+        with self._lock:
+            self.uses[driver] = uses = self.uses.get(driver, 0) + 1
+        if uses >= self.max_uses:
+            self.logger.info(f"Replacing browser after {uses} uses")
+            self._retire(driver)
+            return
+
+        try:
+            reset = reset_browser(driver)
+        except WebDriverException:
+            self.logger.exception("Could not reset browser - replacing it")
+            reset = False
+        if not reset:
+            self._retire(driver)
+            return
+
+        with self._lock:
+            if not self.closed:
+                self.idle.append(driver)
+                return
+        # The pool was closed while the browser was checked out
+        self._retire(driver)
+
+    @staticmethod
+    def is_healthy(driver):
+        """
+        Check a browser is still responding
+        :param driver: the web driver
+        :return: bool
+        """
+        try:
+            return len(driver.window_handles) > 0
+        except WebDriverException:
+            return False
+
+    def _retire(self, driver):
+        """
+        Close a browser and open a new one in the background to replace it, unless the pool has been closed
+        :param driver: the web driver to close
+        """
+        with self._lock:
+            self.uses.pop(driver, None)
+            closed = self.closed
+        _quit(driver)
+        if not closed:
+            self._launcher.submit(self._launch_idle)
+
+    def close(self):
+        """
+        Close all of the browsers in the pool - browsers which are checked out are not closed, but are closed when
+        they are checked in
+        """
+        with self._lock:
+            self.closed = True
+        self._launcher.shutdown(wait=True)
+        with self._lock:
+            idle, self.idle = self.idle, []
+        for driver in idle:
+            _quit(driver)
+
+
+def reset_browser(driver):
+    """
+    Remove all of the state left by a scenario by moving the browser to a new, empty browser context using the
+    DevTools protocol - every window from the scenario is closed and its browser context, with all of its cookies,
+    storage, cache and permissions for every site, is thrown away
+    Only Chromium based browsers support this, so other browsers cannot be reset
+    :param driver: the web driver
+    :return: True if the browser was reset, False if it cannot be reset and should be closed instead
+    """
+    if not hasattr(driver, "execute_cdp_cmd"):
+        return False
+
+    old_handles = driver.window_handles
+    context_id = driver.execute_cdp_cmd("Target.createBrowserContext", {})["browserContextId"]
+    driver.execute_cdp_cmd("Target.createTarget", {"url": "about:blank", "browserContextId": context_id})
+    new_handles = [handle for handle in driver.window_handles if handle not in old_handles]
+    if len(new_handles) != 1:
+        return False
+
+    for handle in old_handles:
+        driver.switch_to.window(handle)
+        driver.close()
+    driver.switch_to.window(new_handles[0])
+
+    # Dispose of the contexts used by previous scenarios - the browser's default context cannot be disposed of, but
+    # none of its windows are open any more
+    for old_context_id in driver.execute_cdp_cmd("Target.getBrowserContexts", {})["browserContextIds"]:
+        if old_context_id != context_id:
+            driver.execute_cdp_cmd("Target.disposeBrowserContext", {"browserContextId": old_context_id})
+    return True
+
+
+def _quit(driver):
+    try:
+        driver.quit()
+    except WebDriverException:
+        pass
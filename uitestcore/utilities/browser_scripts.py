@@ -0,0 +1,339 @@
+"""
+JavaScript snippets which are run in the browser through execute_script
+Keeping these together means the same locator logic is used by every helper which needs to batch its work into a
+single WebDriver call
+"""
+import json
+import pkgutil
+
+# The isDisplayed atom shipped with Selenium - this is what WebElement.is_displayed runs, so using it in our own scripts
+# keeps visibility checks identical to the per-element calls
+IS_DISPLAYED_ATOM = pkgutil.get_data("selenium.webdriver.remote", "isDisplayed.js").decode("utf8")
+
+# The getAttribute atom shipped with Selenium - this is what WebElement.get_attribute runs
+GET_ATTRIBUTE_ATOM = pkgutil.get_data("selenium.webdriver.remote", "getAttribute.js").decode("utf8")
+
+# The attributes which the getAttribute atom treats as boolean, returning "true" when the attribute is present or the
+# element property is true, and None otherwise
+BOOLEAN_ATTRIBUTES = (
+    "allowfullscreen", "allowpaymentrequest", "allowusermedia", "async", "autofocus", "autoplay", "checked", "compact",
+    "complete", "controls", "declare", "default", "defaultchecked", "defaultselected", "defer", "disabled", "ended",
+    "formnovalidate", "hidden", "indeterminate", "iscontenteditable", "ismap", "itemscope", "loop", "multiple", "muted",
+    "nohref", "nomodule", "noresize", "noshade", "novalidate", "nowrap", "open", "paused", "playsinline", "pubdate",
+    "readonly", "required", "reversed", "scoped", "seamless", "seeking", "selected", "truespeed", "typemustmatch",
+    "willvalidate"
+)
+
+# Defines uitestcoreFind(type, value) which resolves a Selenium locator (By.ID, By.XPATH etc.) to an array of elements
+FIND_FUNCTION = """
+function uitestcoreFind(type, value) {
+    var found;
+    switch (type) {
+        case "css selector":
+            found = document.querySelectorAll(value);
+            break;
+        case "id":
+            found = document.querySelectorAll('[id="' + CSS.escape(value) + '"]');
+            break;
+        case "name":
+            found = document.querySelectorAll('[name="' + CSS.escape(value) + '"]');
+            break;
+        case "class name":
+            found = document.getElementsByClassName(value);
+            break;
+        case "tag name":
+            found = document.getElementsByTagName(value);
+            break;
+        case "xpath":
+            var snapshot = document.evaluate(value, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+            found = [];
+            for (var i = 0; i < snapshot.snapshotLength; i++) {
+                found.push(snapshot.snapshotItem(i));
+            }
+            break;
+        case "link text":
+            found = Array.prototype.filter.call(document.getElementsByTagName("a"), function (link) {
+                return link.innerText.trim() === value;
+            });
+            break;
+        case "partial link text":
+            found = Array.prototype.filter.call(document.getElementsByTagName("a"), function (link) {
+                return link.innerText.indexOf(value) !== -1;
+            });
+            break;
+        default:
+            throw new Error("Unsupported locator type: " + type);
+    }
+    return Array.prototype.filter.call(found, function (node) {
+        return node.nodeType === Node.ELEMENT_NODE;
+    });
+}
+"""
+
+# Takes a list of [locator_type, locator_value] pairs and returns a list of element lists in the same order
+FIND_ELEMENTS_MANY_SCRIPT = FIND_FUNCTION + """
+return arguments[0].map(function (locator) {
+    return uitestcoreFind(locator[0], locator[1]);
+});
+"""
+
+# Defines uitestcoreIsVisible(element) - displayed according to Selenium and not hidden with aria-hidden="true"
+IS_VISIBLE_FUNCTION = """
+var uitestcoreIsDisplayed = """ + IS_DISPLAYED_ATOM + """;
+function uitestcoreIsVisible(element) {
+    return uitestcoreIsDisplayed.call(null, element) && element.getAttribute("aria-hidden") !== "true";
+}
+"""
+
+# Takes a list of elements and returns only the ones which are visible
+VISIBLE_ELEMENTS_SCRIPT = IS_VISIBLE_FUNCTION + """
+return arguments[0].filter(uitestcoreIsVisible);
+"""
+
+# Takes a list of elements, a list of attribute names and a flag for whether to read the text, and returns
+# {texts: [...], attributes: {name: [...]}} with one entry per element in each list
+# Text is read with innerText, with non-breaking spaces replaced as WebElement.text does, and is empty for hidden
+# elements - it can still differ from WebElement.text in its whitespace, so callers make reading text this way opt-in
+READ_ELEMENTS_SCRIPT = IS_VISIBLE_FUNCTION + """
+var uitestcoreGetAttribute = """ + GET_ATTRIBUTE_ATOM + """;
+var elements = arguments[0];
+var attributes = {};
+arguments[1].forEach(function (name) {
+    attributes[name] = elements.map(function (element) {
+        return uitestcoreGetAttribute.call(null, element, name);
+    });
+});
+var texts = !arguments[2] ? [] : elements.map(function (element) {
+    return uitestcoreIsDisplayed.call(null, element) ? element.innerText.replace(/\u00a0/g, " ").trim() : "";
+});
+return {texts: texts, attributes: attributes};
+"""
+
+# Takes a list of [locator_type, locator_value] pairs and returns a copy of the page - every element in document order
+# with its tag, parent index, attributes and visibility - along with the indexes matched by each locator
+# href, src and value are read from the element properties and the attributes in BOOLEAN_ATTRIBUTES are normalised to
+# "true" or removed in the same way as the getAttribute atom, so the values match WebElement.get_attribute
+# Rather than the full text of every element, which repeats the text of the whole page for each ancestor, only the text
+# directly inside each element is captured, as in ElementTree - "text" is the text before its first child element and
+# "tail" the text after the element up to its next sibling element, with whitespace other than non-breaking spaces
+# collapsed. "block" records whether the element starts a new line, so the text of any element can be put back
+# together as it is rendered
+CAPTURE_PAGE_SCRIPT = FIND_FUNCTION + IS_VISIBLE_FUNCTION + """
+var booleanAttributes = """ + json.dumps(BOOLEAN_ATTRIBUTES) + """;
+function uitestcoreTextUntilElement(node) {
+    var text = "";
+    for (; node && node.nodeType !== Node.ELEMENT_NODE; node = node.nextSibling) {
+        if (node.nodeType === Node.TEXT_NODE) {
+            text += node.data;
+        }
+    }
+    return text.replace(/[ \\t\\n\\r\\f]+/g, " ");
+}
+var indexes = new Map();
+var nodes = [];
+var all = document.getElementsByTagName("*");
+for (var i = 0; i < all.length; i++) {
+    var element = all[i];
+    var attributes = {};
+    for (var j = 0; j < element.attributes.length; j++) {
+        attributes[element.attributes[j].name] = element.attributes[j].value;
+    }
+    ["href", "src", "value"].forEach(function (name) {
+        if (typeof element[name] === "string") {
+            attributes[name] = element[name];
+        }
+    });
+    // As in the atom, checked and selected give the state of a checkbox, radio button or option rather than the
+    // attribute, and the other boolean attributes are true when the attribute is present or the property is true
+    var selectable = element.localName === "option" ||
+        (element.localName === "input" && /^(checkbox|radio)$/i.test(element.type));
+    booleanAttributes.forEach(function (name) {
+        var isTrue;
+        if (selectable && (name === "checked" || name === "selected")) {
+            isTrue = element.localName === "option" ? element.selected : element.checked;
+        } else {
+            isTrue = name in attributes || Boolean(element[name === "readonly" ? "readOnly" : name]);
+        }
+        if (isTrue) {
+            attributes[name] = "true";
+        } else {
+            delete attributes[name];
+        }
+    });
+    var visible = uitestcoreIsDisplayed.call(null, element);
+    var parent = element.parentElement ? indexes.get(element.parentElement) : -1;
+    indexes.set(element, i);
+    nodes.push({
+        tag: element.localName,
+        parent: parent,
+        attributes: attributes,
+        visible: visible,
+        block: visible && !/^(inline|contents|table-cell)/.test(getComputedStyle(element).display),
+        text: visible ? uitestcoreTextUntilElement(element.firstChild) : "",
+        tail: parent >= 0 && nodes[parent].visible ? uitestcoreTextUntilElement(element.nextSibling) : ""
+    });
+}
+var located = arguments[0].map(function (locator) {
+    return uitestcoreFind(locator[0], locator[1]).map(function (element) {
+        return indexes.get(element);
+    });
+});
+return {url: window.location.href, cookies: document.cookie, nodes: nodes, located: located};
+"""
+
+# Takes a locator type and value and returns the position of each matching element among every element in the
+# document, which is its index in the nodes captured by CAPTURE_PAGE_SCRIPT as long as the page has not changed
+ELEMENT_INDEXES_SCRIPT = FIND_FUNCTION + """
+var indexes = new Map();
+var all = document.getElementsByTagName("*");
+for (var i = 0; i < all.length; i++) {
+    indexes.set(all[i], i);
+}
+return uitestcoreFind(arguments[0], arguments[1]).map(function (element) {
+    return indexes.get(element);
+});
+"""
+
+# Returns a token for the current state of the DOM in the current document or frame - "<document id>:<generation>"
+# A MutationObserver increments the generation whenever the DOM changes, and a new document gets a new id, so the token
+# only stays the same while the page is unchanged
+# Takes a list of elements which were found earlier, and returns null instead if any of them is no longer in the
+# document - this also catches changes the observer cannot see, e.g. inside a shadow root
+DOM_GENERATION_SCRIPT = """
+var state = window.uitestcoreDomState;
+if (!state) {
+    state = window.uitestcoreDomState = {id: Date.now() + "-" + Math.random(), generation: 0};
+    new MutationObserver(function () {
+        state.generation++;
+    }).observe(document, {childList: true, subtree: true, attributes: true, characterData: true});
+}
+var connected = (arguments[0] || []).every(function (element) {
+    return element.isConnected;
+});
+return connected ? state.id + ":" + state.generation : null;
+"""
+
+# Defines uitestcoreCheck(condition, locatorType, locatorValue, extra) which checks a condition on the first element
+# matching a locator - "present", "visible" or "attribute" (where extra is [attribute name, expected value])
+CHECK_CONDITION_FUNCTION = FIND_FUNCTION + IS_VISIBLE_FUNCTION + """
+var uitestcoreGetAttribute = """ + GET_ATTRIBUTE_ATOM + """;
+function uitestcoreCheck(condition, locatorType, locatorValue, extra) {
+    var elements = uitestcoreFind(locatorType, locatorValue);
+    if (elements.length === 0) {
+        return false;
+    }
+    switch (condition) {
+        case "present":
+            return true;
+        case "visible":
+            return uitestcoreIsDisplayed.call(null, elements[0]);
+        case "attribute":
+            return uitestcoreGetAttribute.call(null, elements[0], extra[0]) === extra[1];
+        default:
+            throw new Error("Unsupported condition: " + condition);
+    }
+}
+"""
+
+# Async script which waits in the browser for a condition on the first element matching a locator - takes the
+# condition, locator type, locator value and extra arguments as for uitestcoreCheck, and the timeout in milliseconds,
+# and calls back with true as soon as the condition holds or false once the timeout has passed
+# The condition is checked on every DOM mutation, and also every 100ms because visibility can change through CSS alone
+WAIT_FOR_CONDITION_SCRIPT = CHECK_CONDITION_FUNCTION + """
+var condition = arguments[0], locatorType = arguments[1], locatorValue = arguments[2], extra = arguments[3];
+var timeout = arguments[4], callback = arguments[arguments.length - 1];
+function check() {
+    return uitestcoreCheck(condition, locatorType, locatorValue, extra);
+}
+var finished = false, observer, interval, timer;
+function finish(result) {
+    finished = true;
+    observer.disconnect();
+    clearInterval(interval);
+    clearTimeout(timer);
+    callback(result);
+}
+function recheck() {
+    if (!finished && check()) {
+        finish(true);
+    }
+}
+if (check()) {
+    callback(true);
+} else {
+    observer = new MutationObserver(recheck);
+    observer.observe(document, {childList: true, subtree: true, attributes: true, characterData: true});
+    interval = setInterval(recheck, 100);
+    timer = setTimeout(function () {
+        finish(check());
+    }, timeout);
+}
+"""
+
+# Returns [document identity, ready state, URL] for the current document - performance.timeOrigin is unique to each
+# document, so it changes when the browser navigates to a new page
+DOCUMENT_STATE_SCRIPT = """
+var identity = String(performance.timeOrigin || performance.timing.navigationStart);
+return [identity, document.readyState, window.location.href];
+"""
+
+# Takes a quiet period in milliseconds and returns true once there have been no fetch/XHR requests in flight, no
+# resources loading and no finite animations running for that long
+# The first call installs a monitor which wraps fetch and XMLHttpRequest - requests started before then are only seen
+# through the resource timing entries once they finish, so the quiet period always restarts when the monitor is added
+NETWORK_IDLE_SCRIPT = """
+var monitor = window.uitestcoreNetworkMonitor;
+if (!monitor) {
+    monitor = window.uitestcoreNetworkMonitor = {inFlight: 0, lastActivity: performance.now()};
+    var started = function () {
+        monitor.inFlight++;
+        monitor.lastActivity = performance.now();
+    };
+    var finished = function () {
+        monitor.inFlight = Math.max(0, monitor.inFlight - 1);
+        monitor.lastActivity = performance.now();
+    };
+    if (window.fetch) {
+        var originalFetch = window.fetch;
+        window.fetch = function () {
+            started();
+            return originalFetch.apply(this, arguments).then(function (response) {
+                finished();
+                return response;
+            }, function (error) {
+                finished();
+                throw error;
+            });
+        };
+    }
+    var originalSend = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.send = function () {
+        started();
+        this.addEventListener("loadend", finished);
+        return originalSend.apply(this, arguments);
+    };
+}
+var now = performance.now();
+performance.getEntriesByType("resource").forEach(function (resource) {
+    monitor.lastActivity = Math.max(monitor.lastActivity, resource.responseEnd);
+});
+var animating = document.getAnimations && document.getAnimations().some(function (animation) {
+    return animation.playState === "running" && animation.effect &&
+        animation.effect.getComputedTiming().endTime !== Infinity;
+});
+if (monitor.inFlight > 0 || animating) {
+    monitor.lastActivity = now;
+    return false;
+}
+return now - monitor.lastActivity >= arguments[0];
+"""
+
+# Takes a list of groups, each a list of [condition, locator type, locator value, extra] as for uitestcoreCheck, and
+# returns a list with one boolean per group which is true if every condition in that group holds
+CHECK_CONDITION_GROUPS_SCRIPT = CHECK_CONDITION_FUNCTION + """
+return arguments[0].map(function (group) {
+    return group.every(function (condition) {
+        return uitestcoreCheck(condition[0], condition[1], condition[2], condition[3]);
+    });
+});
+"""
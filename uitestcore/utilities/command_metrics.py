@@ -0,0 +1,180 @@
+"""
+Counts the commands sent to the WebDriver by type (findElements, w3cExecuteScript, clickElement etc.) and keeps a
+latency histogram for each, so that chatty page objects can be found and given a budget
+Every Selenium call, including those made through a WebElement, goes through driver.execute - wrapping it on the
+driver instance measures everything sent by the Finder, Interactor, Interrogator and Waiter
+
+e.g. in environment.py:
+    def before_all(context):
+        context.command_metrics = instrument_driver(context.browser)
+
+    def before_scenario(context, scenario):
+        context.command_metrics.start_scenario(scenario.name)
+
+    def before_step(context, step):
+        context.command_metrics.start_step(step.name)
+
+    def after_all(context):
+        print(context.command_metrics.report())
+"""
+import bisect
+import time
+from collections import defaultdict
+
+# Upper bounds of the latency histogram buckets in milliseconds - anything slower goes in a final overflow bucket
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class CommandStats:
+    """
+    The number of commands of each type sent during a period e.g. a step or scenario, and how long they took
+    """
+
+    def __init__(self, name):
+        """
+        Default constructor
+        :param name: the name of the period e.g. the step name
+        """
+        self.name = name
+        self.counts = defaultdict(int)
+        self.total_time = defaultdict(float)
+        self.histograms = defaultdict(lambda: [0] * (len(LATENCY_BUCKETS_MS) + 1))
+        self.steps = []
+
+    def add(self, command, duration):
+        """
+        Record a command
+        :param command: the name of the command e.g. 'findElements'
+        :param duration: how long the command took in seconds
+        """
+        self.counts[command] += 1
+        self.total_time[command] += duration
+        self.histograms[command][bisect.bisect_left(LATENCY_BUCKETS_MS, duration * 1000)] += 1
+
+    @property
+    def total_commands(self):
+        return sum(self.counts.values())
+
+    def percentile(self, command, fraction):
+        """
+        Estimate a latency percentile for a command from its histogram
+        :param command: the name of the command e.g. 'findElements'
+        :param fraction: the percentile as a fraction e.g. 0.95
+        :return: the upper bound in milliseconds of the bucket containing the percentile, or None if it is in the
+            overflow bucket or the command was not sent
+        """
+        needed = fraction * self.counts[command]
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS_MS, self.histograms[command]):
+            seen += count
+            if count and seen >= needed:
+                return bound
+        return None
+
+    def report(self, indent=""):
+        """
+        :param indent: string to put at the start of each line
+        :return: a summary of the commands as a string, with the most frequent command first
+        """
+        lines = [f"{indent}{self.name}: {self.total_commands} command(s) in {sum(self.total_time.values()):.3f}s"]
+        for command, count in sorted(self.counts.items(), key=lambda item: item[1], reverse=True):
+            p50, p95 = (self.percentile(command, fraction) for fraction in (0.5, 0.95))
+            lines.append(f"{indent}    {command}: {count} in {self.total_time[command]:.3f}s "
+                         f"(p50 <= {_format_bound(p50)}, p95 <= {_format_bound(p95)})")
+        return "\n".join(lines)
+
+
+class CommandMetrics:
+    """
+    Measures the commands sent to a driver, in total and for each scenario and step
+    Use instrument_driver rather than creating this directly, so that a driver is only measured once
+    """
+
+    def __init__(self, driver):
+        """
+        Default constructor which starts measuring straight away
+        :param driver: the Selenium web driver
+        """
+        self.driver = driver
+        self.total = CommandStats("Total")
+        self.scenarios = []
+        self.scenario = None
+        self.step = None
+        self._execute = driver.execute
+        # Each access to self._timed_execute creates a new bound method, so keep the one which is installed
+        self._installed_execute = driver.execute = self._timed_execute
+
+    def _timed_execute(self, driver_command, params=None):
+        """
+        Send a command to the driver and record how long it took
+        """
+        start = time.perf_counter()
+        try:
+            return self._execute(driver_command, params)
+        finally:
+            self.record(driver_command, time.perf_counter() - start)
+
+    def record(self, command, duration):
+        """
+        Record a command in the totals and the current scenario and step
+        :param command: the name of the command e.g. 'findElements'
+        :param duration: how long the command took in seconds
+        """
+        self.total.add(command, duration)
+        if self.scenario is not None:
+            self.scenario.add(command, duration)
+        if self.step is not None:
+            self.step.add(command, duration)
+
+    def start_scenario(self, name):
+        """
+        Start counting commands for a new scenario
+        :param name: the name of the scenario
+        """
+        self.scenario = CommandStats(name)
+        self.scenarios.append(self.scenario)
+        self.step = None
+
+    def start_step(self, name):
+        """
+        Start counting commands for a new step in the current scenario
+        :param name: the name of the step
+        """
+        self.step = CommandStats(name)
+        if self.scenario is not None:
+            self.scenario.steps.append(self.step)
+
+    def detach(self):
+        """
+        Stop measuring the driver
+        """
+        if vars(self.driver).get("execute") is self._installed_execute:
+            del self.driver.execute
+        self.driver.uitestcore_command_metrics = None
+
+    def report(self):
+        """
+        :return: a summary of the commands sent in total and for each scenario and step
+        """
+        sections = [self.total.report()]
+        for scenario in self.scenarios:
+            sections.append(scenario.report("    "))
+            sections.extend(step.report("        ") for step in scenario.steps)
+        return "\n".join(sections)
+
+
+def instrument_driver(driver):
+    """
+    Start measuring the commands sent to a driver - if it is already being measured, the existing metrics are returned
+    :param driver: the Selenium web driver
+    :return: CommandMetrics instance
+    """
+    metrics = vars(driver).get("uitestcore_command_metrics")
+    if metrics is None:
+        metrics = CommandMetrics(driver)
+        driver.uitestcore_command_metrics = metrics
+    return metrics
+
+
+def _format_bound(bound):
+    return f"{bound}ms" if bound is not None else f">{LATENCY_BUCKETS_MS[-1]}ms"
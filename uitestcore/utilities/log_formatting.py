@@ -0,0 +1,109 @@
+"""
+Short summaries of values for log messages, so that logging large values e.g. lists of WebElements or Base64 file
+contents costs little and keeps the log files small
+Summaries are chosen by type and can be added to with register_summarizer
+"""
+from itertools import islice
+
+from selenium.webdriver.remote.webelement import WebElement
+
+# The longest summary of any single value - longer summaries are cut short
+MAX_LENGTH = 200
+
+# The number of items shown from lists, tuples, sets and dicts
+MAX_ITEMS = 5
+
+_summarizers = {}
+
+
+def register_summarizer(value_type, summarizer):
+    """
+    Set how values of a type are summarised in log messages - this also applies to subclasses of the type
+    e.g. register_summarizer(MyPage, lambda page: f"MyPage({page.url})")
+    :param value_type: the type of value to summarise
+    :param summarizer: function which takes a value and returns a short string
+    """
+    _summarizers[value_type] = summarizer
+
+
+def summarize(value):
+    """
+    Summarise a value for a log message
+    :param value: any value
+    :return: a string of at most MAX_LENGTH characters, plus '...' if it was cut short
+    """
+    for value_type in type(value).__mro__:
+        if value_type in _summarizers:
+            text = _summarizers[value_type](value)
+            break
+    else:
+        text = repr(value)
+    return text if len(text) <= MAX_LENGTH else text[:MAX_LENGTH] + "..."
+
+
+class LazyLogValue:
+    """
+    Wraps a value passed to a logger so that it is only summarised if the message is actually written
+    """
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __str__(self):
+        return summarize(self.value)
+
+    __repr__ = __str__
+
+
+def format_size(size):
+    """
+    :param size: a number of bytes or characters
+    :return: the size as a short string e.g. '512B', '3.4KB' or '1.2MB'
+    """
+    if size < 1024:
+        return f"{size}B"
+    if size < 1024 ** 2:
+        return f"{size / 1024:.1f}KB"
+    return f"{size / 1024 ** 2:.1f}MB"
+
+
+def _summarize_text(value):
+    if len(value) <= MAX_LENGTH:
+        return repr(value)
+    return f"{type(value).__name__}({format_size(len(value))}) {value[:MAX_ITEMS * 10]!r}"
+
+
+def _summarize_items(items, length, opening, closing):
+    """
+    :param items: the first items of a collection, already summarised
+    :param length: the number of items in the collection
+    """
+    more = f", ... {length - MAX_ITEMS} more" if length > MAX_ITEMS else ""
+    return f"{opening}{', '.join(items)}{more}{closing}"
+
+
+def _summarize_sequence(value):
+    if value and all(isinstance(item, WebElement) for item in value):
+        return f"{type(value).__name__} of {len(value)} WebElement{'s' if len(value) != 1 else ''}"
+    opening, closing = ("[", "]") if isinstance(value, list) else ("(", ")")
+    return _summarize_items([summarize(item) for item in value[:MAX_ITEMS]], len(value), opening, closing)
+
+
+def _summarize_set(value):
+    return _summarize_items([summarize(item) for item in islice(value, MAX_ITEMS)], len(value), "{", "}")
+
+
+def _summarize_dict(value):
+    items = [f"{summarize(key)}: {summarize(item)}" for key, item in islice(value.items(), MAX_ITEMS)]
+    return _summarize_items(items, len(value), "{", "}")
+
+
+register_summarizer(str, _summarize_text)
+register_summarizer(bytes, _summarize_text)
+register_summarizer(list, _summarize_sequence)
+register_summarizer(tuple, _summarize_sequence)
+register_summarizer(set, _summarize_set)
+register_summarizer(frozenset, _summarize_set)
+register_summarizer(dict, _summarize_dict)
+register_summarizer(WebElement, lambda element: f"WebElement({element.id})")
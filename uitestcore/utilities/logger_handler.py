@@ -2,37 +2,163 @@
 You can create your own logger and pass it into the uitestcore
 However if you don't want to, and just want something simple, you might find this useful
 """
+import atexit
+import functools
+import itertools
 import logging
 import logging.config
 import os
-import string
+import queue
 import time
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 
-from uitestcore.utilities.string_util import generate_random_string
+from uitestcore.utilities import timing_spans
+from uitestcore.utilities.log_formatting import LazyLogValue
+from uitestcore.utilities.worker import worker_path
+
+# Function call IDs for auto_log - a shared counter is much cheaper than a random string and IDs are never repeated
+_call_ids = itertools.count(1)
+
+
+class _QueueLoggingState:
+    """
+    Holds the listener writing queued log records to the file, if init_unique_log_file_logger was called with
+    use_queue=True
+    """
+
+    def __init__(self):
+        self.listener = None
+
+
+_queue_logging = _QueueLoggingState()
+
+
+class BatchedRotatingFileHandler(RotatingFileHandler):
+    """
+    A RotatingFileHandler which only flushes to disk every flush_every records, instead of after every record
+    """
+
+    def __init__(self, filename, mode="a", max_bytes=0, backup_count=0, encoding=None, flush_every=100):
+        """
+        :param filename: the path of the log file
+        :param mode: the mode to open the file in, defaults to 'a'
+        :param max_bytes: the size in bytes at which the file is rotated, defaults to 0 (never rotate)
+        :param backup_count: the number of rotated files to keep, defaults to 0
+        :param encoding: the encoding of the file, defaults to None
+        :param flush_every: the number of records to write between flushes, defaults to 100
+        """
+        super().__init__(filename, mode, max_bytes, backup_count, encoding)
+        self.flush_every = flush_every
+        self.unflushed = 0
+
+    def flush(self):
+        """
+        Called by emit after each record - only flushes once flush_every records have been written
+        """
+        self.unflushed += 1
+        if self.unflushed >= self.flush_every:
+            self.flush_now()
+
+    def flush_now(self):
+        """
+        Flush any records which have been written but not flushed
+        """
+        self.unflushed = 0
+        super().flush()
+
+    def close(self):
+        self.flush_now()
+        super().close()
+
+
+class DeferredFormattingQueueHandler(QueueHandler):
+    """
+    A QueueHandler which puts records on the queue as they are, so they are formatted by the listener thread
+    The standard QueueHandler formats each record before queueing it, which would leave the cost of formatting, e.g.
+    the summaries of auto_log arguments, on the thread being logged. The records are only passed between threads in
+    this process, so they do not need to be made picklable - but an argument changed after it is logged is written
+    as it is when the listener formats it
+    """
+
+    def prepare(self, record):
+        return record
+
+
+class BatchingQueueListener(QueueListener):
+    """
+    A QueueListener which flushes its handlers whenever the queue is empty, so records are written in batches while
+    logging is busy but are never left unflushed for long
+    """
+
+    def dequeue(self, block):
+        if block and self.queue.empty():
+            for handler in self.handlers:
+                getattr(handler, "flush_now", handler.flush)()
+        return super().dequeue(block)
 
 
 def init_unique_log_file_logger(file_path=os.path.abspath('logs'),
                                 level=logging.INFO,
-                                log_format='%(asctime)s - %(levelname)s - %(name)s: %(message)s'):
+                                log_format='%(asctime)s - %(levelname)s - %(name)s: %(message)s',
+                                use_queue=False,
+                                max_bytes=0,
+                                backup_count=0):
     """
     Setting up the basic config for the logging module. Creates a log file in the specified location.
     File name will be time.strftime('%Y%m%d-%H%M%S') + '.log'
     You can specify a logging level and the format of the log messages
+    When running in parallel, each worker's log file is saved in its own subfolder e.g. logs/worker-2
+    With use_queue=True, log records are put on a queue and written to the file by a background thread, so logging
+    (e.g. DEBUG logging from auto_log) does not slow down the test. The file is flushed in batches and can be rotated
 
     :param file_path: default os.path.abspath('logs')
     :param level: default logging.INFO
     :param log_format: default '%(asctime)s - %(levelname)s - %(name)s: %(message)s'
+    :param use_queue: write log records to the file on a background thread, default False
+    :param max_bytes: with use_queue, the size in bytes at which the log file is rotated, default 0 (never rotate)
+    :param backup_count: with use_queue, the number of rotated log files to keep, default 0
+    :return: the QueueListener writing to the file if use_queue is True, otherwise None
     """
+    # Each parallel worker writes its logs to its own folder
+    file_path = worker_path(file_path)
     if not os.path.exists(file_path):
         os.makedirs(file_path)
 
     for handler in logging.root.handlers[:]:
         logging.root.removeHandler(handler)
 
+    stop_queue_logging()
+
     file_name = os.path.join(file_path, time.strftime('%Y%m%d-%H%M%S') + '.log')
-    logging.basicConfig(filename=file_name, filemode='w', level=level, format=log_format)
+    if use_queue:
+        file_handler = BatchedRotatingFileHandler(file_name, "w", max_bytes, backup_count)
+        file_handler.setFormatter(logging.Formatter(log_format))
+        log_queue = queue.SimpleQueue()
+        _queue_logging.listener = BatchingQueueListener(log_queue, file_handler)
+        _queue_logging.listener.start()
+        logging.root.addHandler(DeferredFormattingQueueHandler(log_queue))
+        logging.root.setLevel(level)
+    else:
+        logging.basicConfig(filename=file_name, filemode='w', level=level, format=log_format)
     logging.debug("initialised logger to write to file %s with level %s and format %s",
                   file_name, level, log_format)
+    return _queue_logging.listener
+
+
+def stop_queue_logging():
+    """
+    Stop the background thread started by init_unique_log_file_logger(use_queue=True), after writing any queued log
+    records to the file. This is called automatically when Python exits
+    """
+    listener = _queue_logging.listener
+    if listener is not None:
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
+        _queue_logging.listener = None
+
+
+atexit.register(stop_queue_logging)
 
 
 def auto_log(logger_name):
@@ -40,31 +166,46 @@ def auto_log(logger_name):
     A decorator that wraps the passed in function, logs entering and exiting the function,
     and logs exceptions should one occur. Exceptions are reraised.
     Tag each method or function with @auto_log(__name__) to automatically log calls.
-    Logs these calls at DEBUG level.
+    Logs these calls at DEBUG level. Arguments and return values are summarised (see log_formatting) only if the
+    message is written, so large values do not make the log files huge.
+    The logger is looked up once when the function is decorated, and when DEBUG is not enabled the function is
+    called straight away, so the decorator adds almost nothing to each call
+    If span recording has been started (see timing_spans.start_span_recording), each call is also timed
 
     :param logger_name: The class or module name of the calling method. Use __name__
     """
 
     def decorator(func):
+        logger = logging.getLogger(logger_name)
+
+        @functools.wraps(func)
         def wrapper(*args, **kwargs):
-            logger = logging.getLogger(logger_name)
-            log_identifier = generate_random_string(6, chars=string.digits)
+            recorder = timing_spans.active_recorder
+            span = recorder.start(func.__qualname__, logger_name) if recorder is not None else None
+            log_identifier = None
             try:
+                if not logger.isEnabledFor(logging.DEBUG):
+                    return func(*args, **kwargs)
+
+                log_identifier = next(_call_ids)
                 entry_message = "Entering function %s (Function call ID %s) " \
                     "with args %s and kwargs %s"
-                logger.debug(entry_message, func.__name__, log_identifier, args, kwargs)
+                logger.debug(entry_message, func.__name__, log_identifier, LazyLogValue(args), LazyLogValue(kwargs))
                 return_value = func(*args, **kwargs)
                 exit_message = "Exited function %s (Function call ID %s) " \
                     "with return value %s"
-                logger.debug(exit_message, func.__name__, log_identifier, return_value)
+                logger.debug(exit_message, func.__name__, log_identifier, LazyLogValue(return_value))
                 return return_value
             except Exception as e:
-                # log the exception
+                # log the exception - this is at ERROR level so happens even when DEBUG is not enabled
                 err = "There was an exception thrown in function %s (Function call ID %s)"
-                logger.exception(err, func.__name__, log_identifier)
+                logger.exception(err, func.__name__, log_identifier or next(_call_ids))
 
                 # re-raise the exception
                 raise e
+            finally:
+                if span is not None:
+                    recorder.finish(span)
 
         return wrapper
     return decorator
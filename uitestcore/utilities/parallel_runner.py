@@ -0,0 +1,249 @@
+"""
+Runs behave feature files in parallel, with each worker running its share of the features in its own behave process
+(and so its own browser from open_browser)
+Features are shared between the workers using how long each took on previous runs, so the workers finish at about the
+same time, and the JUnit reports from the workers are merged into one report at the end
+
+e.g. python -m uitestcore.utilities.parallel_runner --workers 4 features -- --tags=~@wip
+
+Each worker process has the UITESTCORE_WORKER_ID environment variable set, and screenshots, axe reports and log files
+are saved in a separate folder for each worker (see worker.worker_path) so that the workers do not overwrite each other
+"""
+import argparse
+import glob
+import heapq
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from xml.etree import ElementTree
+from uitestcore.utilities.worker import WORKER_ID_VARIABLE
+
+DURATIONS_FILE = "feature_durations.json"
+REPORTS_PATH = "reports"
+
+
+def find_feature_files(paths):
+    """
+    :param paths: list of feature files and folders containing feature files
+    :return: sorted list of feature file paths
+    """
+    feature_files = set()
+    for path in paths:
+        if os.path.isdir(path):
+            feature_files.update(glob.glob(os.path.join(path, "**", "*.feature"), recursive=True))
+        else:
+            feature_files.add(path)
+    return sorted(feature_files)
+
+
+def load_durations(durations_file=DURATIONS_FILE):
+    """
+    :param durations_file: the path of the file saved by save_durations
+    :return: dict mapping each feature file path to how long it took on previous runs in seconds
+    """
+    try:
+        with open(durations_file, encoding="utf-8") as file:
+            return json.load(file)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def save_durations(durations, durations_file=DURATIONS_FILE):
+    """
+    Save how long each feature took, keeping the durations of features which were not run this time
+    :param durations: dict mapping each feature file path to how long it took in seconds
+    :param durations_file: the path of the file to save
+    """
+    all_durations = load_durations(durations_file)
+    all_durations.update(durations)
+    with open(durations_file, "w", encoding="utf-8") as file:
+        json.dump(all_durations, file, indent=2, sort_keys=True)
+
+
+def shard_features(feature_files, durations, workers):
+    """
+    Share the features between the workers so each worker has about the same total duration - the longest features are
+    given out first, each to the worker with the least work so far
+    Features with no previous duration are assumed to take the median duration of the others
+    :param feature_files: list of feature file paths
+    :param durations: dict mapping feature file paths to previous durations in seconds
+    :param workers: the number of workers
+    :return: list of lists of feature file paths, one for each worker which has any features
+    """
+    known = sorted(durations[feature] for feature in feature_files if feature in durations)
+    default_duration = known[len(known) // 2] if known else 1
+
+    shards = [(0, worker, []) for worker in range(workers)]
+    for feature in sorted(feature_files, key=lambda feature: durations.get(feature, default_duration), reverse=True):
+        total, worker, features = heapq.heappop(shards)
+        features.append(feature)
+        heapq.heappush(shards, (total + durations.get(feature, default_duration), worker, features))
+
+    return [features for _total, _worker, features in sorted(shards, key=lambda shard: shard[1]) if features]
+
+
+def run_shard(worker_id, feature_files, behave_args=(), reports_path=REPORTS_PATH):
+    """
+    Run some feature files in a new behave process
+    Any reports left in the worker's report folder by a previous run are deleted first, so they are not merged into
+    this run's results
+    :param worker_id: the number of the worker, used for the worker's output folders
+    :param feature_files: list of feature file paths to run
+    :param behave_args: any other arguments for behave e.g. tags
+    :param reports_path: the folder to save the JUnit reports in - each worker uses its own subfolder
+    :return: tuple of the behave exit code and the worker's JUnit report folder
+    """
+    junit_directory = os.path.join(reports_path, f"worker-{worker_id}")
+    shutil.rmtree(junit_directory, ignore_errors=True)
+    command = [sys.executable, "-m", "behave", "--junit", "--junit-directory", junit_directory,
+               *behave_args, *feature_files]
+    environment = dict(os.environ, **{WORKER_ID_VARIABLE: str(worker_id)})
+
+    print(f"Worker {worker_id} running {len(feature_files)} feature(s)")
+    return_code = subprocess.run(command, env=environment, check=False).returncode
+    return return_code, junit_directory
+
+
+def read_feature_durations(junit_directories, feature_files):
+    """
+    Work out how long each feature took from the JUnit reports written by behave, which name each test suite
+    "<class name>.<feature title>" - see _junit_class_name
+    :param junit_directories: list of folders containing JUnit reports
+    :param feature_files: list of the feature file paths which were run
+    :return: dict mapping feature file paths to durations in seconds
+    """
+    class_names = {_junit_class_name(feature): feature for feature in feature_files}
+
+    durations = {}
+    for suite in _test_suites(junit_directories):
+        name = suite.get("name", "")
+        # Use the longest match, as features/login.feature also matches the suites of features/login/admin.feature
+        matches = [class_name for class_name in class_names if name.startswith(class_name + ".")]
+        if matches:
+            feature = class_names[max(matches, key=len)]
+            durations[feature] = durations.get(feature, 0) + float(suite.get("time", 0))
+    return durations
+
+
+def _junit_class_name(feature_file):
+    """
+    :param feature_file: the path of a feature file
+    :return: the class name used by behave for the feature in JUnit reports - its path relative to behave's base
+        folder (see _behave_base_dir) without the extension and with dots for separators e.g. 'login' for
+        features/login.feature and 'login.admin' for features/login/admin.feature
+    """
+    feature_file = os.path.abspath(feature_file)
+    base_dir = _behave_base_dir(feature_file) or os.getcwd()
+    return os.path.splitext(os.path.relpath(feature_file, base_dir))[0].replace("\\", "/").replace("/", ".")
+
+
+def _behave_base_dir(feature_file, steps_dir="steps", environment_file="environment.py"):
+    """
+    Find the folder behave uses as its base folder for a feature file - the nearest folder above it which contains the
+    steps folder or environment.py
+    :param feature_file: the absolute path of a feature file
+    :param steps_dir: the name of the steps folder (default "steps")
+    :param environment_file: the name of the environment file (default "environment.py")
+    :return: the path of the base folder, or None if there is not one
+    """
+    folder = os.path.dirname(feature_file)
+    while True:
+        if os.path.isdir(os.path.join(folder, steps_dir)) or os.path.isfile(os.path.join(folder, environment_file)):
+            return folder
+        parent = os.path.dirname(folder)
+        if parent == folder:
+            return None
+        folder = parent
+
+
+def merge_junit_reports(junit_directories, output_file):
+    """
+    Merge the JUnit reports from all of the workers into one file
+    :param junit_directories: list of folders containing JUnit reports
+    :param output_file: the path of the merged report
+    :return: the merged report as an ElementTree Element
+    """
+    merged = ElementTree.Element("testsuites")
+    totals = {"tests": 0, "failures": 0, "errors": 0, "skipped": 0}
+    total_time = 0.0
+
+    for suite in _test_suites(junit_directories):
+        merged.append(suite)
+        for name in totals:
+            totals[name] += int(suite.get(name, 0))
+        total_time += float(suite.get("time", 0))
+
+    for name, total in totals.items():
+        merged.set(name, str(total))
+    merged.set("time", f"{total_time:.6f}")
+
+    output_folder = os.path.dirname(output_file)
+    if output_folder and not os.path.exists(output_folder):
+        os.makedirs(output_folder)
+    ElementTree.ElementTree(merged).write(output_file, encoding="utf-8", xml_declaration=True)
+    return merged
+
+
+def _test_suites(junit_directories):
+    """
+    :param junit_directories: list of folders containing JUnit reports
+    :return: generator of the testsuite elements in every report
+    """
+    for junit_directory in junit_directories:
+        for report in sorted(glob.glob(os.path.join(junit_directory, "*.xml"))):
+            root = ElementTree.parse(report).getroot()
+            yield from ([root] if root.tag == "testsuite" else root.iter("testsuite"))
+
+
+def run_in_parallel(paths, workers=None, behave_args=(), reports_path=REPORTS_PATH, durations_file=DURATIONS_FILE):
+    """
+    Run feature files in parallel and merge the results
+    :param paths: list of feature files and folders containing feature files
+    :param workers: the number of behave processes to run at once, defaults to the number of CPUs
+    :param behave_args: any other arguments for behave e.g. tags
+    :param reports_path: the folder to save the JUnit reports in, defaults to 'reports'. The merged report is saved
+        as junit.xml in this folder
+    :param durations_file: the file used to save how long each feature took, to balance future runs
+    :return: 0 if every worker passed, otherwise 1
+    """
+    feature_files = find_feature_files(paths)
+    shards = shard_features(feature_files, load_durations(durations_file), workers or os.cpu_count() or 1)
+    print(f"Running {len(feature_files)} feature(s) with {len(shards)} worker(s)")
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(len(shards), 1)) as executor:
+        results = list(executor.map(lambda shard: run_shard(shard[0] + 1, shard[1], behave_args, reports_path),
+                                    enumerate(shards)))
+    print(f"All workers finished in {time.perf_counter() - start:.1f}s")
+
+    junit_directories = [junit_directory for _return_code, junit_directory in results]
+    merge_junit_reports(junit_directories, os.path.join(reports_path, "junit.xml"))
+    save_durations(read_feature_durations(junit_directories, feature_files), durations_file)
+
+    return 0 if all(return_code == 0 for return_code, _junit_directory in results) else 1
+
+
+def main(args=None):
+    """
+    Run feature files in parallel from the command line - arguments after "--" are passed to behave
+    e.g. python -m uitestcore.utilities.parallel_runner --workers 4 features -- --tags=~@wip
+    :param args: list of command line arguments, defaults to sys.argv
+    :return: the exit code from run_in_parallel
+    """
+    parser = argparse.ArgumentParser(description="Run behave feature files in parallel")
+    parser.add_argument("paths", nargs="*", default=["features"], help="feature files or folders")
+    parser.add_argument("--workers", type=int, default=None, help="number of behave processes, defaults to CPUs")
+    parser.add_argument("--reports-path", default=REPORTS_PATH, help="folder for the JUnit reports")
+    parser.add_argument("--durations-file", default=DURATIONS_FILE, help="file of previous feature durations")
+    args = sys.argv[1:] if args is None else args
+    behave_args = args[args.index("--") + 1:] if "--" in args else []
+    options = parser.parse_args(args[:args.index("--")] if "--" in args else args)
+    return run_in_parallel(options.paths, options.workers, behave_args, options.reports_path, options.durations_file)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+"""
+Polling strategies which decide how long the Waiter sleeps between checks of a condition
+Each strategy also records how many polls and how long each condition took, so the schedule can be tuned
+"""
+import statistics
+from abc import ABC, abstractmethod
+from collections import defaultdict, deque
+from functools import partial
+from selenium.webdriver.support.wait import POLL_FREQUENCY
+
+DEFAULT_HISTORY_SIZE = 100
+
+
+class PollingStrategy(ABC):
+    """
+    Base class for polling strategies - subclasses provide the intervals to sleep for between polls
+    Only the most recent history_size waits are kept for each condition, so the history does not grow for the whole
+    run and follows changes in how long a condition takes - override history_size in a subclass to keep more or fewer
+    """
+    history_size = DEFAULT_HISTORY_SIZE
+
+    def __init__(self):
+        """
+        Default constructor which creates an empty history
+        """
+        self.history = defaultdict(partial(deque, maxlen=self.history_size))
+
+    @abstractmethod
+    def intervals(self, condition_key):
+        """
+        Generate the number of seconds to sleep before each poll after the first
+        :param condition_key: string identifying the condition being waited for e.g. the wait method and PageElement
+        :return: generator of intervals in seconds
+        """
+
+    def record(self, condition_key, polls, duration, succeeded):
+        """
+        Record the outcome of a wait
+        :param condition_key: string identifying the condition being waited for
+        :param polls: the number of times the condition was checked
+        :param duration: how long the wait took in seconds
+        :param succeeded: whether the condition was met before the timeout
+        """
+        self.history[condition_key].append((polls, duration, succeeded))
+
+    def summary(self):
+        """
+        Summarise the recorded waits for each condition
+        :return: dict mapping each condition key to its number of waits, timeouts, mean polls and mean duration
+        """
+        return {
+            condition_key: {
+                "waits": len(waits),
+                "timeouts": sum(1 for _polls, _duration, succeeded in waits if not succeeded),
+                "mean_polls": statistics.mean(polls for polls, _duration, _succeeded in waits),
+                "mean_duration": statistics.mean(duration for _polls, duration, _succeeded in waits)
+            }
+            for condition_key, waits in self.history.items()
+        }
+
+
+class FixedPolling(PollingStrategy):
+    """
+    Poll at a fixed frequency - this is the same as WebDriverWait
+    """
+
+    def __init__(self, poll_frequency=POLL_FREQUENCY):
+        """
+        :param poll_frequency: seconds to sleep between polls, defaults to the Selenium POLL_FREQUENCY (0.5)
+        """
+        super().__init__()
+        self.poll_frequency = poll_frequency
+
+    def intervals(self, condition_key):
+        while True:
+            yield self.poll_frequency
+
+
+class ExponentialBackoffPolling(PollingStrategy):
+    """
+    Poll quickly at first, then back off exponentially - fast conditions finish quickly and slow ones use fewer polls
+    """
+
+    def __init__(self, floor=0.05, ceiling=1.0, factor=2.0):
+        """
+        :param floor: seconds to sleep before the second poll, defaults to 0.05
+        :param ceiling: the longest sleep between polls in seconds, defaults to 1.0
+        :param factor: how much the sleep is multiplied by after each poll, defaults to 2.0
+        """
+        super().__init__()
+        self.floor = floor
+        self.ceiling = ceiling
+        self.factor = factor
+
+    def intervals(self, condition_key):
+        interval = self.floor
+        while True:
+            yield interval
+            interval = min(interval * self.factor, self.ceiling)
+
+
+class LearnedPolling(ExponentialBackoffPolling):
+    """
+    Learn how long each condition usually takes, sleep until just before then, and back off exponentially afterwards
+    Conditions with no successful waits recorded use plain exponential backoff
+    """
+
+    def __init__(self, floor=0.05, ceiling=1.0, factor=2.0, lead_fraction=0.8):
+        """
+        :param floor: seconds to sleep between the first polls, defaults to 0.05
+        :param ceiling: the longest sleep between polls in seconds, defaults to 1.0
+        :param factor: how much the sleep is multiplied by after each poll, defaults to 2.0
+        :param lead_fraction: the fraction of the median wait duration to sleep for before the second poll, defaults
+            to 0.8 so that most waits only need a few short polls after the first sleep
+        """
+        super().__init__(floor, ceiling, factor)
+        self.lead_fraction = lead_fraction
+
+    def intervals(self, condition_key):
+        durations = [duration for _polls, duration, succeeded in self.history.get(condition_key, []) if succeeded]
+        if durations:
+            yield max(self.floor, statistics.median(durations) * self.lead_fraction)
+        yield from super().intervals(condition_key)
@@ -0,0 +1,259 @@
+"""
+Sends requests to Azure DevOps, retrying when Azure is busy or throttling requests
+Failed requests are retried with jittered exponential backoff, or after the time given by Azure in the Retry-After or
+X-RateLimit-Reset headers. POST requests are not idempotent, so they are only retried when Azure cannot have acted on
+them - when the connection could not be made, or the response is 429 or 503. The number of requests in flight to each
+organisation is limited, and when Azure asks for requests to be delayed, every thread sending requests to that
+organisation waits
+See https://learn.microsoft.com/en-us/azure/devops/integrate/concepts/rate-limits
+"""
+import email.utils
+import random
+import threading
+import time
+from urllib.parse import urlparse
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ConnectTimeoutError
+
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+POST_RETRY_STATUS_CODES = (429, 503)
+DEFAULT_MAX_CONCURRENT = 8
+# Seconds to wait for a connection to be made, and for Azure to send each part of a response
+DEFAULT_TIMEOUT = (10, 60)
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+class RequestExecutor:
+    """
+    Sends requests with a session, retrying requests which fail because Azure is busy
+    Can be used as a context manager to close the session afterwards
+    """
+
+    def __init__(self, session=None, max_retries=5, backoff_factor=0.5, max_wait=60,
+                 max_concurrent=DEFAULT_MAX_CONCURRENT, timeout=DEFAULT_TIMEOUT):
+        """
+        Default constructor
+        :param session: the requests Session to send requests with, defaults to a new session with a connection for
+            each request allowed in flight - only a new session is closed when the executor is used as a context manager
+        :param max_retries: the maximum number of times to retry a request
+        :param backoff_factor: the maximum wait in seconds before the first retry, which doubles for each retry after -
+            the actual wait is a random time up to this so that threads do not all retry at once
+        :param max_wait: the longest time in seconds to wait before a retry, including when Azure asks for longer
+        :param max_concurrent: the maximum number of requests in flight to an organisation at once
+        :param timeout: the timeout for requests which do not give their own - either seconds, or a tuple of the
+            connect and read timeouts in seconds (default DEFAULT_TIMEOUT). A timed out request is retried like a
+            connection error, so a hung connection cannot hold a thread forever
+        """
+        self.owns_session = session is None
+        self.session = session or create_session(max_concurrent)
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_wait = max_wait
+        self.max_concurrent = max_concurrent
+        self.timeout = timeout
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        if self.owns_session:
+            self.session.close()
+
+    def get(self, url, **kwargs):
+        """
+        Send a GET request, retrying if needed
+        :param url: the URL to request
+        :param kwargs: any other arguments for requests e.g. params and auth
+        :return: the final response
+        """
+        return self.request("get", url, **kwargs)
+
+    def post(self, url, make_data=None, **kwargs):
+        """
+        Send a POST request, retrying if needed
+        :param url: the URL to request
+        :param make_data: function called before each attempt to create the request body, for bodies which can only be
+            read once e.g. AttachmentBody
+        :param kwargs: any other arguments for requests e.g. params, auth and data
+        :return: the final response
+        """
+        return self.request("post", url, make_data, **kwargs)
+
+    def request(self, method, url, make_data=None, **kwargs):
+        """
+        Send a request, retrying when is_retryable says the request can safely be sent again
+        :param method: the request method e.g. 'get'
+        :param url: the URL to request
+        :param make_data: function called before each attempt to create the request body
+        :param kwargs: any other arguments for requests e.g. params, auth and timeout (default the executor's timeout)
+        :return: the final response, which may still be an error status if every retry failed
+        :raises requests.RequestException: if the connection failed on the final attempt
+        """
+        limiter = organisation_limiter(url, self.max_concurrent)
+        kwargs.setdefault("timeout", self.timeout)
+
+        for attempt in range(self.max_retries + 1):
+            if make_data:
+                kwargs["data"] = make_data()
+
+            response = error = None
+            with limiter:
+                try:
+                    response = getattr(self.session, method)(url, **kwargs)
+                except (requests.ConnectionError, requests.Timeout) as request_error:
+                    error = request_error
+                finally:
+                    if make_data and hasattr(kwargs["data"], "close"):
+                        kwargs["data"].close()
+
+            rate_limit_wait = min(get_rate_limit_wait(response), self.max_wait) if response is not None else 0
+            limiter.pause(rate_limit_wait)
+
+            if attempt == self.max_retries or not is_retryable(method, response, error):
+                break
+
+            reason = error or f"response {response.status_code}"
+            if rate_limit_wait:
+                print(f"Retrying {method.upper()} {url} after {rate_limit_wait:.1f}s as requested - {reason}")
+            else:
+                backoff = random.uniform(0, min(self.max_wait, self.backoff_factor * 2 ** attempt))
+                print(f"Retrying {method.upper()} {url} after {backoff:.1f}s - {reason}")
+                time.sleep(backoff)
+
+        if error:
+            raise error
+        return response
+
+
+class OrganisationLimiter:
+    """
+    Limits the requests in flight to an organisation, and holds back new requests when Azure asks for a delay
+    Use as a context manager around sending a request
+    """
+
+    def __init__(self, max_concurrent):
+        """
+        Default constructor
+        :param max_concurrent: the maximum number of requests in flight at once
+        """
+        self.semaphore = threading.BoundedSemaphore(max_concurrent)
+        self.resume_at = 0
+        self.lock = threading.Lock()
+
+    def __enter__(self):
+        with self.lock:
+            delay = self.resume_at - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        self.semaphore.acquire()
+        return self
+
+    def __exit__(self, *args):
+        self.semaphore.release()
+
+    def pause(self, seconds):
+        """
+        Hold back requests which have not started yet
+        :param seconds: the number of seconds from now to hold requests back for
+        """
+        if seconds > 0:
+            with self.lock:
+                self.resume_at = max(self.resume_at, time.monotonic() + seconds)
+
+
+def create_session(pool_size=DEFAULT_MAX_CONCURRENT):
+    """
+    Create a session which keeps connections open between requests, with enough pooled connections for each thread
+    :param pool_size: the number of connections to keep open to each host
+    :return: the requests Session
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def organisation_limiter(url, max_concurrent=DEFAULT_MAX_CONCURRENT):
+    """
+    Get the limiter shared by every request to the organisation in a URL
+    :param url: the request URL e.g. https://dev.azure.com/organisation/project/_apis/test/runs
+    :param max_concurrent: the maximum number of requests in flight at once - callers using a different limit for the
+        same organisation get a separate limiter
+    :return: the OrganisationLimiter
+    """
+    parsed_url = urlparse(url)
+    organisation = parsed_url.netloc
+    if organisation == "dev.azure.com":
+        organisation += "/" + parsed_url.path.strip("/").split("/")[0]
+
+    key = (organisation, max_concurrent)
+    with _limiters_lock:
+        if key not in _limiters:
+            _limiters[key] = OrganisationLimiter(max_concurrent)
+        return _limiters[key]
+
+
+def is_retryable(method, response, error):
+    """
+    Check whether a failed request can be sent again - any request can be retried when the connection could not be
+    made, but a POST which reached Azure may have been acted on, e.g. an attachment created, so POSTs are only retried
+    for POST_RETRY_STATUS_CODES rather than every one of RETRY_STATUS_CODES
+    :param method: the request method e.g. 'get'
+    :param response: the response, or None if the request failed
+    :param error: the ConnectionError or Timeout raised by the request, or None if there was a response
+    :return: bool
+    """
+    if method.lower() != "post":
+        return error is not None or response.status_code in RETRY_STATUS_CODES
+    if error is not None:
+        return is_connect_failure(error)
+    return response.status_code in POST_RETRY_STATUS_CODES
+
+
+def is_connect_failure(error):
+    """
+    Check whether a request failed before it was sent, e.g. the connection was refused or timed out, or the host name
+    could not be resolved
+    :param error: the exception raised by requests
+    :return: bool
+    """
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    reason = error.args[0] if error.args else None
+    # Connection errors wrap a urllib3 MaxRetryError, whose reason is the underlying error
+    return isinstance(getattr(reason, "reason", reason), ConnectTimeoutError)
+
+
+def get_rate_limit_wait(response):
+    """
+    Work out how long Azure has asked for requests to be delayed, from the Retry-After header or, when no requests are
+    remaining, the X-RateLimit-Reset header
+    :param response: the response from Azure
+    :return: the number of seconds to wait, 0 if there is no need to wait
+    """
+    retry_after = response.headers.get("Retry-After")
+    if retry_after:
+        try:
+            return max(float(retry_after), 0)
+        except ValueError:
+            pass
+        # Retry-After can also be a date
+        try:
+            return max(email.utils.parsedate_to_datetime(retry_after).timestamp() - time.time(), 0)
+        except (TypeError, ValueError):
+            return 0
+
+    remaining = response.headers.get("X-RateLimit-Remaining")
+    reset = response.headers.get("X-RateLimit-Reset")
+    try:
+        if remaining is not None and reset and float(remaining) <= 0:
+            return max(float(reset) - time.time(), 0)
+    except ValueError:
+        # A malformed header should not fail the request
+        pass
+
+    return 0
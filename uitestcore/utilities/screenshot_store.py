@@ -0,0 +1,71 @@
+"""
+Stores each unique screenshot once - repeated failures and reruns of flaky tests often produce identical screenshots
+Every screenshot is named after the SHA-256 hash of its contents in a hidden store folder, and the screenshot files
+themselves become hard links to the stored copy, so identical screenshots only use disk space once. Moving the files
+into folders for each scenario keeps them linked to the stored copy
+"""
+import hashlib
+import os
+import shutil
+
+STORE_FOLDER = ".store"
+
+
+class ScreenshotStore:
+    """
+    A content-addressed store of screenshots
+    """
+
+    def __init__(self, root):
+        """
+        Default constructor
+        :param root: the screenshots folder - the store is kept in a hidden folder inside it
+        """
+        self.path = os.path.join(root, STORE_FOLDER)
+
+    def add(self, file_name):
+        """
+        Add a screenshot to the store - if an identical screenshot is already stored, the file is replaced with a link
+        to it, otherwise the file is linked into the store
+        If hard links are not supported, the file is copied into the store and duplicates are left as they are
+        :param file_name: the path of the screenshot
+        :return: the SHA-256 hash of the screenshot
+        """
+        digest = file_digest(file_name)
+        stored_file_name = os.path.join(self.path, digest + os.path.splitext(file_name)[1])
+        if not os.path.exists(self.path):
+            os.makedirs(self.path, exist_ok=True)
+
+        if not os.path.exists(stored_file_name):
+            try:
+                os.link(file_name, stored_file_name)
+                return digest
+            except FileExistsError:
+                # An identical screenshot was stored at the same time e.g. by another parallel worker
+                pass
+            except OSError:
+                shutil.copyfile(file_name, stored_file_name)
+                return digest
+
+        if not os.path.samefile(file_name, stored_file_name):
+            # Link to a temporary name first so the screenshot is never missing if linking fails
+            temporary_file_name = file_name + ".link"
+            try:
+                os.link(stored_file_name, temporary_file_name)
+                os.replace(temporary_file_name, file_name)
+            except OSError:
+                if os.path.exists(temporary_file_name):
+                    os.remove(temporary_file_name)
+        return digest
+
+
+def file_digest(file_name):
+    """
+    :param file_name: the path of a file
+    :return: the SHA-256 hash of the file contents as a hex string
+    """
+    digest = hashlib.sha256()
+    with open(file_name, "rb") as file:
+        for block in iter(lambda: file.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
@@ -0,0 +1,187 @@
+"""
+Records how long each call to a function decorated with auto_log takes, with the calls nested inside it as children
+Use this to find which helpers dominate a slow scenario e.g. finding, waiting, screenshotting or uploading
+Spans are kept in memory and can be saved as a Chrome trace file, which can be opened in chrome://tracing or
+https://ui.perfetto.dev (the file is loaded locally in the browser and not uploaded anywhere)
+
+e.g. in environment.py:
+    def before_scenario(context, scenario):
+        start_span_recording()
+
+    def after_scenario(context, scenario):
+        stop_span_recording().export_chrome_trace(scenario.name)
+"""
+import functools
+import itertools
+import json
+import os
+import threading
+import time
+from collections import deque, namedtuple
+
+from uitestcore.utilities.string_util import remove_invalid_characters
+
+TRACES_PATH = "traces"
+
+Span = namedtuple("Span", ["span_id", "parent_id", "name", "category", "start_ns", "duration_ns", "thread_id"])
+
+# The recorder used by auto_log - None when spans are not being recorded, so that auto_log can skip them cheaply
+active_recorder = None
+
+
+class SpanRecorder:
+    """
+    Keeps the most recent spans in a ring buffer, so memory use is bounded however long the run is
+    """
+
+    def __init__(self, capacity=100000):
+        """
+        Default constructor
+        :param capacity: the number of spans to keep - when full, the oldest spans are dropped (default 100000)
+        """
+        self.spans = deque(maxlen=capacity)
+        self._span_ids = itertools.count(1)
+        self._local = threading.local()
+
+    def _stack(self):
+        """
+        :return: the IDs of the spans which are currently open on this thread, innermost last
+        """
+        try:
+            return self._local.stack
+        except AttributeError:
+            self._local.stack = []
+            return self._local.stack
+
+    def start(self, name, category):
+        """
+        Open a span as a child of the innermost open span on this thread
+        :param name: the name of the span e.g. the function name
+        :param category: the category of the span e.g. the module name
+        :return: token to pass to finish
+        """
+        stack = self._stack()
+        span_id = next(self._span_ids)
+        parent_id = stack[-1] if stack else None
+        stack.append(span_id)
+        return span_id, parent_id, name, category, time.perf_counter_ns()
+
+    def finish(self, token):
+        """
+        Close a span opened by start and add it to the buffer
+        :param token: the value returned by start
+        """
+        end_ns = time.perf_counter_ns()
+        span_id, parent_id, name, category, start_ns = token
+        stack = self._stack()
+        if stack and stack[-1] == span_id:
+            stack.pop()
+        self.spans.append(Span(span_id, parent_id, name, category, start_ns, end_ns - start_ns,
+                               threading.get_ident()))
+
+    def clear(self):
+        """
+        Remove all recorded spans
+        """
+        self.spans.clear()
+
+    def summary(self):
+        """
+        Summarise the recorded spans by name - self time excludes time spent in child spans, so it shows where the
+        time actually went
+        :return: dict mapping each span name to its call count, total and self time in seconds, largest self time first
+        """
+        child_time = {}
+        for span in self.spans:
+            if span.parent_id is not None:
+                child_time[span.parent_id] = child_time.get(span.parent_id, 0) + span.duration_ns
+
+        totals = {}
+        for span in self.spans:
+            total = totals.setdefault(span.name, {"calls": 0, "total_time": 0, "self_time": 0})
+            total["calls"] += 1
+            total["total_time"] += span.duration_ns / 1e9
+            total["self_time"] += (span.duration_ns - child_time.get(span.span_id, 0)) / 1e9
+
+        return dict(sorted(totals.items(), key=lambda item: item[1]["self_time"], reverse=True))
+
+    def to_chrome_trace(self):
+        """
+        Convert the recorded spans to the Chrome trace event format
+        :return: dict which can be saved as JSON
+        """
+        process_id = os.getpid()
+        events = [{
+            "name": span.name,
+            "cat": span.category,
+            "ph": "X",
+            "ts": span.start_ns / 1000,
+            "dur": span.duration_ns / 1000,
+            "pid": process_id,
+            "tid": span.thread_id,
+            "args": {"span_id": span.span_id, "parent_id": span.parent_id}
+        } for span in sorted(self.spans, key=lambda span: span.start_ns)]
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def export_chrome_trace(self, description, folder=TRACES_PATH):
+        """
+        Save the recorded spans as a Chrome trace file
+        :param description: information about the trace to be used as the file name e.g. the scenario name
+        :param folder: the folder to save the file in (default "traces")
+        :return: the path of the saved file
+        """
+        if not os.path.exists(folder):
+            os.makedirs(folder)
+
+        file_name = os.path.join(folder, remove_invalid_characters(description)[:100] + ".json")
+        with open(file_name, "w", encoding="utf-8") as trace_file:
+            json.dump(self.to_chrome_trace(), trace_file)
+        return file_name
+
+
+def record_span(category):
+    """
+    A decorator that records a span for each call while span recording is active, without logging anything
+    Use this instead of auto_log for functions whose arguments or return value should not be written to the log
+    e.g. access tokens or file contents
+
+    :param category: the class or module name of the decorated function. Use __name__
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            recorder = active_recorder
+            if recorder is None:
+                return func(*args, **kwargs)
+
+            span = recorder.start(func.__qualname__, category)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                recorder.finish(span)
+
+        return wrapper
+
+    return decorator
+
+
+def start_span_recording(capacity=100000):
+    """
+    Start recording a span for every call to a function decorated with auto_log
+    :param capacity: the number of spans to keep (default 100000)
+    :return: the new SpanRecorder
+    """
+    global active_recorder
+    active_recorder = SpanRecorder(capacity)
+    return active_recorder
+
+
+def stop_span_recording():
+    """
+    Stop recording spans
+    :return: the SpanRecorder which was recording, or None if spans were not being recorded
+    """
+    global active_recorder
+    recorder, active_recorder = active_recorder, None
+    return recorder
@@ -0,0 +1,99 @@
+"""
+Records which attachments have been uploaded, so that if attaching files stops partway through, running it again only
+uploads the files which were not finished
+The journal is a file with one JSON entry per line, which is appended to and flushed to disk as each upload starts and
+finishes. An upload which started but was not recorded as finished may or may not have reached Azure, so it is checked
+before being uploaded again
+"""
+import json
+import os
+import threading
+
+UPLOAD_JOURNAL_FILE = ".upload_journal.jsonl"
+STARTED = "started"
+COMPLETED = "completed"
+
+
+class UploadJournal:
+    """
+    A journal of attachment uploads, identified by run ID, test result ID and the hash of the file
+    """
+
+    def __init__(self, file_path):
+        """
+        Default constructor which reads any entries already in the journal
+        :param file_path: the path of the journal file, which is created when the first entry is recorded
+        """
+        self.file_path = file_path
+        self.started = set()
+        self.completed = set()
+        self.lock = threading.Lock()
+        self._load()
+
+    def is_completed(self, run_id, test_case_result_id, digest):
+        """
+        :return: whether the file is known to have been attached to the test result
+        """
+        return (run_id, test_case_result_id, digest) in self.completed
+
+    def is_started(self, run_id, test_case_result_id, digest):
+        """
+        :return: whether an upload of the file to the test result started but was not recorded as finished
+        """
+        key = (run_id, test_case_result_id, digest)
+        return key in self.started and key not in self.completed
+
+    def record_started(self, run_id, test_case_result_id, digest, file_name):
+        """
+        Record that a file is about to be uploaded
+        :param run_id: the run ID
+        :param test_case_result_id: the test result ID
+        :param digest: the hash of the file contents
+        :param file_name: the name of the attachment
+        """
+        self._record(STARTED, run_id, test_case_result_id, digest, file_name)
+
+    def record_completed(self, run_id, test_case_result_id, digest, file_name):
+        """
+        Record that a file has been attached
+        :param run_id: the run ID
+        :param test_case_result_id: the test result ID
+        :param digest: the hash of the file contents
+        :param file_name: the name of the attachment
+        """
+        self._record(COMPLETED, run_id, test_case_result_id, digest, file_name)
+
+    def _record(self, state, run_id, test_case_result_id, digest, file_name):
+        """
+        Append an entry to the journal and make sure it is written to disk, so it survives the process being killed
+        The journal only saves work, so if it cannot be written a warning is printed and the upload carries on
+        """
+        key = (run_id, test_case_result_id, digest)
+        entry = json.dumps({"state": state, "run_id": run_id, "result_id": test_case_result_id, "digest": digest,
+                            "file_name": file_name})
+        with self.lock:
+            (self.completed if state == COMPLETED else self.started).add(key)
+            try:
+                with open(self.file_path, "a", encoding="utf-8") as journal_file:
+                    journal_file.write(entry + "\n")
+                    journal_file.flush()
+                    os.fsync(journal_file.fileno())
+            except OSError as error:
+                print(f"##vso[task.logissue type=warning]Could not write to upload journal {self.file_path} - {error}")
+
+    def _load(self):
+        """
+        Read the entries already in the journal - a line which is not valid JSON, e.g. one which was only partly
+        written when the process was killed, is ignored
+        """
+        try:
+            with open(self.file_path, encoding="utf-8") as journal_file:
+                for line in journal_file:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    key = (entry["run_id"], entry["result_id"], entry["digest"])
+                    (self.completed if entry["state"] == COMPLETED else self.started).add(key)
+        except FileNotFoundError:
+            pass
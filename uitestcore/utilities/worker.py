@@ -0,0 +1,18 @@
+"""
+Identifies the worker process when feature files are run in parallel by parallel_runner, so that each worker can save
+its output files in its own folder
+"""
+import os
+
+WORKER_ID_VARIABLE = "UITESTCORE_WORKER_ID"
+
+
+def worker_path(path):
+    """
+    Get the folder to use for output files e.g. screenshots in the current worker
+    :param path: the folder used when not running in parallel e.g. 'screenshots'
+    :return: the path with a subfolder for the worker e.g. 'screenshots/worker-2', or the path unchanged when not
+        running in parallel
+    """
+    worker_id = os.environ.get(WORKER_ID_VARIABLE)
+    return os.path.join(path, f"worker-{worker_id}") if worker_id else path
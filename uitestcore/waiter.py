@@ -3,13 +3,21 @@ Created by Tony Lawson
 """
 import logging
 import time
+from selenium.common.exceptions import JavascriptException, NoSuchElementException, TimeoutException, \
+    WebDriverException
 from selenium.webdriver.support import wait
 from selenium.webdriver.support.expected_conditions import presence_of_element_located, alert_is_present
 from selenium.webdriver.support.expected_conditions import visibility_of_element_located
-from selenium.webdriver.support.wait import WebDriverWait
 from uitestcore import custom_expected_conditions
-from uitestcore.custom_expected_conditions import ElementHasAttribute
+from uitestcore.custom_expected_conditions import ElementHasAttribute, check_condition_groups
+from uitestcore.finder import Finder
+from uitestcore.utilities.browser_scripts import DOCUMENT_STATE_SCRIPT, WAIT_FOR_CONDITION_SCRIPT
 from uitestcore.utilities.logger_handler import auto_log
+from uitestcore.utilities.polling_strategy import FixedPolling
+
+# Parts of the errors given by browsers when the page navigates while an async script is waiting, e.g. Chrome's
+# "document unloaded while waiting for result" and Firefox's "Document was unloaded" or "script was interrupted"
+NAVIGATION_ERROR_MESSAGES = ("unloaded", "interrupted")
 
 
 class Waiter:
@@ -18,32 +26,71 @@ class Waiter:
     Uses both standard and custom expected conditions
     """
 
-    def __init__(self, driver, finder, wait_time=10, existing_logger=None):
+    def __init__(self, driver, finder, wait_time=10, existing_logger=None, event_driven=False, polling=None):
         """
         Default constructor which passes the control of webDriver to the current page
         :param driver: the Selenium web driver
         :param finder: Finder used to find elements before waiting for them
         :param wait_time: number of seconds as an Integer, defaults to 10
         :param existing_logger: logger object used to save information to a log file
+        :param event_driven: if True, waits for elements to be visible, present or have an attribute are done inside
+            the browser using a MutationObserver, finishing as soon as the condition is met instead of at the next
+            poll (default False). If the page navigates, or the driver's script timeout is shorter than wait_time,
+            the script is run again for the rest of the wait time
+        :param polling: PollingStrategy deciding how long to sleep between polls, defaults to FixedPolling which polls
+            every 0.5 seconds like WebDriverWait. Share one instance between pages to collect its history in one place
         """
         self.driver = driver
         self.find = finder
         self.wait_time = wait_time
         self.logger = existing_logger or logging.getLogger(__name__)
+        self.event_driven = event_driven
+        self.polling = polling or FixedPolling()
+
+    @auto_log(__name__)
+    def get_document_identity(self):
+        """
+        Get the identity of the current page, to be passed to for_page_to_load after an action which navigates
+        :return: tuple of (document identity, url), or None if it could not be read e.g. before the browser has
+            opened a page - for_page_to_load then waits for the page to be ready in the usual way
+        """
+        try:
+            identity, _ready_state, url = self.driver.execute_script(DOCUMENT_STATE_SCRIPT)
+        except (WebDriverException, TypeError, ValueError) as exc:
+            self.logger.debug("Could not read the identity of the current page - %s", exc)
+            return None
+        return identity, url
 
     @auto_log(__name__)
-    def for_page_to_load(self):
+    def for_page_to_load(self, previous_document=None):
         """
         Wait for browser to load using custom expected condition BrowserIsReady
+        If the identity of the page from before the navigation is given, waits for a new page to be ready using
+        NewPageIsReady instead, which does not need an initial sleep
+        :param previous_document: (optional) the result of get_document_identity from before navigating
         """
         self.logger.info("Waiting for browser")
 
-        # Initial sleep before the first check - some tests can fail without this
-        time.sleep(wait.POLL_FREQUENCY)
+        if previous_document is not None:
+            self._until(custom_expected_conditions.NewPageIsReady(previous_document), "for_page_to_load")
+        else:
+            # Initial sleep before the first check - some tests can fail without this
+            time.sleep(wait.POLL_FREQUENCY)
 
-        WebDriverWait(self.driver, self.wait_time).until(custom_expected_conditions.BrowserIsReady())
+            self._until(custom_expected_conditions.BrowserIsReady(), "for_page_to_load")
         self.logger.info("Finished waiting for browser")
 
+    @auto_log(__name__)
+    def for_network_idle(self, quiet_period_ms=500):
+        """
+        Wait for the page to stop making fetch/XHR requests and running animations, using custom expected condition
+        NetworkIsIdle - use this instead of a fixed sleep when a page is still loading data after it is 'complete'
+        :param quiet_period_ms: how long the page must have been inactive for, in milliseconds, defaults to 500
+        """
+        self.logger.info("Waiting for the network to be idle for %sms", quiet_period_ms)
+        self._until(custom_expected_conditions.NetworkIsIdle(quiet_period_ms), "for_network_idle")
+        self.logger.info("Network is idle")
+
     @auto_log(__name__)
     def for_element_to_be_visible(self, page_element):
         """
@@ -52,8 +99,11 @@ class Waiter:
         :return:
         """
         self.logger.info("Waiting for %s to be visible", page_element)
-        WebDriverWait(self.driver, self.wait_time).until(visibility_of_element_located(
-            (page_element.locator_type, page_element.locator_value)))
+        if self.event_driven:
+            self._wait_in_browser("visible", page_element)
+        else:
+            self._until(visibility_of_element_located((page_element.locator_type, page_element.locator_value)),
+                        f"for_element_to_be_visible {page_element}")
         self.logger.info("Found element")
 
     @auto_log(__name__)
@@ -63,8 +113,11 @@ class Waiter:
         :param page_element: PageElement instance representing the element
         """
         self.logger.info("Waiting for %s to be present", page_element)
-        WebDriverWait(self.driver, self.wait_time).until(presence_of_element_located(
-            (page_element.locator_type, page_element.locator_value)))
+        if self.event_driven:
+            self._wait_in_browser("present", page_element)
+        else:
+            self._until(presence_of_element_located((page_element.locator_type, page_element.locator_value)),
+                        f"for_element_to_be_present {page_element}")
         self.logger.info("Found element")
 
     @auto_log(__name__)
@@ -77,15 +130,118 @@ class Waiter:
         """
         self.logger.info("Waiting for %s to be have attribute %s=%s", page_element, attribute_name,
                          expected_attribute_value)
-        WebDriverWait(self.driver, self.wait_time).until(ElementHasAttribute(self.find, page_element,
-                                                                             attribute_name, expected_attribute_value))
+        if self.event_driven:
+            self._wait_in_browser("attribute", page_element, attribute_name, expected_attribute_value)
+        else:
+            self._until(ElementHasAttribute(self.find, page_element, attribute_name, expected_attribute_value),
+                        f"for_element_to_have_attribute {page_element} {attribute_name}")
         self.logger.info("Found element with expected attribute")
 
+    @auto_log(__name__)
+    def for_all(self, conditions):
+        """
+        Wait for all of the given conditions to hold, checking them all with one script call per poll
+        :param conditions: list of ElementCondition instances e.g. ElementCondition.visible(page_element)
+        """
+        self.logger.info("Waiting for all of: %s", ", ".join(str(condition) for condition in conditions))
+        self._until(lambda driver: check_condition_groups(driver, [conditions])[0],
+                    "for_all " + ", ".join(str(condition) for condition in conditions))
+        self.logger.info("All conditions met")
+
+    @auto_log(__name__)
+    def for_any(self, conditions):
+        """
+        Wait for any of the given conditions to hold, checking them all with one script call per poll
+        e.g. wait.for_any([[ElementCondition.visible(a), ElementCondition.has_attribute(b, "x", "y")],
+                           ElementCondition.present(error_banner)])
+        :param conditions: list of branches - each an ElementCondition, or a list of ElementConditions which must
+            all hold for that branch to be satisfied
+        :return: the index of the first branch which was satisfied
+        """
+        branches = [branch if isinstance(branch, (list, tuple)) else [branch] for branch in conditions]
+        description = " or ".join(" and ".join(str(condition) for condition in branch) for branch in branches)
+        self.logger.info("Waiting for any of: %s", description)
+
+        def first_satisfied_branch(driver):
+            results = check_condition_groups(driver, branches)
+            return next((index + 1 for index, result in enumerate(results) if result), None)
+
+        # The branch number is 1-based while waiting so that the first branch is truthy
+        branch_index = self._until(first_satisfied_branch, "for_any " + description) - 1
+        self.logger.info("Condition met: %s", " and ".join(str(condition) for condition in branches[branch_index]))
+        return branch_index
+
     @auto_log(__name__)
     def for_alert_to_be_present(self):
         """
         Wait for alert to be present, using selenium expected condition class
         """
         self.logger.info("Waiting for alert to be present")
-        WebDriverWait(self.driver, self.wait_time).until(alert_is_present())
+        self._until(alert_is_present(), "for_alert_to_be_present")
         self.logger.info("Switched to alert")
+
+    def _until(self, condition, condition_key):
+        """
+        Call the condition with the driver until it returns a truthy value, sleeping between polls for the intervals
+        given by the polling strategy - otherwise this behaves the same as WebDriverWait.until
+        :param condition: callable taking the driver e.g. an expected condition
+        :param condition_key: string identifying the condition, used by the polling strategy to record its history
+        :return: the truthy value returned by the condition
+        :raises TimeoutException: if the condition is not met within the wait time
+        """
+        screen = None
+        stacktrace = None
+        polls = 0
+        start_time = time.monotonic()
+        end_time = start_time + self.wait_time
+        intervals = self.polling.intervals(condition_key)
+
+        while True:
+            polls += 1
+            if isinstance(self.find, Finder):
+                # The page may have changed since the last poll, so cached elements must be checked before reuse
+                self.find.page_may_have_changed()
+            try:
+                value = condition(self.driver)
+                if value:
+                    self.polling.record(condition_key, polls, time.monotonic() - start_time, True)
+                    return value
+            except NoSuchElementException as exc:
+                screen = getattr(exc, "screen", None)
+                stacktrace = getattr(exc, "stacktrace", None)
+            time.sleep(min(next(intervals), max(0, end_time - time.monotonic())))
+            if time.monotonic() > end_time:
+                break
+
+        self.polling.record(condition_key, polls, time.monotonic() - start_time, False)
+        raise TimeoutException("", screen, stacktrace)
+
+    def _wait_in_browser(self, condition, page_element, *args):
+        """
+        Wait for a condition on the first element matching the page element with a single async script - the browser
+        checks the condition whenever the DOM changes, so the wait ends as soon as it is met
+        The script is stopped when the page navigates or the driver's script timeout passes, in which case it is run
+        again for the rest of the wait time
+        :param condition: the name of the condition in WAIT_FOR_CONDITION_SCRIPT e.g. "visible"
+        :param page_element: PageElement instance representing the element
+        :param args: any extra arguments needed by the condition e.g. attribute name and expected value
+        :raises TimeoutException: if the condition is not met within the wait time
+        """
+        end_time = time.monotonic() + self.wait_time
+
+        while True:
+            remaining = max(0, end_time - time.monotonic())
+            try:
+                if self.driver.execute_async_script(WAIT_FOR_CONDITION_SCRIPT, condition, page_element.locator_type,
+                                                    page_element.locator_value, list(args), round(remaining * 1000)):
+                    return
+            except TimeoutException:
+                # The driver's script timeout passed before the wait time
+                self.logger.debug("Script timed out waiting for %s to be %s", page_element, condition)
+            except JavascriptException as exc:
+                if not any(message in str(exc.msg).lower() for message in NAVIGATION_ERROR_MESSAGES):
+                    raise
+                self.logger.debug("Page navigated while waiting for %s to be %s", page_element, condition)
+
+            if time.monotonic() >= end_time:
+                raise TimeoutException(f"{page_element} was not {condition} after {self.wait_time} seconds")